@@ -3,6 +3,8 @@ import mplfinance as mpf
 import io
 from sqlalchemy import text
 
+from shared.indicator_store import load_indicator_map
+
 class ChartGenerator:
     
     # --- Custom Colors ---
@@ -93,21 +95,16 @@ class ChartGenerator:
         df.set_index('date', inplace=True)
         df.sort_index(inplace=True)
 
-        # 2. Fetch Indicators
-        min_date = df.index.min()
-        query_indicators = text("""
-            SELECT date, indicator_name, value 
-            FROM indicators 
-            WHERE stock_id = :stock_id AND date >= :min_date
-        """)
-        result_indicators = await db_session.execute(query_indicators, {"stock_id": stock_id, "min_date": min_date})
-        rows_indicators = result_indicators.fetchall()
+        # 2. Fetch Indicators (already one row per date in the wide layout)
+        min_date = df.index.min().date()
+        max_date = df.index.max().date()
+        stored = await load_indicator_map(db_session, [stock_id], min_date, max_date, names=indicators)
+        by_date = stored.get(stock_id, {})
 
-        if rows_indicators:
-            ind_df = pd.DataFrame(rows_indicators, columns=['date', 'indicator_name', 'value'])
-            ind_df['date'] = pd.to_datetime(ind_df['date'])
-            ind_pivot = ind_df.pivot(index='date', columns='indicator_name', values='value')
-            df = df.join(ind_pivot)
+        if by_date:
+            ind_df = pd.DataFrame.from_dict(by_date, orient='index')
+            ind_df.index = pd.to_datetime(ind_df.index)
+            df = df.join(ind_df)
 
         # 2b. Fallback calc for key overlays when indicators are missing/partial
         def _needs_indicator(name: str) -> bool:
@@ -0,0 +1,73 @@
+"""
+Copy EAV indicators (`indicators`) into the wide `indicator_snapshots` layout.
+
+Runs one set-based INSERT ... SELECT per month and commits after each, so it can
+be interrupted and re-run (existing snapshots are kept). After it completes,
+set INDICATOR_STORAGE=wide to read and write the wide table only.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from src.database import AsyncSessionLocal
+from shared.indicator_store import migrate_to_snapshots
+from shared.models import Indicator
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+
+
+async def migrate(start: date | None = None, end: date | None = None) -> int:
+    async with AsyncSessionLocal() as session:
+        bounds = (await session.execute(select(func.min(Indicator.date), func.max(Indicator.date)))).one()
+        start = start or bounds[0]
+        end = end or bounds[1]
+        if start is None or end is None:
+            logger.info("No indicators to migrate.")
+            return 0
+
+        total = 0
+        chunk_start = date(start.year, start.month, 1)
+        while chunk_start <= end:
+            chunk_end = _next_month(chunk_start)
+            created = await migrate_to_snapshots(
+                session, max(chunk_start, start), min(chunk_end, end + timedelta(days=1))
+            )
+            await session.commit()
+            total += created
+            logger.info(f"{chunk_start:%Y-%m}: {created} snapshots created ({total} total)")
+            chunk_start = chunk_end
+
+    logger.info(f"Migration complete: {total} snapshots created.")
+    return total
+
+
+def _parse_date(value: str | None) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate EAV indicators into indicator_snapshots")
+    parser.add_argument("--start", default=None, help="First date in YYYY-MM-DD (default: earliest indicator)")
+    parser.add_argument("--end", default=None, help="Last date in YYYY-MM-DD (default: latest indicator)")
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(migrate(_parse_date(args.start), _parse_date(args.end)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+from datetime import datetime, timedelta
+
+from src.market_data import PROVIDERS, get_provider, record_fixtures
+from src.config import settings
+
+
+def _parse_date(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Record daily bars as fixtures for MARKET_DATA_PROVIDER=local (deterministic replay)"
+    )
+    parser.add_argument("--symbols", nargs="+", required=True, help="Symbols to record")
+    parser.add_argument("--start", required=True, help="First date in YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="Last date in YYYY-MM-DD (inclusive)")
+    parser.add_argument("--provider", choices=PROVIDERS, default="yfinance", help="Source provider (default: yfinance)")
+    parser.add_argument("--out", default=settings.MARKET_DATA_DIR, help="Output directory (default: MARKET_DATA_DIR)")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    args = parser.parse_args()
+
+    written = record_fixtures(
+        get_provider(args.provider),
+        [s.upper() for s in args.symbols],
+        _parse_date(args.start),
+        _parse_date(args.end) + timedelta(days=1),
+        args.out,
+        fmt=args.format,
+    )
+    print(f"Recorded {written}/{len(args.symbols)} symbols to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
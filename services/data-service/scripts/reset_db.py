@@ -25,7 +25,11 @@ async def reset_db():
             "scan_logs", 
             "alert_history",
             "alert_configs",
+            "backfill_checkpoints",
+            "price_data_misses",
+            "price_revisions",
             "indicators", 
+            "indicator_snapshots",
             "price_data", 
             "stocks"
         ]
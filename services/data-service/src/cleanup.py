@@ -2,52 +2,104 @@
 Data Cleanup Service
 
 Handles pruning of old data to maintain database performance and reduce storage costs.
+Hypertables are pruned and compressed per chunk (see src/timescale.py).
 """
 import logging
 from datetime import datetime, date, timedelta
 from sqlalchemy import text
+from src.config import settings
 from src.database import AsyncSessionLocal
+from src.timescale import (
+    chunk_stats,
+    compress_old_chunks,
+    compression_cutoff,
+    drop_old_chunks,
+    hypertable_policies,
+    retention_cutoff,
+)
+from shared.indicator_store import prune_indicators
 
 logger = logging.getLogger(__name__)
 
 async def prune_old_data():
     """
-    Delete data older than retention policies:
-    - Indicators: > 2 years
-    - Alert History: > 90 days
+    Apply retention policies:
+    - price_data / indicators / indicator_snapshots: drop whole Timescale chunks older
+      than the table's retention, then compress chunks older than
+      TIMESCALE_COMPRESS_AFTER_DAYS (falls back to DELETE for indicators on a plain
+      PostgreSQL table)
+    - Alert History: > ALERT_RETENTION_DAYS
+    - Scan Logs: > SCAN_LOG_RETENTION_DAYS
+
+    The summary reports chunks dropped / compressed per hypertable and their
+    current chunk stats.
     """
     start_time = datetime.now()
     summary = {
         "status": "completed",
         "indicators_deleted": 0,
+        "snapshots_deleted": 0,
         "alerts_deleted": 0,
         "logs_deleted": 0,
+        "chunks_dropped": {},
+        "chunks_compressed": {},
+        "hypertables": {},
         "duration_seconds": 0
     }
     
     # Retention Periods
-    indicator_cutoff = date.today() - timedelta(days=730) # 2 years
-    alert_cutoff = date.today() - timedelta(days=90)      # 3 months
-    log_cutoff = date.today() - timedelta(days=30)        # 1 month for operational logs
+    today = date.today()
+    alert_cutoff = today - timedelta(days=settings.ALERT_RETENTION_DAYS)
+    log_cutoff = today - timedelta(days=settings.SCAN_LOG_RETENTION_DAYS)
+    compress_cutoff = compression_cutoff(today)
+    policies = hypertable_policies()
     
-    logger.info(f"Starting data pruning. Cutoffs: Indicators < {indicator_cutoff}, Alerts < {alert_cutoff}")
+    logger.info(
+        "Starting data pruning. Retention: "
+        + ", ".join(f"{p.table} {p.retention_days or 'forever'}d" for p in policies)
+        + f", alerts < {alert_cutoff}, compress < {compress_cutoff or 'never'}"
+    )
 
     async with AsyncSessionLocal() as session:
         try:
-            # 1. Prune Indicators
-            # Using direct SQL for efficiency with large deletes
-            ind_query = text("DELETE FROM indicators WHERE date < :cutoff")
-            result = await session.execute(ind_query, {"cutoff": indicator_cutoff})
-            summary["indicators_deleted"] = result.rowcount
-            logger.info(f"Deleted {summary['indicators_deleted']} old indicators")
+            # 1. Hypertables: drop expired chunks instead of deleting rows
+            indicators_pruned = False
+            for policy in policies:
+                cutoff = retention_cutoff(policy, today)
+                if cutoff is None:
+                    continue
+                try:
+                    async with session.begin_nested():
+                        summary["chunks_dropped"][policy.table] = await drop_old_chunks(session, policy.table, cutoff)
+                except Exception as e:
+                    logger.warning(f"drop_chunks unavailable for {policy.table} ({e}); deleting rows instead")
+                    if policy.table in ("indicators", "indicator_snapshots") and not indicators_pruned:
+                        summary.update(await prune_indicators(session, cutoff))
+                        indicators_pruned = True
+            logger.info(
+                f"Dropped chunks: {summary['chunks_dropped']}; deleted {summary['indicators_deleted']} indicators, "
+                f"{summary['snapshots_deleted']} indicator snapshots row by row"
+            )
+
+            # 2. Compress chunks that aged past the compression window (the background
+            # policy does the same; this makes the weekly run deterministic)
+            if compress_cutoff is not None:
+                for policy in policies:
+                    try:
+                        async with session.begin_nested():
+                            summary["chunks_compressed"][policy.table] = await compress_old_chunks(
+                                session, policy.table, compress_cutoff
+                            )
+                    except Exception as e:
+                        logger.warning(f"Chunk compression skipped for {policy.table}: {e}")
 
-            # 2. Prune Alert History
+            # 3. Prune Alert History
             alert_query = text("DELETE FROM alert_history WHERE date < :cutoff")
             result = await session.execute(alert_query, {"cutoff": alert_cutoff})
             summary["alerts_deleted"] = result.rowcount
             logger.info(f"Deleted {summary['alerts_deleted']} old alerts")
             
-            # 3. Prune Scan Logs & Failures (Optional cleanup for hygiene)
+            # 4. Prune Scan Logs & Failures (Optional cleanup for hygiene)
             log_query = text("DELETE FROM scan_logs WHERE created_at < :cutoff")
             result = await session.execute(log_query, {"cutoff": log_cutoff})
             summary["logs_deleted"] = result.rowcount
@@ -62,6 +114,13 @@ async def prune_old_data():
             logger.error(f"Cleanup failed: {e}")
             summary["status"] = "failed"
             summary["error"] = str(e)
+
+        # 5. Chunk-level stats after the run
+        try:
+            summary["hypertables"] = await chunk_stats(session, [p.table for p in policies])
+        except Exception as e:
+            await session.rollback()
+            logger.warning(f"Chunk stats unavailable: {e}")
     
     duration = (datetime.now() - start_time).total_seconds()
     summary["duration_seconds"] = round(duration, 2)
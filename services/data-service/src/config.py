@@ -1,6 +1,44 @@
 from shared.config import BaseConfig
 
 class Settings(BaseConfig):
-    pass
-    
+    # Market data source: yfinance | local (fixture files in MARKET_DATA_DIR) | synthetic
+    MARKET_DATA_PROVIDER: str = "yfinance"
+    MARKET_DATA_DIR: str = "data/market"
+    MARKET_DATA_SEED: int = 42
+
+    # Raw download cache for network providers (see src/price_cache.py)
+    PRICE_CACHE_ENABLED: bool = True
+    PRICE_CACHE_DIR: str = "data/cache"
+    PRICE_CACHE_TTL_SECONDS: float = 6 * 3600
+    PRICE_CACHE_MAX_MB: int = 2048
+    PRICE_CACHE_FORMAT: str = "parquet"
+
+    # Daily price fetch: symbols per download, concurrent downloads, per-chunk retries
+    PRICE_FETCH_CHUNK_SIZE: int = 100
+    PRICE_FETCH_CONCURRENCY: int = 4
+    PRICE_FETCH_MAX_RETRIES: int = 3
+    PRICE_FETCH_BACKOFF_SECONDS: float = 2.0
+
+    # Daily fetch gap detection: calendar days scanned for missing trading days, and the
+    # bar count below which days before a stock's first bar also count as missing
+    GAP_LOOKBACK_DAYS: int = 120
+    GAP_MIN_HISTORY_BARS: int = 50
+    # A day the provider had no bar for stops being requested once an empty download
+    # happened at least this many days after it (a late bar still gets picked up)
+    GAP_NO_DATA_GRACE_DAYS: int = 3
+
+    # History backfill: concurrent workers sharing an adaptive rate limit
+    BACKFILL_WORKERS: int = 8
+    BACKFILL_RATE_PER_HOUR: float = 2000
+    BACKFILL_BURST: float = 5
+
+    # TimescaleDB storage (see src/timescale.py): chunk size, compression age and
+    # retention per table; 0 disables compression / keeps data forever
+    TIMESCALE_CHUNK_INTERVAL_DAYS: int = 30
+    TIMESCALE_COMPRESS_AFTER_DAYS: int = 180
+    PRICE_RETENTION_DAYS: int = 0
+    INDICATOR_RETENTION_DAYS: int = 730
+    ALERT_RETENTION_DAYS: int = 90
+    SCAN_LOG_RETENTION_DAYS: int = 30
+
 settings = Settings()
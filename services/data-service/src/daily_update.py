@@ -3,33 +3,320 @@ Daily Price Data Update Endpoint
 
 Handles automated daily price fetching for all active stocks.
 Uses shared utilities for transaction management and idempotency.
-Switched to yfinance for data retrieval.
+Bars come from the configured market data provider (yfinance by default).
 """
+import asyncio
 import logging
 from datetime import datetime, date, timedelta
-from typing import Dict, Any
-from sqlalchemy import select, text
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from src.config import settings
 from src.database import AsyncSessionLocal
-from shared.models import Stock, PriceData
-import yfinance as yf
+from src.market_data import get_provider
+from src.price_gaps import PriceGap, detect_price_gaps, plan_gap_fetches, record_no_data
+from src.stock_stats import refresh_stock_stats
+from shared.models import Stock, PriceData, PriceRevision
 import pandas as pd
 
 # Import shared utilities
-from shared.transactions import batch_transaction
-from shared.idempotency import check_duplicate, log_idempotency_skip
+from shared.bulk import bulk_insert_ignore, bulk_upsert
 from shared.exceptions import ExternalServiceError, log_exception
 
 logger = logging.getLogger(__name__)
 
+# Columns overwritten when re-fetched bars replace stored ones
+PRICE_COLUMNS = ["open", "high", "low", "close", "adjusted_close", "volume"]
 
-async def fetch_daily_prices(target_date: date = None, lookback_days: int = 0) -> Dict[str, Any]:
+
+async def existing_price_keys(
+    session,
+    stock_ids: Sequence[int],
+    start_date: date,
+    end_date: date,
+) -> Set[Tuple[int, date]]:
+    """(stock_id, date) keys already stored for `stock_ids` in [start_date, end_date], in one query."""
+    if not stock_ids:
+        return set()
+    result = await session.execute(
+        select(PriceData.stock_id, PriceData.date)
+        .where(PriceData.stock_id.in_(list(stock_ids)))
+        .where(PriceData.date >= start_date)
+        .where(PriceData.date <= end_date)
+    )
+    return {(stock_id, day) for stock_id, day in result.all()}
+
+
+def _column(frame: pd.DataFrame, name: str) -> List[Any]:
+    """Column as a list of Python floats with NaN (or a missing column) as None."""
+    if name not in frame:
+        return [None] * len(frame)
+    values = frame[name].astype(float).astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def price_rows(
+    stock_id: int,
+    frame: pd.DataFrame,
+    existing: Set[Tuple[int, date]] = frozenset(),
+) -> Iterator[Dict[str, Any]]:
     """
-    Fetch and store latest price data for all active stocks using yfinance.
-    Supports backfilling via lookback_days.
-    
+    Convert one ticker's provider frame (rows with a close) into price_data insert
+    rows, column-wise rather than row by row. Dates in `existing` are skipped.
+    """
+    dates = pd.to_datetime(frame.index).date
+    created_at = datetime.utcnow()
+    volumes = frame['Volume'].fillna(0).astype('int64').tolist() if 'Volume' in frame else [0] * len(frame)
+    for day, open_, high, low, close, adj_close, volume in zip(
+        dates,
+        _column(frame, 'Open'),
+        _column(frame, 'High'),
+        _column(frame, 'Low'),
+        _column(frame, 'Close'),
+        _column(frame, 'Adj Close'),
+        volumes,
+    ):
+        if (stock_id, day) in existing:
+            continue
+        yield {
+            "stock_id": stock_id,
+            "date": day,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "adjusted_close": adj_close,
+            "volume": volume,
+            "created_at": created_at,
+        }
+
+
+async def record_price_revisions(session, rows: Sequence[Dict[str, Any]]) -> int:
+    """
+    Upsert the earliest date written per stock into `price_revisions`, so
+    indicator-service can recompute states built before a back-filled or
+    overwritten bar. Call in the price write's transaction; does not commit.
+    """
+    earliest: Dict[int, date] = {}
+    for row in rows:
+        stock_id, day = row["stock_id"], row["date"]
+        if stock_id not in earliest or day < earliest[stock_id]:
+            earliest[stock_id] = day
+    if not earliest:
+        return 0
+    recorded_at = datetime.utcnow()
+    stmt = insert(PriceRevision).values(
+        [{"stock_id": sid, "earliest_date": day, "recorded_at": recorded_at} for sid, day in earliest.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["stock_id"],
+        set_={
+            "earliest_date": func.least(PriceRevision.earliest_date, stmt.excluded.earliest_date),
+            "recorded_at": stmt.excluded.recorded_at,
+        },
+    )
+    await session.execute(stmt)
+    return len(earliest)
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    size = max(size, 1)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _download(symbols: List[str], start: date, end: date) -> pd.DataFrame:
+    return get_provider().download(symbols, start, end)
+
+
+async def download_chunk(
+    symbols: List[str],
+    start: date,
+    end: date,
+    max_retries: Optional[int] = None,
+    backoff_seconds: Optional[float] = None,
+    retry_empty: bool = True,
+) -> pd.DataFrame:
+    """
+    Download one chunk of symbols off the event loop, retrying with exponential
+    backoff when the download raises or (with `retry_empty`) comes back empty. An
+    empty frame is returned once retries are exhausted; the last error is raised.
+    Gap requests pass `retry_empty=False`: their days may simply have no bars.
+    """
+    max_retries = settings.PRICE_FETCH_MAX_RETRIES if max_retries is None else max_retries
+    backoff_seconds = settings.PRICE_FETCH_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+
+    for attempt in range(max_retries + 1):
+        try:
+            df = await asyncio.to_thread(_download, symbols, start, end)
+            if not df.empty or not retry_empty or attempt == max_retries:
+                return df
+            problem = "empty download"
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            problem = str(e)
+
+        delay = backoff_seconds * (2 ** attempt)
+        logger.warning(
+            f"Chunk download ({len(symbols)} symbols) attempt {attempt + 1}/{max_retries + 1} "
+            f"failed ({problem}). Retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+def _ticker_frame(df: pd.DataFrame, symbol: str) -> Optional[pd.DataFrame]:
+    """One ticker's columns (multi-level frames are grouped by ticker)."""
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+    try:
+        return df[symbol]
+    except KeyError:
+        return None
+
+
+async def ingest_chunk(
+    session,
+    stocks: Sequence[Stock],
+    df: pd.DataFrame,
+    overwrite: bool = False,
+    allow_empty: bool = False,
+) -> Dict[str, Any]:
+    """
+    Store one downloaded chunk: a single existing-key query, column-wise row
+    conversion and batched INSERT ... ON CONFLICT, committed per chunk.
+
+    With `allow_empty` (gap requests), symbols without bars are reported in
+    `no_data` instead of as failures. `bars` counts the valid bars per stock id.
+    """
+    success_count = 0
+    failure_count = 0
+    failures = []
+    rows = []
+    touched = []
+    no_data = []
+    bars: Dict[int, int] = {}
+
+    if df.empty and allow_empty:
+        logger.info(f"Provider has no bars for {len(stocks)} symbols in the requested gap.")
+        return {
+            "success_count": 0,
+            "failure_count": 0,
+            "failures": [],
+            "no_data": [s.id for s in stocks],
+            "bars": {},
+            "rows_written": 0,
+            "touched": [],
+        }
+
+    if df.empty:
+        logger.error(f"Provider returned empty data for {len(stocks)} symbols.")
+        return {
+            "success_count": 0,
+            "failure_count": len(stocks),
+            "failures": [
+                {"symbol": s.symbol.upper(), "error": "No data returned from provider (empty download)"} for s in stocks
+            ],
+            "no_data": [],
+            "bars": {},
+            "rows_written": 0,
+            "touched": [],
+        }
+
+    # One query for the keys already stored in the downloaded range, instead
+    # of a duplicate check per (stock, date)
+    existing = set()
+    if not overwrite:
+        index = pd.to_datetime(df.index)
+        existing = await existing_price_keys(session, [s.id for s in stocks], index.min().date(), index.max().date())
+
+    for stock in stocks:
+        symbol = stock.symbol.upper()
+        try:
+            ticker_data = _ticker_frame(df, symbol)
+            valid = ticker_data[ticker_data['Close'].notna()] if ticker_data is not None else None
+            if valid is None or valid.empty:
+                if allow_empty:
+                    no_data.append(stock.id)
+                elif ticker_data is None:
+                    logger.warning(f"No data returned for {symbol}")
+                    failure_count += 1
+                    failures.append({"symbol": symbol, "error": "No data returned from provider"})
+                else:
+                    logger.warning(f"No valid rows for {symbol}")
+                    failure_count += 1
+                continue
+
+            bars[stock.id] = len(valid)
+            rows.extend(price_rows(stock.id, valid, existing))
+            touched.append(stock.id)
+            success_count += 1
+
+        except Exception as e:
+            logger.error(f"Error processing {symbol}: {e}")
+            failure_count += 1
+            failures.append({"symbol": symbol, "error": str(e)})
+
+    try:
+        if overwrite:
+            written = await bulk_upsert(
+                session, PriceData, rows, conflict_columns=["stock_id", "date"], update_columns=PRICE_COLUMNS
+            )
+        else:
+            written = await bulk_insert_ignore(session, PriceData, rows, conflict_columns=["stock_id", "date"])
+        if written:
+            await record_price_revisions(session, rows)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to store chunk of {len(stocks)} symbols: {e}")
+        return {
+            "success_count": 0,
+            "failure_count": len(stocks),
+            "failures": [{"symbol": s.symbol.upper(), "error": str(e)} for s in stocks],
+            "no_data": [],
+            "bars": {},
+            "rows_written": 0,
+            "touched": [],
+        }
+
+    return {
+        "success_count": success_count,
+        "failure_count": failure_count,
+        "failures": failures,
+        "no_data": no_data,
+        "bars": bars,
+        "rows_written": written,
+        "touched": touched,
+    }
+
+
+async def fetch_daily_prices(
+    target_date: date = None,
+    lookback_days: int = 0,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fetch and store latest price data for all active stocks from the market data provider.
+
+    Only missing bars are downloaded: NYSE trading days in the last
+    GAP_LOOKBACK_DAYS (or `lookback_days`, when larger) that a stock has no bar for
+    are found in one query (see `src.price_gaps`) and fetched as per-range requests.
+    A day already complete for every stock makes no download at all. Gap downloads
+    are not retried when empty: symbols without bars are reported as `no_data`
+    (not failures) and their ranges recorded, so days that will never have a bar
+    (halts, delistings, pre-listing days) stop being requested. With
+    `overwrite`, the whole [target_date - lookback_days, target_date] window is
+    re-downloaded for every stock and stored bars are replaced.
+
+    Requests are split into chunks of PRICE_FETCH_CHUNK_SIZE symbols, downloaded at
+    most PRICE_FETCH_CONCURRENCY at a time, and each chunk is retried on its own.
+    Chunks are stored as they complete with batched `INSERT ... ON CONFLICT`.
+
     Args:
         target_date: Optional date to fetch data for. Defaults to today.
         lookback_days: Number of days to look back from target_date for backfilling.
+        overwrite: Replace stored bars with re-downloaded ones (e.g. revised adjusted closes).
     
     Returns:
         Summary dict with success/failure counts and duration
@@ -39,250 +326,117 @@ async def fetch_daily_prices(target_date: date = None, lookback_days: int = 0) -
     success_count = 0
     failure_count = 0
     skipped_count = 0
+    rows_written = 0
+    chunks_failed = 0
+    missing_days = 0
+    touched = []
     failures = []
+    no_data: List[int] = []
+    empty_gaps: List[PriceGap] = []
     
     today = target_date if target_date else date.today()
-    start_date = today - timedelta(days=lookback_days)
+    window_days = lookback_days if overwrite else max(lookback_days, settings.GAP_LOOKBACK_DAYS)
+    start_date = today - timedelta(days=window_days)
     
-    logger.info(f"Starting price fetch. Range: {start_date} to {today} (lookback={lookback_days}) using yfinance")
+    logger.info(
+        f"Starting price fetch. Window: {start_date} to {today} "
+        f"({'overwrite' if overwrite else 'missing bars only'}) using {settings.MARKET_DATA_PROVIDER}"
+    )
     
     async with AsyncSessionLocal() as session:
-        # Auto-backfill guard: ensure enough history for indicators on fresh DBs
-        if lookback_days == 0:
-            try:
-                stats = await session.execute(text("""
-                    SELECT COUNT(*) AS rows,
-                           COUNT(DISTINCT date) AS days,
-                           MIN(date) AS min_date,
-                           MAX(date) AS max_date
-                    FROM price_data
-                """))
-                row_count, day_count, min_date, max_date = stats.fetchone()
-                if row_count == 0 or (day_count is not None and day_count < 50):
-                    lookback_days = 120
-                    start_date = today - timedelta(days=lookback_days)
-                    logger.warning(
-                        "Price data history insufficient (rows=%s, days=%s, min=%s, max=%s). "
-                        "Auto-backfill enabled with lookback_days=%s.",
-                        row_count, day_count, min_date, max_date, lookback_days
-                    )
-            except Exception as e:
-                logger.error(f"Auto-backfill guard failed: {e}")
-
-        # Get all active stocks
         result = await session.execute(select(Stock).where(Stock.is_active == True))
         stocks = result.scalars().all()
-        
+        stocks_by_id = {stock.id: stock for stock in stocks}
+
         total_stocks = len(stocks)
         logger.info(f"Found {total_stocks} active stocks to process")
-        
-        # 1. Filter checks
-        # optimization: if lookback > 0, we might skip detailed idempotency check per date here 
-        # and rely on DB constraints or check inside loop.
-        # For bulk backfill, checking 500 stocks * 60 days = 30000 checks is slow.
-        # We will optimistically fetch and check inside or rely on upsert?
-        # Let's fetch all active stocks logic if backfilling.
-        
-        stocks_to_process = []
-        if lookback_days > 5:
-            # Assume we want to process all if backfilling large history
-            stocks_to_process = stocks
+
+        # 1. Work out what to download: (start, exclusive end, stocks, gaps) requests;
+        # gaps is None for the blanket overwrite window
+        requests: List[Tuple[date, date, Sequence[Stock], Optional[List[PriceGap]]]] = []
+        if overwrite:
+            end_date = today + timedelta(days=1)
+            requests = [
+                (start_date, end_date, chunk, None) for chunk in _chunks(stocks, settings.PRICE_FETCH_CHUNK_SIZE)
+            ]
         else:
-             # For daily update, check idempotency for 'today'
-            for stock in stocks:
-                if await check_duplicate(session, PriceData, stock_id=stock.id, target_date=today):
-                     # Only skip if we are ONLY doing today.
-                     if lookback_days == 0:
-                        skipped_count += 1
-                        success_count += 1
-                        continue
-                     else:
-                        stocks_to_process.append(stock)
-                else:
-                    stocks_to_process.append(stock)
-                
-        if not stocks_to_process:
-            logger.info("All stocks already have data for today. Skipping fetch.")
+            gaps = await detect_price_gaps(session, start_date, today)
+            missing_days = sum(gap.missing_days for gap in gaps)
+            gap_stocks = {gap.stock_id for gap in gaps}
+            skipped_count = success_count = total_stocks - len(gap_stocks)
+            logger.info(
+                f"Gap detection: {len(gaps)} gaps ({missing_days} missing trading days) "
+                f"across {len(gap_stocks)} stocks"
+            )
+            for fetch_start, fetch_end, group in plan_gap_fetches(gaps, settings.PRICE_FETCH_CHUNK_SIZE):
+                requests.append((fetch_start, fetch_end, [stocks_by_id[gap.stock_id] for gap in group], group))
+
+        if not requests:
+            logger.info("All stocks are up to date. Skipping fetch.")
         else:
-            logger.info(f"Fetching data for {len(stocks_to_process)} stocks...")
-            
-            # 2. Bulk Fetch with yfinance
-            symbols = [s.symbol.upper() for s in stocks_to_process]
-            stock_map = {s.symbol.upper(): s for s in stocks_to_process}
-            
-            # yfinance expects end date as exclusive, so add 1 day to cover 'today'
-            end_date = today + timedelta(days=1)
-            
-            try:
-                # Use threads=True for faster download
-                # group_by='ticker' ensures consistency
-                df = yf.download(
-                    symbols,
-                    start=start_date,
-                    end=end_date,
-                    group_by='ticker',
-                    threads=True,
-                    progress=False,
-                    auto_adjust=False,
-                )
-
-                # If we are doing a daily update and nothing comes back (weekend/holiday),
-                # retry with a short lookback window to capture the last trading day.
-                if df.empty and lookback_days == 0 and target_date is None:
-                    fallback_start = today - timedelta(days=7)
-                    logger.warning(
-                        "No data returned for %s to %s. Retrying with lookback to %s.",
-                        start_date,
-                        end_date,
-                        fallback_start,
-                    )
-                    df = yf.download(
-                        symbols,
-                        start=fallback_start,
-                        end=end_date,
-                        group_by='ticker',
-                        threads=True,
-                        progress=False,
-                        auto_adjust=False,
-                    )
-
-                if df.empty:
-                    logger.error("yfinance returned empty data for all symbols in range %s to %s.", start_date, end_date)
-                    for symbol in symbols:
-                        failure_count += 1
-                        failures.append({"symbol": symbol, "error": "No data returned from yfinance (empty download)"})
-                    # Skip processing if we have no data at all
-                    df = None
-                
-                # 3. Process Results
-                # Batch transaction for inserts
-                async with batch_transaction(session, batch_size=500, operation_name="daily_price_fetch") as batch:
-                    if df is None:
-                        return {
-                            "status": "completed",
-                            "total_stocks": total_stocks,
-                            "success_count": success_count,
-                            "skipped_count": skipped_count,
-                            "failure_count": failure_count,
-                            "success_rate": 0,
-                            "duration_seconds": round((datetime.now() - start_time).total_seconds(), 2),
-                            "failures": failures[:10] if failures else [],
-                            "timestamp": datetime.now().isoformat(),
-                        }
-
-                    for symbol in symbols:
-                        try:
-                            # Handle DataFrame structure (Single level for 1 symbol, Multi-level for many)
-                            if len(symbols) == 1:
-                                ticker_data = df
-                            else:
-                                try:
-                                    ticker_data = df[symbol]
-                                except KeyError:
-                                    logger.warning(f"No data returned for {symbol}")
-                                    failure_count += 1
-                                    failures.append({"symbol": symbol, "error": "No data returned from yfinance"})
-                                    continue
-                            
-                            if ticker_data.empty:
-                                logger.warning(f"Empty data for {symbol}")
-                                failure_count += 1
-                                continue
-                            
-                            # Normalize index to date
-                            ticker_data.index = ticker_data.index.date
-                            stock = stock_map.get(symbol)
-                            if stock is None:
-                                logger.warning(f"Unknown symbol in stock map: {symbol}")
-                                failure_count += 1
-                                failures.append({"symbol": symbol, "error": "Symbol not in stock map"})
-                                continue
-                            wrote_any = False
-
-                            # Iterate over ALL rows in the range
-                            for row_date, row in ticker_data.iterrows():
-                                # row_date is the index (date object)
-                                
-                                # Check for NaN values
-                                if pd.isna(row['Close']):
-                                    continue
-                                wrote_any = True
-                                
-                                # Check idempotency per row/date (Skip if exists)
-                                # Optimization: Bulk check or cache? 
-                                # For now, simple check. If backfilling 30k rows, this is slow.
-                                # But we are using batch_transaction...
-                                # Let's assume on backfill we might want to upsert or just ignore errors?
-                                # Ideally check_duplicate.
-                                if await check_duplicate(session, PriceData, stock_id=stock.id, target_date=row_date):
-                                    continue
-
-                                # Create PriceData record
-                                price_data = PriceData(
-                                    stock_id=stock.id,
-                                    date=row_date,
-                                    open=float(row['Open']),
-                                    high=float(row['High']),
-                                    low=float(row['Low']),
-                                    close=float(row['Close']),
-                                    adjusted_close=float(row['Adj Close']),
-                                    volume=int(row['Volume'])
-                                )
-                                
-                                session.add(price_data)
-                                await batch.increment()
-                            
-                            # Update transient stock stats (use last row)
-                            if wrote_any:
-                                last_row = ticker_data.iloc[-1]
-                                stock.last_close_price = float(last_row['Close'])
-                                success_count += 1
-                            else:
-                                logger.warning(f"No valid rows for {symbol}")
-                                failure_count += 1
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing {symbol}: {e}")
-                            failure_count += 1
-                            failures.append({"symbol": symbol, "error": str(e)})
+            logger.info(f"Fetching {len(requests)} download requests...")
 
-            except Exception as e:
-                logger.error(f"Critical yfinance error: {e}")
+            # 2. Chunked fetch from the provider: chunks download with bounded concurrency
+            # and are retried individually; each one is stored as soon as it arrives
+            semaphore = asyncio.Semaphore(settings.PRICE_FETCH_CONCURRENCY)
+
+            async def _fetch(fetch_start, fetch_end, chunk, gaps):
+                async with semaphore:
+                    symbols = [s.symbol.upper() for s in chunk]
+                    try:
+                        df = await download_chunk(symbols, fetch_start, fetch_end, retry_empty=gaps is None)
+                        return chunk, gaps, df, None
+                    except Exception as e:
+                        return chunk, gaps, None, e
+
+            tasks = [asyncio.create_task(_fetch(*request)) for request in requests]
+            last_error = None
+            for next_done in asyncio.as_completed(tasks):
+                chunk, gaps, df, error = await next_done
+                if error is not None:
+                    last_error = error
+                    chunks_failed += 1
+                    logger.error(f"Chunk download failed after retries ({len(chunk)} symbols): {error}")
+                    failure_count += len(chunk)
+                    failures.extend({"symbol": s.symbol.upper(), "error": str(error)} for s in chunk)
+                    continue
+
+                result = await ingest_chunk(session, chunk, df, overwrite, allow_empty=gaps is not None)
+                success_count += result["success_count"]
+                failure_count += result["failure_count"]
+                failures.extend(result["failures"])
+                no_data.extend(result["no_data"])
+                rows_written += result["rows_written"]
+                touched.extend(result["touched"])
+                if gaps is not None:
+                    # Days the provider has no bar for (wholly or partly empty gaps)
+                    empty_gaps.extend(gap for gap in gaps if result["bars"].get(gap.stock_id, 0) < gap.missing_days)
+
+            logger.info(f"Stored {rows_written} price rows from {len(requests) - chunks_failed}/{len(requests)} chunks")
+            if chunks_failed == len(requests):
                 return {
                     "status": "failed",
-                    "error": str(e),
+                    "error": f"All {len(requests)} download chunks failed: {last_error}",
                     "timestamp": datetime.now().isoformat()
                 }
 
-        # 4. Update stats (Avg Volume) efficiently
-        if success_count > 0:
-            logger.info("Updating 30-day average volume stats...")
-            
-            update_stats_stm = text("""
-                UPDATE stocks s
-                SET 
-                    avg_volume_30d = (
-                        SELECT AVG(volume)::bigint 
-                        FROM price_data p 
-                        WHERE p.stock_id = s.id 
-                        AND p.date >= CURRENT_DATE - INTERVAL '30 days'
-                    ),
-                    last_close_price = (
-                        SELECT close 
-                        FROM price_data p 
-                        WHERE p.stock_id = s.id 
-                        ORDER BY date DESC 
-                        LIMIT 1
-                    ),
-                    updated_at = NOW()
-                WHERE s.is_active = true
-            """)
-            
+        if empty_gaps:
+            try:
+                await record_no_data(session, empty_gaps)
+                await session.commit()
+                logger.info(f"Recorded {len(empty_gaps)} gaps the provider has no bars for ({len(no_data)} symbols empty)")
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to record empty gaps: {e}")
+
+        # 3. Refresh volume / last-close stats for the stocks this run touched
+        if touched:
             try:
-                await session.execute(update_stats_stm)
+                await refresh_stock_stats(session, touched)
                 await session.commit()
                 logger.info("Stock volume and price stats updated successfully")
             except Exception as e:
+                await session.rollback()
                 logger.error(f"Failed to update stock stats: {e}")
 
     duration = (datetime.now() - start_time).total_seconds()
@@ -293,9 +447,14 @@ async def fetch_daily_prices(target_date: date = None, lookback_days: int = 0) -
         "success_count": success_count,
         "skipped_count": skipped_count,
         "failure_count": failure_count,
+        "no_data_count": len(no_data),
+        "missing_days": missing_days,
+        "rows_written": rows_written,
+        "chunks_failed": chunks_failed,
         "success_rate": round((success_count / total_stocks * 100), 2) if total_stocks > 0 else 0,
         "duration_seconds": round(duration, 2),
         "failures": failures[:10] if failures else [],
+        "no_data": [stocks_by_id[stock_id].symbol.upper() for stock_id in no_data[:10]],
         "timestamp": datetime.now().isoformat()
     }
     
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 from src.config import settings
+from src.timescale import setup_hypertables
 
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -23,19 +24,12 @@ async def init_db():
         # Initialize TimescaleDB extension
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;"))
         
-        # Convert price_data to hypertable
-        # Check if already a hypertable to avoid errors on restart
-        try:
-            await conn.execute(text("SELECT create_hypertable('price_data', 'date', if_not_exists => TRUE);"))
-        except Exception as e:
-            print(f"Hypertable creation info: {e}")
-            
-        # Convert indicators to hypertable could be useful too, sharing partitioning by date
-        # indicators has date column too
-        try:
-             await conn.execute(text("SELECT create_hypertable('indicators', 'date', if_not_exists => TRUE);"))
-        except Exception as e:
-            print(f"Hypertable creation info (indicators): {e}")
+        # Parameterised (non-standard) indicators are kept in a JSONB column
+        await conn.execute(text("ALTER TABLE indicator_snapshots ADD COLUMN IF NOT EXISTS extra JSONB;"))
+
+        # Hypertables (price_data, indicators, indicator_snapshots) with chunk interval,
+        # compression and retention policies; see src/timescale.py
+        await setup_hypertables(conn)
 
         # Alert history hardening:
         # 1) normalize null types so uniqueness can be enforced
@@ -0,0 +1,286 @@
+"""
+Historical Price Backfill
+
+Fetches daily bars for every active stock (or one symbol) over a date range with a
+pool of workers sharing an adaptive token-bucket limiter, so the provider's allowed
+request rate is used fully instead of sleeping a fixed 2-3 s per symbol. A 429 only
+slows the shared limiter down and requeues that symbol.
+
+Each stock's bars are written with one bulk insert, committed together with its row
+in `backfill_checkpoints`, so an interrupted run resumes exactly after the last
+completed stock. Stocks whose stored prices already reach the end date are skipped
+without a request. Written ranges are recorded in `price_revisions` so indicator
+states built before the back-filled bars are recomputed.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config import settings
+from src.daily_update import price_rows, record_price_revisions
+from src.database import AsyncSessionLocal
+from src.market_data import MarketDataProvider, get_provider
+from src.models import BackfillCheckpoint
+from src.rate_limiter import AdaptiveTokenBucket, is_rate_limited
+from src.stock_stats import refresh_stock_stats
+from shared.bulk import bulk_insert_ignore
+from shared.models import PriceData, Stock
+
+logger = logging.getLogger(__name__)
+
+# Attempts per stock when the provider keeps answering 429
+MAX_ATTEMPTS = 5
+
+# (stock_id, symbol, fetch_start, attempt)
+WorkItem = Tuple[int, str, date, int]
+
+
+def default_job_name(days_back: int, symbol: Optional[str] = None) -> str:
+    return f"history-{days_back}d" + (f"-{symbol.upper()}" if symbol else "")
+
+
+def plan_fetch_start(
+    start_date: date,
+    end_date: date,
+    last_price_date: Optional[date],
+    checkpoint: Optional[Tuple[str, Optional[date]]],
+) -> Optional[date]:
+    """
+    First date still to fetch for one stock, or None when it is already complete
+    (checkpointed through `end_date`, or prices up to date).
+    """
+    status, completed_through = checkpoint or (None, None)
+    if status in ("done", "empty") and completed_through and completed_through >= end_date:
+        return None
+
+    fetch_start = start_date
+    if last_price_date:
+        if last_price_date >= end_date - timedelta(days=1):
+            return None
+        fetch_start = max(fetch_start, last_price_date + timedelta(days=1))
+    if completed_through:
+        fetch_start = max(fetch_start, completed_through + timedelta(days=1))
+    return fetch_start if fetch_start < end_date else None
+
+
+async def last_price_dates(session, stock_ids: List[int]) -> Dict[int, date]:
+    """Latest stored price date per stock, in one grouped query."""
+    if not stock_ids:
+        return {}
+    result = await session.execute(
+        select(PriceData.stock_id, func.max(PriceData.date))
+        .where(PriceData.stock_id.in_(stock_ids))
+        .group_by(PriceData.stock_id)
+    )
+    return {stock_id: last for stock_id, last in result.all()}
+
+
+async def load_checkpoints(session, job: str) -> Dict[int, Tuple[str, Optional[date]]]:
+    result = await session.execute(
+        select(BackfillCheckpoint.stock_id, BackfillCheckpoint.status, BackfillCheckpoint.completed_through)
+        .where(BackfillCheckpoint.job == job)
+    )
+    return {stock_id: (status, through) for stock_id, status, through in result.all()}
+
+
+async def save_checkpoint(
+    session,
+    job: str,
+    stock_id: int,
+    status: str,
+    completed_through: Optional[date],
+    rows_written: int = 0,
+    attempts: int = 1,
+    error: Optional[str] = None,
+) -> None:
+    """Upsert one stock's checkpoint. Does not commit."""
+    values = {
+        "job": job,
+        "stock_id": stock_id,
+        "status": status,
+        "completed_through": completed_through,
+        "rows_written": rows_written,
+        "attempts": attempts,
+        "error": error,
+        "updated_at": datetime.utcnow(),
+    }
+    stmt = insert(BackfillCheckpoint).values(**values)
+    update = {k: v for k, v in values.items() if k not in ("job", "stock_id")}
+    if completed_through is None:
+        # A failure keeps the progress recorded by earlier attempts
+        update.pop("completed_through")
+    await session.execute(stmt.on_conflict_do_update(index_elements=["job", "stock_id"], set_=update))
+
+
+async def _worker(
+    queue: "asyncio.Queue[WorkItem]",
+    provider: MarketDataProvider,
+    limiter: AdaptiveTokenBucket,
+    job: str,
+    end_date: date,
+    stats: Dict[str, int],
+    failures: List[Dict[str, str]],
+    touched: List[int],
+) -> None:
+    fetch_end = end_date + timedelta(days=1)  # providers take an exclusive end
+    async with AsyncSessionLocal() as session:
+        while True:
+            stock_id, symbol, fetch_start, attempt = await queue.get()
+            try:
+                network = provider.needs_network(symbol, fetch_start, fetch_end)
+                try:
+                    if network:
+                        await limiter.acquire()
+                    df = await asyncio.to_thread(provider.history, symbol, fetch_start, fetch_end)
+                    if network:
+                        limiter.on_success()
+                except Exception as e:
+                    if is_rate_limited(e) and attempt < MAX_ATTEMPTS:
+                        limiter.on_throttle()
+                        await queue.put((stock_id, symbol, fetch_start, attempt + 1))
+                        continue
+                    raise
+
+                valid = df[df['Open'].notna() & df['Close'].notna()] if not df.empty else df
+                rows = list(price_rows(stock_id, valid)) if not valid.empty else []
+                written = await bulk_insert_ignore(session, PriceData, rows, conflict_columns=["stock_id", "date"])
+                if written:
+                    await record_price_revisions(session, rows)
+                await save_checkpoint(
+                    session, job, stock_id, "done" if rows else "empty", end_date, written, attempt
+                )
+                await session.commit()
+                stats["done" if rows else "empty"] += 1
+                stats["rows_written"] += written
+                if written:
+                    touched.append(stock_id)
+                    logger.info(f"  > {symbol}: Saved {written} days.")
+
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"  > Failed {symbol}: {e}")
+                stats["failed"] += 1
+                failures.append({"symbol": symbol, "error": str(e)})
+                try:
+                    await save_checkpoint(session, job, stock_id, "failed", None, 0, attempt, str(e)[:500])
+                    await session.commit()
+                except Exception as checkpoint_error:
+                    await session.rollback()
+                    logger.error(f"  > Could not checkpoint failure for {symbol}: {checkpoint_error}")
+            finally:
+                queue.task_done()
+                processed = stats["done"] + stats["empty"] + stats["failed"]
+                if processed and processed % 50 == 0:
+                    logger.info(
+                        f"Backfill progress: {processed}/{stats['queued']} stocks, "
+                        f"{stats['rows_written']} rows, rate {limiter.rate * 3600:.0f}/hour"
+                    )
+
+
+async def backfill_history(
+    days_back: int = 365,
+    target_symbol: Optional[str] = None,
+    workers: Optional[int] = None,
+    rate_per_hour: Optional[float] = None,
+    job: Optional[str] = None,
+    reset: bool = False,
+    provider: Optional[MarketDataProvider] = None,
+) -> Dict[str, Any]:
+    """
+    Backfill daily prices for [today - days_back, today].
+
+    Args:
+        days_back: Calendar days of history to fetch.
+        target_symbol: Only backfill this symbol. Defaults to all active stocks.
+        workers: Concurrent fetch workers. Defaults to BACKFILL_WORKERS.
+        rate_per_hour: Provider request budget. Defaults to BACKFILL_RATE_PER_HOUR.
+        job: Checkpoint job name. Defaults to one derived from days_back/target_symbol,
+            so re-running the same command resumes it.
+        reset: Discard the job's checkpoints and start over.
+
+    Returns:
+        Summary dict with counts and duration
+    """
+    start_time = datetime.now()
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days_back)
+    workers = workers or settings.BACKFILL_WORKERS
+    rate = (rate_per_hour or settings.BACKFILL_RATE_PER_HOUR) / 3600
+    job = job or default_job_name(days_back, target_symbol)
+    provider = provider or get_provider()
+    limiter = AdaptiveTokenBucket(rate=rate, burst=settings.BACKFILL_BURST)
+    stats = {"queued": 0, "done": 0, "empty": 0, "failed": 0, "rows_written": 0}
+    failures: List[Dict[str, str]] = []
+    touched: List[int] = []
+
+    logger.info(
+        f"Starting backfill. Range: {start_date} to {end_date}. Target: {target_symbol or 'ALL'}. "
+        f"Provider: {provider.name}. Job: {job}. Workers: {workers}, rate {rate * 3600:.0f}/hour"
+    )
+
+    async with AsyncSessionLocal() as session:
+        if reset:
+            await session.execute(delete(BackfillCheckpoint).where(BackfillCheckpoint.job == job))
+            await session.commit()
+
+        stmt = select(Stock.id, Stock.symbol).where(Stock.is_active == True)
+        if target_symbol:
+            stmt = stmt.where(Stock.symbol == target_symbol.upper())
+        stocks = (await session.execute(stmt.order_by(Stock.id))).all()
+
+        stock_ids = [stock_id for stock_id, _ in stocks]
+        last_dates = await last_price_dates(session, stock_ids)
+        checkpoints = await load_checkpoints(session, job)
+
+    queue: "asyncio.Queue[WorkItem]" = asyncio.Queue()
+    for stock_id, symbol in stocks:
+        fetch_start = plan_fetch_start(start_date, end_date, last_dates.get(stock_id), checkpoints.get(stock_id))
+        if fetch_start is not None:
+            queue.put_nowait((stock_id, symbol, fetch_start, 1))
+    stats["queued"] = queue.qsize()
+    skipped = len(stocks) - stats["queued"]
+    logger.info(f"Found {len(stocks)} active stocks: {stats['queued']} to fetch, {skipped} already complete.")
+
+    tasks = [
+        asyncio.create_task(_worker(queue, provider, limiter, job, end_date, stats, failures, touched))
+        for _ in range(min(workers, max(stats["queued"], 1)))
+    ]
+    try:
+        await queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if touched:
+        async with AsyncSessionLocal() as session:
+            await refresh_stock_stats(session, touched)
+            await session.commit()
+
+    duration = (datetime.now() - start_time).total_seconds()
+    summary = {
+        "status": "completed",
+        "job": job,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "total_stocks": len(stocks),
+        "skipped_count": skipped,
+        "success_count": stats["done"] + stats["empty"],
+        "empty_count": stats["empty"],
+        "failure_count": stats["failed"],
+        "rows_written": stats["rows_written"],
+        "throttled": limiter.throttled,
+        "final_rate_per_hour": round(limiter.rate * 3600),
+        "duration_seconds": round(duration, 2),
+        "failures": failures[:10] if failures else [],
+        "timestamp": datetime.now().isoformat()
+    }
+    logger.info(
+        f"Backfill complete: {summary['success_count']}/{stats['queued']} stocks, "
+        f"{stats['rows_written']} rows in {duration:.2f}s ({limiter.throttled} throttles)"
+    )
+    return summary
@@ -37,12 +37,14 @@ from src.database import AsyncSessionLocal
 from shared.models import Stock
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from shared.bulk import bulk_insert_ignore_returning
 
 from src.daily_update import fetch_daily_prices
 
 class DatePayload(BaseModel):
     target_date: Optional[date] = None
     lookback_days: int = 0
+    overwrite: bool = False
 
 @app.post("/api/daily-update")
 async def daily_update(payload: DatePayload = None):
@@ -53,7 +55,8 @@ async def daily_update(payload: DatePayload = None):
     try:
         target = payload.target_date if payload else None
         lookback = payload.lookback_days if payload else 0
-        summary = await fetch_daily_prices(target_date=target, lookback_days=lookback)
+        overwrite = payload.overwrite if payload else False
+        summary = await fetch_daily_prices(target_date=target, lookback_days=lookback, overwrite=overwrite)
         return summary
     except Exception as e:
         logger.error(f"Daily update failed: {e}", exc_info=True)
@@ -138,6 +141,75 @@ async def record_alert(alert: AlertCreate):
         logger.error(f"Failed to record alert: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
+@app.post("/api/record-alerts")
+async def record_alerts(alerts: List[AlertCreate]):
+    """
+    Record many alerts in one transaction: all symbols are resolved with one query
+    and the rows are written with one INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    `results` has one entry per submitted alert, in order, shaped like the
+    /api/record-alert response (`success` with id, `skipped` for duplicates,
+    `error` for unknown symbols).
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            symbols = {alert.stock_symbol for alert in alerts}
+            result = await session.execute(select(Stock.id, Stock.symbol).where(Stock.symbol.in_(symbols)))
+            stock_ids = {symbol: stock_id for stock_id, symbol in result.all()}
+
+            results: List[Dict[str, Any]] = [{} for _ in alerts]
+            pending: Dict[tuple, int] = {}  # (stock_id, date, crossover_type) -> first alert index
+            rows = []
+            for index, alert in enumerate(alerts):
+                stock_id = stock_ids.get(alert.stock_symbol)
+                if not stock_id:
+                    results[index] = {"status": "error", "message": "Stock not found"}
+                    continue
+                key = (stock_id, alert.date, alert.crossover_type or "unknown")
+                if key in pending:
+                    results[index] = {"status": "skipped", "message": "Duplicate alert"}
+                    continue
+                pending[key] = index
+                rows.append({
+                    "stock_id": stock_id,
+                    "alert_config_id": alert.alert_config_id,
+                    "triggered_at": alert.triggered_at,
+                    "date": alert.date,
+                    "condition_met": alert.condition_met,
+                    "crossover_type": key[2],
+                    "direction": alert.direction,
+                    "price": alert.price,
+                    "indicator_values": alert.indicator_values,
+                    "notified": False,
+                    "created_at": datetime.utcnow(),
+                })
+
+            inserted = await bulk_insert_ignore_returning(
+                session,
+                AlertHistory,
+                rows,
+                returning=["id", "stock_id", "date", "crossover_type"],
+                conflict_columns=["stock_id", "date", "crossover_type"],
+            )
+            await session.commit()
+
+            for alert_id, *key in inserted:
+                results[pending.pop(tuple(key))] = {"status": "success", "id": alert_id}
+            for index in pending.values():
+                results[index] = {"status": "skipped", "message": "Duplicate alert"}
+
+            counts = {status: sum(r["status"] == status for r in results) for status in ("success", "skipped", "error")}
+            return {
+                "status": "success",
+                "recorded": counts["success"],
+                "skipped": counts["skipped"],
+                "errors": counts["error"],
+                "results": results,
+            }
+    except Exception as e:
+        logger.error(f"Failed to record alerts: {e}", exc_info=True)
+        return {"status": "error", "message": str(e)}
+
 @app.get("/api/alert-history")
 async def get_alert_history(target_date: date):
     """
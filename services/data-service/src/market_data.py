@@ -0,0 +1,219 @@
+"""
+Market Data Providers
+
+Everything that downloads daily bars goes through a `MarketDataProvider`, so the
+pipeline can run against yfinance, local fixture files or a synthetic generator
+without code changes.
+
+Providers return yfinance-shaped frames: a DatetimeIndex and per-symbol
+`Open`, `High`, `Low`, `Close`, `Adj Close`, `Volume` columns. `download`
+returns a two-level (symbol, field) column index; `history` returns one
+symbol's columns. Symbols without data are simply absent.
+
+`MARKET_DATA_PROVIDER` selects the provider:
+- `yfinance`:  Yahoo Finance (default), behind the on-disk download cache
+- `local`:     `<MARKET_DATA_DIR>/<SYMBOL>.parquet` or `.csv` fixtures (replay)
+- `synthetic`: deterministic random walks per symbol (load tests, benchmarks)
+"""
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+PROVIDERS = ("yfinance", "local", "synthetic")
+
+
+def combine_frames(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Join per-symbol frames into one (symbol, field) frame; empty if none have rows."""
+    frames = {symbol: frame for symbol, frame in frames.items() if not frame.empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
+
+
+class MarketDataProvider(ABC):
+    """Source of daily OHLCV bars. `end` is exclusive, as in yfinance."""
+
+    name = "base"
+
+    @abstractmethod
+    def download(self, symbols: List[str], start: date, end: date) -> pd.DataFrame:
+        """Bars for many symbols as one (symbol, field) frame."""
+
+    def needs_network(self, symbol: str, start: date, end: date) -> bool:
+        """Whether fetching this range makes a rate-limited network request."""
+        return False
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        """Bars for one symbol (single-level columns); empty frame when there is no data."""
+        df = self.download([symbol], start, end)
+        if df.empty or symbol not in df.columns.get_level_values(0):
+            return pd.DataFrame(columns=PRICE_FIELDS)
+        return df[symbol]
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def needs_network(self, symbol: str, start: date, end: date) -> bool:
+        return True
+
+    def download(self, symbols: List[str], start: date, end: date) -> pd.DataFrame:
+        import yfinance as yf
+
+        # group_by='ticker' ensures consistency
+        df = yf.download(
+            symbols,
+            start=start,
+            end=end,
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=False,
+        )
+        if not df.empty and not isinstance(df.columns, pd.MultiIndex):
+            df = pd.concat({symbols[0]: df}, axis=1)
+        return df
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        import yfinance as yf
+
+        return yf.Ticker(symbol).history(start=start, end=end, interval="1d", auto_adjust=False)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Reads `<root>/<SYMBOL>.parquet` (preferred) or `<root>/<SYMBOL>.csv` with a
+    `Date` column (or index) and the yfinance price columns.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.MARKET_DATA_DIR)
+
+    def _read(self, symbol: str) -> Optional[pd.DataFrame]:
+        parquet = self.root / f"{symbol}.parquet"
+        csv = self.root / f"{symbol}.csv"
+        if parquet.exists():
+            df = pd.read_parquet(parquet)
+        elif csv.exists():
+            df = pd.read_csv(csv)
+        else:
+            return None
+        if "Date" in df.columns:
+            df = df.set_index("Date")
+        df.index = pd.to_datetime(df.index)
+        if "Adj Close" not in df.columns:
+            df["Adj Close"] = df["Close"]
+        return df[PRICE_FIELDS].sort_index()
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        df = self._read(symbol)
+        if df is None:
+            return pd.DataFrame(columns=PRICE_FIELDS)
+        return df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+    def download(self, symbols: List[str], start: date, end: date) -> pd.DataFrame:
+        return combine_frames({symbol: self.history(symbol, start, end) for symbol in symbols})
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic geometric random walks on business days. A symbol's bar for a
+    given date is the same whatever range is requested, so runs replay exactly.
+    """
+
+    name = "synthetic"
+    EPOCH = date(2000, 1, 3)
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = settings.MARKET_DATA_SEED if seed is None else seed
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        last = end - timedelta(days=1)
+        if last < max(start, self.EPOCH):
+            return pd.DataFrame(columns=PRICE_FIELDS)
+
+        index = pd.bdate_range(self.EPOCH, last)
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        base = 20.0 + rng.random() * 180.0
+        # One row of draws per day (filled row by row), so day i never depends on the range end
+        z = rng.standard_normal((len(index), 4))
+        close = base * np.exp(np.cumsum(0.0003 + 0.02 * z[:, 0]))
+        spread = np.abs(0.01 * z[:, 1])
+        open_ = close * (1 + 0.005 * z[:, 2])
+        df = pd.DataFrame(
+            {
+                "Open": open_,
+                "High": np.maximum(open_, close) * (1 + spread),
+                "Low": np.minimum(open_, close) * (1 - spread),
+                "Close": close,
+                "Adj Close": close,
+                "Volume": np.exp(13.0 + 0.5 * z[:, 3]).round(),
+            },
+            index=index,
+        )
+        return df[df.index >= pd.Timestamp(start)]
+
+    def download(self, symbols: List[str], start: date, end: date) -> pd.DataFrame:
+        return combine_frames({symbol: self.history(symbol, start, end) for symbol in symbols})
+
+
+def get_provider(name: Optional[str] = None, use_cache: bool = True) -> MarketDataProvider:
+    """
+    Provider selected by `name` or MARKET_DATA_PROVIDER. Network providers are
+    wrapped in the on-disk download cache (see `src.price_cache`) unless
+    `use_cache` is False or PRICE_CACHE_ENABLED is off.
+    """
+    name = (name or settings.MARKET_DATA_PROVIDER).lower()
+    if name == "yfinance":
+        if use_cache:
+            from src.price_cache import cached
+
+            return cached(YFinanceProvider())
+        return YFinanceProvider()
+    if name == "local":
+        return LocalFileProvider()
+    if name == "synthetic":
+        return SyntheticProvider()
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{name}' (expected one of {', '.join(PROVIDERS)})")
+
+
+def record_fixtures(
+    provider: MarketDataProvider,
+    symbols: Iterable[str],
+    start: date,
+    end: date,
+    root: str,
+    fmt: str = "parquet",
+) -> int:
+    """
+    Save each symbol's bars from `provider` as a fixture readable by
+    `LocalFileProvider`. Returns the number of files written.
+    """
+    out = Path(root)
+    out.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for symbol in symbols:
+        df = provider.history(symbol, start, end)
+        if df.empty:
+            logger.warning(f"No data to record for {symbol}")
+            continue
+        df = df[[c for c in PRICE_FIELDS if c in df.columns]].rename_axis("Date")
+        if fmt == "parquet":
+            df.to_parquet(out / f"{symbol}.parquet")
+        else:
+            df.to_csv(out / f"{symbol}.csv")
+        written += 1
+    return written
@@ -80,3 +80,29 @@ class FetchFailure(Base):
 
     stock = relationship("Stock", backref="fetch_failures")
     scan_log = relationship("ScanLog", back_populates="failures")
+
+class BackfillCheckpoint(Base):
+    """Per-stock progress of a history backfill job, so interrupted runs resume."""
+    __tablename__ = "backfill_checkpoints"
+
+    job = Column(String(100), primary_key=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    status = Column(String(20), nullable=False)  # done, empty, failed
+    completed_through = Column(Date)  # last date fetched successfully
+    rows_written = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PriceDataMiss(Base):
+    """
+    A (stock, date range) the provider returned no bars for. Gap detection stops
+    requesting those days once they were checked GAP_NO_DATA_GRACE_DAYS after the fact.
+    """
+    __tablename__ = "price_data_misses"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    start_date = Column(Date, primary_key=True)
+    end_date = Column(Date, primary_key=True)
+    checked_on = Column(Date, nullable=False)  # last day the provider came back empty for it
@@ -0,0 +1,274 @@
+"""
+On-disk cache of raw provider downloads.
+
+Each entry is one symbol's bars for one date range, stored at a path derived
+from the request itself: `<root>/<provider>/<SYMBOL>/<start>_<end>.<fmt>`.
+A request is answered from any fresh entry that covers it; when an entry only
+covers the beginning of the range, just the missing tail is downloaded and the
+merged range replaces the entry. Empty results are never cached.
+
+Freshness:
+- entries written at least a day after their last bar are settled and do not expire
+- other entries (ranges touching recent days, whose bars may still change)
+  expire after `ttl_seconds`
+
+The cache is bounded by `max_bytes`; least recently used entries are evicted
+first (hits refresh an entry's mtime).
+"""
+import logging
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config import settings
+from src.market_data import PRICE_FIELDS, MarketDataProvider, combine_frames
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMATS = ("parquet", "csv")
+# Full-tree eviction scans are throttled to this interval
+EVICT_INTERVAL_SECONDS = 60
+_DATE_FORMAT = "%Y%m%d"
+_last_evict = 0.0
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Naive, midnight-aligned DatetimeIndex (yfinance history() is tz-aware)."""
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df = df.copy()
+    df.index = index.normalize()
+    return df[[c for c in PRICE_FIELDS if c in df.columns]]
+
+
+class PriceCache:
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        fmt: Optional[str] = None,
+    ):
+        self.root = Path(root or settings.PRICE_CACHE_DIR)
+        self.ttl_seconds = settings.PRICE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = settings.PRICE_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.fmt = (fmt or settings.PRICE_CACHE_FORMAT).lower()
+        if self.fmt not in CACHE_FORMATS:
+            raise ValueError(f"Invalid PRICE_CACHE_FORMAT '{self.fmt}' (expected one of {', '.join(CACHE_FORMATS)})")
+        self.hits = 0
+        self.misses = 0
+
+    # -------------------------------------------------------------------------
+    # Entries
+    # -------------------------------------------------------------------------
+
+    def _dir(self, provider: str, symbol: str) -> Path:
+        return self.root / provider / symbol.upper()
+
+    def path(self, provider: str, symbol: str, start: date, end: date) -> Path:
+        name = f"{start.strftime(_DATE_FORMAT)}_{end.strftime(_DATE_FORMAT)}.{self.fmt}"
+        return self._dir(provider, symbol) / name
+
+    def _entries(self, provider: str, symbol: str) -> List[Tuple[date, date, Path]]:
+        directory = self._dir(provider, symbol)
+        if not directory.is_dir():
+            return []
+        entries = []
+        for path in directory.glob(f"*.{self.fmt}"):
+            try:
+                start, end = (datetime.strptime(p, _DATE_FORMAT).date() for p in path.stem.split("_"))
+            except ValueError:
+                continue
+            entries.append((start, end, path))
+        return entries
+
+    def is_fresh(self, path: Path, end: date, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        try:
+            written = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        # `end` is exclusive: the last bar is end - 1 day, final once that day is over
+        settled_at = datetime.combine(end, datetime.min.time()).timestamp()
+        return written >= settled_at or now - written < self.ttl_seconds
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        if self.fmt == "parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        os.utime(path)  # LRU: a hit counts as a use
+        return df
+
+    def _write(self, path: Path, df: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        if self.fmt == "parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_csv(tmp)
+        os.replace(tmp, path)
+
+    def _best_entry(self, provider: str, symbol: str, start: date) -> Optional[Tuple[date, date, Path]]:
+        """The fresh entry containing `start` that reaches furthest."""
+        best = None
+        for entry_start, entry_end, path in self._entries(provider, symbol):
+            if entry_start <= start < entry_end and self.is_fresh(path, entry_end):
+                if best is None or entry_end > best[1]:
+                    best = (entry_start, entry_end, path)
+        return best
+
+    def covered_until(self, provider: str, symbol: str, start: date, end: date) -> date:
+        """Date from which [start, end) is not cached (`end` when fully covered)."""
+        best = self._best_entry(provider, symbol, start)
+        return start if best is None else min(best[1], end)
+
+    def lookup(self, provider: str, symbol: str, start: date, end: date) -> Tuple[Optional[pd.DataFrame], date]:
+        """
+        Cached bars from `start` and the date the network fetch has to start from
+        (`start` on a miss, `end` when fully covered).
+        """
+        best = self._best_entry(provider, symbol, start)
+        if best is None:
+            return None, start
+        try:
+            df = _normalize(self._read(best[2]))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {best[2]}: {e}")
+            best[2].unlink(missing_ok=True)
+            return None, start
+        df = df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+        return df, min(best[1], end)
+
+    def store(self, provider: str, symbol: str, start: date, end: date, df: pd.DataFrame) -> None:
+        """Cache bars for [start, end), replacing entries the new range covers."""
+        if df.empty:
+            return
+        for entry_start, entry_end, path in self._entries(provider, symbol):
+            if start <= entry_start and entry_end <= end:
+                path.unlink(missing_ok=True)
+        self._write(self.path(provider, symbol, start, end), _normalize(df))
+
+    # -------------------------------------------------------------------------
+    # Eviction
+    # -------------------------------------------------------------------------
+
+    def maybe_evict(self) -> None:
+        """Run `evict` at most once per EVICT_INTERVAL_SECONDS across all cache instances."""
+        global _last_evict
+        now = time.time()
+        if now - _last_evict >= EVICT_INTERVAL_SECONDS:
+            _last_evict = now
+            stats = self.evict()
+            logger.debug(f"[CACHE] eviction: {stats}")
+
+    def evict(self) -> Dict[str, int]:
+        """Drop expired entries, then least recently used ones until under `max_bytes`."""
+        files = []
+        expired = 0
+        for path in self.root.glob(f"*/*/*.{self.fmt}"):
+            try:
+                _, end_str = path.stem.split("_")
+                end = datetime.strptime(end_str, _DATE_FORMAT).date()
+            except ValueError:
+                continue
+            if not self.is_fresh(path, end):
+                path.unlink(missing_ok=True)
+                expired += 1
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        return {"expired": expired, "evicted": evicted, "bytes": total}
+
+
+class CachedProvider(MarketDataProvider):
+    """Wraps a provider so downloads are answered from a `PriceCache` first."""
+
+    def __init__(self, inner: MarketDataProvider, cache: Optional[PriceCache] = None):
+        self.inner = inner
+        self.cache = cache or PriceCache()
+        self.name = inner.name
+
+    def needs_network(self, symbol: str, start: date, end: date) -> bool:
+        missing_start = self.cache.covered_until(self.name, symbol, start, end)
+        return missing_start < end and self.inner.needs_network(symbol, missing_start, end)
+
+    def download(self, symbols: List[str], start: date, end: date) -> pd.DataFrame:
+        cached: Dict[str, pd.DataFrame] = {}
+        fetch_from: Dict[date, List[str]] = {}
+        for symbol in symbols:
+            df, missing_start = self.cache.lookup(self.name, symbol, start, end)
+            if df is not None:
+                cached[symbol] = df
+            if missing_start < end:
+                fetch_from.setdefault(missing_start, []).append(symbol)
+                self.cache.misses += 1
+            else:
+                self.cache.hits += 1
+
+        frames: Dict[str, pd.DataFrame] = dict(cached)
+        for fetch_start, group in fetch_from.items():
+            fetched = self.inner.download(group, fetch_start, end)
+            for symbol in group:
+                if fetched.empty or symbol not in fetched.columns.get_level_values(0):
+                    continue
+                merged = self._merge_store(symbol, start, end, cached.get(symbol), fetched[symbol])
+                if merged is not None:
+                    frames[symbol] = merged
+
+        if fetch_from:
+            self.cache.maybe_evict()
+        logger.debug(f"[CACHE] {self.name}: {self.cache.hits} hits, {self.cache.misses} misses")
+        return combine_frames(frames)
+
+    def history(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        # Fetch through the inner provider's history() so its errors (e.g. 429s) propagate
+        cached_df, missing_start = self.cache.lookup(self.name, symbol, start, end)
+        if missing_start >= end:
+            self.cache.hits += 1
+            return cached_df
+        self.cache.misses += 1
+        fetched = self.inner.history(symbol, missing_start, end)
+        merged = self._merge_store(symbol, start, end, cached_df, fetched)
+        self.cache.maybe_evict()
+        if merged is None:
+            return cached_df if cached_df is not None else pd.DataFrame(columns=PRICE_FIELDS)
+        return merged
+
+    def _merge_store(
+        self,
+        symbol: str,
+        start: date,
+        end: date,
+        cached_df: Optional[pd.DataFrame],
+        fetched: pd.DataFrame,
+    ) -> Optional[pd.DataFrame]:
+        """Join cached bars with a freshly fetched tail and cache the result for [start, end)."""
+        part = _normalize(fetched.dropna(how="all"))
+        merged = pd.concat([cached_df, part]) if cached_df is not None else part
+        if merged.empty:
+            return None
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self.cache.store(self.name, symbol, start, end, merged)
+        return merged
+
+
+def cached(provider: MarketDataProvider) -> MarketDataProvider:
+    """Wrap `provider` in the download cache when PRICE_CACHE_ENABLED is set."""
+    if not settings.PRICE_CACHE_ENABLED:
+        return provider
+    return CachedProvider(provider)
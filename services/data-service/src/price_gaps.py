@@ -0,0 +1,190 @@
+"""
+Price Gap Detection
+
+Finds the NYSE trading days a stock has no bar for, so the daily fetch downloads
+only those `(symbol, date range)` gaps instead of re-requesting a blanket window.
+Rolling indicators silently shift when a bar is missing, so interior holes are
+found as well as the missing tail.
+
+One SQL pass crosses the active stocks with the window's trading days, keeps the
+missing (stock, day) pairs and collapses consecutive trading days into ranges
+(gaps-and-islands over the trading-day ordinal).
+
+Days before a stock's first stored bar count only while the stock has fewer than
+GAP_MIN_HISTORY_BARS bars in the window: a fresh database gets its warmup history.
+
+Some missing days never get a bar: a recent listing's pre-listing days (while it is
+under the bars threshold), trading halts, delistings, and exchange holidays under
+the weekday fallback. When a gap download comes back without them, the range is
+recorded in `price_data_misses` (`record_no_data`); a day is no longer reported
+once such a check happened GAP_NO_DATA_GRACE_DAYS or more after it, so a bar that
+the provider publishes late is still fetched on the next runs.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config import settings
+from src.models import PriceDataMiss
+
+try:
+    import pandas_market_calendars as mcal
+except ImportError:  # pragma: no cover - handled at runtime/deployment
+    mcal = None
+
+logger = logging.getLogger(__name__)
+
+
+class PriceGap(NamedTuple):
+    stock_id: int
+    symbol: str
+    start: date  # first missing trading day
+    end: date  # last missing trading day (inclusive)
+    missing_days: int
+
+
+DETECT_GAPS_SQL = text("""
+    WITH days AS (
+        SELECT t.day, t.ord
+        FROM unnest(CAST(:days AS date[])) WITH ORDINALITY AS t(day, ord)
+    ),
+    scope AS (
+        SELECT s.id, s.symbol
+        FROM stocks s
+        WHERE s.is_active = true
+          AND (CAST(:stock_ids AS integer[]) IS NULL OR s.id = ANY(CAST(:stock_ids AS integer[])))
+    ),
+    coverage AS (
+        SELECT p.stock_id, MIN(p.date) AS first_day, COUNT(*) AS bars
+        FROM price_data p
+        JOIN scope ON scope.id = p.stock_id
+        WHERE p.date >= :start AND p.date <= :end
+        GROUP BY p.stock_id
+    ),
+    missing AS (
+        SELECT scope.id AS stock_id, scope.symbol, d.day, d.ord
+        FROM scope
+        CROSS JOIN days d
+        LEFT JOIN coverage c ON c.stock_id = scope.id
+        WHERE (c.bars IS NULL OR c.bars < :min_history OR d.day >= c.first_day)
+          AND NOT EXISTS (
+              SELECT 1 FROM price_data p WHERE p.stock_id = scope.id AND p.date = d.day
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM price_data_misses m
+              WHERE m.stock_id = scope.id
+                AND d.day BETWEEN m.start_date AND m.end_date
+                AND m.checked_on >= d.day + CAST(:grace_days AS integer)
+          )
+    ),
+    islands AS (
+        SELECT stock_id, symbol, day,
+               ord - row_number() OVER (PARTITION BY stock_id ORDER BY ord) AS island
+        FROM missing
+    )
+    SELECT stock_id, symbol, MIN(day) AS gap_start, MAX(day) AS gap_end, COUNT(*) AS missing_days
+    FROM islands
+    GROUP BY stock_id, symbol, island
+    ORDER BY stock_id, gap_start
+""")
+
+
+def trading_days(start: date, end: date) -> List[date]:
+    """
+    NYSE sessions in [start, end]. Without pandas_market_calendars this falls back
+    to weekdays; exchange holidays then show up as gaps whose download comes back
+    empty, and stop being requested once recorded by `record_no_data`.
+    """
+    if end < start:
+        return []
+    if mcal is None:
+        logger.warning("pandas_market_calendars not installed; treating every weekday as a trading day")
+        return [d.date() for d in pd.bdate_range(start, end)]
+    schedule = mcal.get_calendar("NYSE").schedule(start_date=start.isoformat(), end_date=end.isoformat())
+    return [d.date() for d in schedule.index]
+
+
+async def detect_price_gaps(
+    session,
+    start: date,
+    end: date,
+    stock_ids: Optional[Sequence[int]] = None,
+    min_history_bars: Optional[int] = None,
+    grace_days: Optional[int] = None,
+) -> List[PriceGap]:
+    """
+    Missing trading-day ranges per active stock in [start, end], in one query.
+
+    Args:
+        stock_ids: Limit detection to these stocks. Defaults to all active stocks.
+        min_history_bars: Below this many bars in the window, days before a stock's
+            first stored bar count as missing. Defaults to GAP_MIN_HISTORY_BARS.
+        grace_days: Days recorded as empty this long after the fact are skipped.
+            Defaults to GAP_NO_DATA_GRACE_DAYS.
+    """
+    days = trading_days(start, end)
+    if not days:
+        return []
+    min_history_bars = settings.GAP_MIN_HISTORY_BARS if min_history_bars is None else min_history_bars
+    grace_days = settings.GAP_NO_DATA_GRACE_DAYS if grace_days is None else grace_days
+    result = await session.execute(
+        DETECT_GAPS_SQL,
+        {
+            "days": days,
+            "stock_ids": sorted(set(stock_ids)) if stock_ids is not None else None,
+            "start": days[0],
+            "end": days[-1],
+            "min_history": min_history_bars,
+            "grace_days": grace_days,
+        },
+    )
+    return [PriceGap(*row) for row in result.all()]
+
+
+async def record_no_data(session, gaps: Sequence[PriceGap], checked_on: Optional[date] = None) -> int:
+    """
+    Record gaps whose download came back without (all of) their bars, so detection
+    stops re-requesting those days after the grace period. Not committed here.
+    """
+    if not gaps:
+        return 0
+    checked_on = checked_on or date.today()
+    rows = {
+        (gap.stock_id, gap.start, gap.end): {
+            "stock_id": gap.stock_id,
+            "start_date": gap.start,
+            "end_date": gap.end,
+            "checked_on": checked_on,
+        }
+        for gap in gaps
+    }
+    stmt = insert(PriceDataMiss).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["stock_id", "start_date", "end_date"],
+        set_={"checked_on": stmt.excluded.checked_on},
+    )
+    await session.execute(stmt)
+    return len(rows)
+
+
+def plan_gap_fetches(gaps: Sequence[PriceGap], chunk_size: int) -> List[Tuple[date, date, List[PriceGap]]]:
+    """
+    Group gaps sharing the same range into download requests of at most
+    `chunk_size` symbols. Returns (start, exclusive end, gaps) triples, so the
+    common case (every stock missing the same days) stays one request per chunk.
+    """
+    by_range: Dict[Tuple[date, date], List[PriceGap]] = {}
+    for gap in gaps:
+        by_range.setdefault((gap.start, gap.end), []).append(gap)
+
+    chunk_size = max(chunk_size, 1)
+    requests = []
+    for (start, end), group in sorted(by_range.items()):
+        for i in range(0, len(group), chunk_size):
+            # Providers take an exclusive end date
+            requests.append((start, end + timedelta(days=1), group[i:i + chunk_size]))
+    return requests
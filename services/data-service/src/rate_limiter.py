@@ -0,0 +1,91 @@
+"""
+Adaptive token bucket for rate-limited providers.
+
+Tokens refill at `rate` per second up to `burst`. Each request takes one token.
+The rate adapts AIMD-style:
+- a throttling response (HTTP 429) halves the rate and pauses all callers
+  for a cooldown
+- every `increase_after` consecutive successes add back `increase_step`,
+  up to `max_rate`
+
+The limiter converges on the highest rate the provider accepts instead of a
+fixed sleep.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception from a provider signals throttling (HTTP 429)."""
+    text = f"{type(error).__name__} {error}".lower()
+    return "429" in text or "too many requests" in text or "ratelimit" in text or "rate limit" in text
+
+
+class AdaptiveTokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+        increase_after: int = 20,
+        cooldown_seconds: float = 60.0,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 32
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else self.max_rate / 20
+        self.increase_after = increase_after
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._successes = 0
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a token. Callers are served one at a time, in arrival order."""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await self._sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_after and self.rate < self.max_rate:
+            self._successes = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Back off after a 429: cut the rate and pause everyone for the cooldown."""
+        self.throttled += 1
+        self._successes = 0
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = 0
+        pause = retry_after if retry_after is not None else self.cooldown_seconds
+        self._paused_until = max(self._paused_until, self._clock() + pause)
+        logger.warning(f"Rate limited: rate now {self.rate * 3600:.0f}/hour, pausing {pause:.0f}s")
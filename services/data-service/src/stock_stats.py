@@ -0,0 +1,70 @@
+"""
+Stock Stats Maintenance
+
+Keeps `stocks.avg_volume_30d`, `avg_volume_20d` and `last_close_price` (used by the
+scanner's top-N / min-price filter) current for the stocks an ingest touched. One
+set-based UPDATE reads only the recent price window of those stocks, instead of
+correlated subqueries over every active stock.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+AVG_VOLUME_DAYS = 30  # calendar days
+AVG_VOLUME_BARS = 20  # trading bars
+# Calendar days read per stock; covers 20 bars across holidays
+STATS_WINDOW_DAYS = 45
+
+REFRESH_STATS_SQL = text("""
+    WITH recent AS (
+        SELECT p.stock_id, p.date, p.close, p.volume,
+               row_number() OVER (PARTITION BY p.stock_id ORDER BY p.date DESC) AS rn
+        FROM price_data p
+        WHERE p.stock_id = ANY(:stock_ids)
+          AND p.date >= :window_start
+    ),
+    stats AS (
+        SELECT stock_id,
+               AVG(volume) FILTER (WHERE date >= :avg_30d_start)::bigint AS avg_volume_30d,
+               AVG(volume) FILTER (WHERE rn <= :avg_bars)::bigint AS avg_volume_20d,
+               MAX(close) FILTER (WHERE rn = 1) AS last_close_price
+        FROM recent
+        GROUP BY stock_id
+    )
+    UPDATE stocks s
+    SET avg_volume_30d = stats.avg_volume_30d,
+        avg_volume_20d = stats.avg_volume_20d,
+        last_close_price = stats.last_close_price,
+        updated_at = NOW()
+    FROM stats
+    WHERE s.id = stats.stock_id
+""")
+
+
+async def refresh_stock_stats(session, stock_ids: Iterable[int], as_of: Optional[date] = None) -> int:
+    """
+    Recompute volume averages and last close for `stock_ids`. Does not commit.
+
+    Returns:
+        Number of stocks updated
+    """
+    stock_ids = sorted(set(stock_ids))
+    if not stock_ids:
+        return 0
+    as_of = as_of or date.today()
+    result = await session.execute(
+        REFRESH_STATS_SQL,
+        {
+            "stock_ids": stock_ids,
+            "window_start": as_of - timedelta(days=STATS_WINDOW_DAYS),
+            "avg_30d_start": as_of - timedelta(days=AVG_VOLUME_DAYS),
+            "avg_bars": AVG_VOLUME_BARS,
+        },
+    )
+    updated = max(result.rowcount or 0, 0)
+    logger.info(f"Refreshed stats for {updated}/{len(stock_ids)} stocks")
+    return updated
@@ -0,0 +1,173 @@
+"""
+TimescaleDB Storage Policies
+
+`price_data`, `indicators` and `indicator_snapshots` are hypertables partitioned by
+`date`. Old data is managed per chunk instead of with row-by-row DELETEs:
+
+- chunk interval: TIMESCALE_CHUNK_INTERVAL_DAYS per chunk (applies to new chunks)
+- compression: chunks older than TIMESCALE_COMPRESS_AFTER_DAYS are compressed,
+  segmented by `stock_id` so per-stock range reads stay cheap
+- retention: chunks entirely older than the table's retention are dropped
+  (`drop_chunks`), which is a metadata operation with no WAL per row
+
+`setup_hypertables` installs the policies (run from `init_db`; re-running applies
+changed settings). The weekly cleanup also applies them immediately through
+`drop_old_chunks` / `compress_old_chunks` and reports `chunk_stats`.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import text
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HypertablePolicy(NamedTuple):
+    table: str
+    compress_orderby: str
+    retention_days: int  # 0 keeps every chunk
+
+
+def hypertable_policies() -> List[HypertablePolicy]:
+    return [
+        HypertablePolicy("price_data", "date DESC", settings.PRICE_RETENTION_DAYS),
+        HypertablePolicy("indicators", "indicator_name, date DESC", settings.INDICATOR_RETENTION_DAYS),
+        HypertablePolicy("indicator_snapshots", "date DESC", settings.INDICATOR_RETENTION_DAYS),
+    ]
+
+
+def retention_cutoff(policy: HypertablePolicy, today: Optional[date] = None) -> Optional[date]:
+    if policy.retention_days <= 0:
+        return None
+    return (today or date.today()) - timedelta(days=policy.retention_days)
+
+
+def compression_cutoff(today: Optional[date] = None) -> Optional[date]:
+    if settings.TIMESCALE_COMPRESS_AFTER_DAYS <= 0:
+        return None
+    return (today or date.today()) - timedelta(days=settings.TIMESCALE_COMPRESS_AFTER_DAYS)
+
+
+async def _apply(conn, statement: str, params: Optional[Dict[str, Any]] = None) -> bool:
+    """Run one policy statement in a savepoint, so a failure does not abort init_db."""
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text(statement), params or {})
+        return True
+    except Exception as e:
+        logger.warning(f"Timescale policy statement failed ({statement.split('(')[0].strip()}): {e}")
+        return False
+
+
+async def setup_hypertables(conn) -> None:
+    """
+    Create the hypertables and (re)install chunk interval, compression and
+    retention policies from settings. Idempotent; safe on every start.
+    """
+    chunk_days = settings.TIMESCALE_CHUNK_INTERVAL_DAYS
+    for policy in hypertable_policies():
+        table = policy.table
+        await _apply(
+            conn,
+            f"SELECT create_hypertable('{table}', 'date', chunk_time_interval => make_interval(days => :days), "
+            f"if_not_exists => TRUE)",
+            {"days": chunk_days},
+        )
+        # Existing hypertables keep old chunks; new chunks use the configured interval
+        await _apply(
+            conn, f"SELECT set_chunk_time_interval('{table}', make_interval(days => :days))", {"days": chunk_days}
+        )
+
+        if settings.TIMESCALE_COMPRESS_AFTER_DAYS > 0:
+            enabled = await conn.scalar(
+                text(
+                    "SELECT compression_enabled FROM timescaledb_information.hypertables "
+                    "WHERE hypertable_name = :table"
+                ),
+                {"table": table},
+            )
+            if not enabled:
+                await _apply(
+                    conn,
+                    f"ALTER TABLE {table} SET (timescaledb.compress, "
+                    f"timescaledb.compress_segmentby = 'stock_id', "
+                    f"timescaledb.compress_orderby = '{policy.compress_orderby}')",
+                )
+            await _apply(conn, f"SELECT remove_compression_policy('{table}', if_exists => TRUE)")
+            await _apply(
+                conn,
+                f"SELECT add_compression_policy('{table}', make_interval(days => :days))",
+                {"days": settings.TIMESCALE_COMPRESS_AFTER_DAYS},
+            )
+
+        await _apply(conn, f"SELECT remove_retention_policy('{table}', if_exists => TRUE)")
+        if policy.retention_days > 0:
+            await _apply(
+                conn,
+                f"SELECT add_retention_policy('{table}', make_interval(days => :days))",
+                {"days": policy.retention_days},
+            )
+
+        logger.info(
+            f"Hypertable {table}: chunks of {chunk_days}d, "
+            f"compress after {settings.TIMESCALE_COMPRESS_AFTER_DAYS or 'never'}d, "
+            f"retention {policy.retention_days or 'forever'}d"
+        )
+
+
+async def drop_old_chunks(session, table: str, cutoff: date) -> int:
+    """Drop `table` chunks entirely older than `cutoff`. Returns the number of chunks dropped."""
+    result = await session.execute(
+        text(f"SELECT drop_chunks('{table}', older_than => CAST(:cutoff AS date))"),
+        {"cutoff": cutoff},
+    )
+    return len(result.all())
+
+
+async def compress_old_chunks(session, table: str, cutoff: date) -> int:
+    """Compress not-yet-compressed `table` chunks entirely older than `cutoff`."""
+    result = await session.execute(
+        text("""
+            SELECT compress_chunk(format('%I.%I', chunk_schema, chunk_name)::regclass, if_not_compressed => TRUE)
+            FROM timescaledb_information.chunks
+            WHERE hypertable_name = :table
+              AND NOT is_compressed
+              AND range_end <= CAST(:cutoff AS date)
+        """),
+        {"table": table, "cutoff": cutoff},
+    )
+    return len(result.all())
+
+
+CHUNK_STATS_SQL = text("""
+    SELECT c.hypertable_name,
+           COUNT(*) AS chunks,
+           COUNT(*) FILTER (WHERE c.is_compressed) AS compressed_chunks,
+           MIN(c.range_start)::date AS oldest,
+           MAX(c.range_end)::date AS newest,
+           hypertable_size(format('%I.%I', c.hypertable_schema, c.hypertable_name)::regclass) AS total_bytes
+    FROM timescaledb_information.chunks c
+    WHERE c.hypertable_name = ANY(CAST(:tables AS name[]))
+    GROUP BY c.hypertable_schema, c.hypertable_name
+""")
+
+
+async def chunk_stats(session, tables: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-hypertable chunk counts, compressed chunks, covered date range and size."""
+    result = await session.execute(CHUNK_STATS_SQL, {"tables": list(tables)})
+    stats = {
+        table: {"chunks": 0, "compressed_chunks": 0, "oldest": None, "newest": None, "total_bytes": 0}
+        for table in tables
+    }
+    for table, chunks, compressed, oldest, newest, total_bytes in result.all():
+        stats[table] = {
+            "chunks": chunks,
+            "compressed_chunks": compressed,
+            "oldest": oldest.isoformat() if oldest else None,
+            "newest": newest.isoformat() if newest else None,
+            "total_bytes": int(total_bytes or 0),
+        }
+    return stats
@@ -311,7 +311,11 @@ async def test_cleanup_prunes_old_indicator_and_alert_rows_live():
         assert response.status_code == 200
         body = response.json()
         assert body.get("status") == "completed"
-        assert int(body.get("indicators_deleted", 0)) >= 1
+        # Expired indicator chunks are dropped whole (row deletes only without Timescale)
+        assert (
+            int(body.get("chunks_dropped", {}).get("indicators", 0)) >= 1
+            or int(body.get("indicators_deleted", 0)) >= 1
+        )
         assert int(body.get("alerts_deleted", 0)) >= 1
 
         assert await _count_indicator_probe_rows(
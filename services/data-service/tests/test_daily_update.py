@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import daily_update
+
+
+def _frame():
+    index = pd.DatetimeIndex(["2026-02-09", "2026-02-10", "2026-02-11"])
+    return pd.DataFrame(
+        {
+            "Open": [10.0, 11.0, np.nan],
+            "High": [10.5, 11.5, 12.5],
+            "Low": [9.5, 10.5, 11.5],
+            "Close": [10.2, 11.2, 12.2],
+            "Adj Close": [10.1, 11.1, 12.1],
+            "Volume": [1000.0, np.nan, 3000.0],
+        },
+        index=index,
+    )
+
+
+def test_price_rows_converts_columns_without_row_iteration():
+    rows = list(daily_update.price_rows(7, _frame()))
+
+    assert [r["date"] for r in rows] == [date(2026, 2, 9), date(2026, 2, 10), date(2026, 2, 11)]
+    assert rows[0]["stock_id"] == 7
+    assert rows[0]["close"] == 10.2 and rows[0]["adjusted_close"] == 10.1
+    assert rows[1]["volume"] == 0
+    assert rows[2]["open"] is None
+    assert all(type(r["volume"]) is int for r in rows)
+
+
+def test_price_rows_skips_existing_keys():
+    existing = {(7, date(2026, 2, 10)), (8, date(2026, 2, 9))}
+
+    rows = list(daily_update.price_rows(7, _frame(), existing))
+
+    assert [r["date"] for r in rows] == [date(2026, 2, 9), date(2026, 2, 11)]
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _KeySession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Rows(self.rows)
+
+
+@pytest.mark.asyncio
+async def test_existing_price_keys_uses_one_query():
+    session = _KeySession([(1, date(2026, 2, 10)), (2, date(2026, 2, 10))])
+
+    keys = await daily_update.existing_price_keys(session, [1, 2, 3], date(2026, 2, 1), date(2026, 2, 10))
+
+    assert keys == {(1, date(2026, 2, 10)), (2, date(2026, 2, 10))}
+    assert len(session.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_existing_price_keys_without_stocks_skips_query():
+    session = _KeySession([])
+
+    assert await daily_update.existing_price_keys(session, [], date(2026, 2, 1), date(2026, 2, 10)) == set()
+    assert session.statements == []
+
+
+def _multi_frame(symbols):
+    return pd.concat({symbol: _frame() for symbol in symbols}, axis=1)
+
+
+@pytest.mark.asyncio
+async def test_download_chunk_retries_failures_with_backoff(monkeypatch):
+    calls = []
+    sleeps = []
+
+    def download(symbols, start, end):
+        calls.append(list(symbols))
+        if len(calls) < 3:
+            raise RuntimeError("connection reset")
+        return _multi_frame(symbols)
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(daily_update, "_download", download)
+    monkeypatch.setattr(daily_update.asyncio, "sleep", sleep)
+
+    df = await daily_update.download_chunk(["AAA", "BBB"], date(2026, 2, 9), date(2026, 2, 12), max_retries=3, backoff_seconds=1.0)
+
+    assert not df.empty
+    assert len(calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_download_chunk_raises_after_last_retry(monkeypatch):
+    def download(symbols, start, end):
+        raise RuntimeError("429 Too Many Requests")
+
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(daily_update, "_download", download)
+    monkeypatch.setattr(daily_update.asyncio, "sleep", sleep)
+
+    with pytest.raises(RuntimeError, match="429"):
+        await daily_update.download_chunk(["AAA"], date(2026, 2, 9), date(2026, 2, 12), max_retries=2, backoff_seconds=0)
+
+
+@pytest.mark.asyncio
+async def test_download_chunk_does_not_retry_empty_gap_downloads(monkeypatch):
+    calls = []
+
+    def download(symbols, start, end):
+        calls.append(start)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(daily_update, "_download", download)
+
+    df = await daily_update.download_chunk(["AAA"], date(2026, 2, 9), date(2026, 2, 10), max_retries=3, retry_empty=False)
+
+    assert df.empty
+    assert calls == [date(2026, 2, 9)]
+
+
+class _IngestSession(_KeySession):
+    def __init__(self, existing=()):
+        super().__init__(list(existing))
+        self.committed = False
+        self.rolled_back = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.mark.asyncio
+async def test_ingest_chunk_reports_missing_tickers_and_commits(monkeypatch):
+    from types import SimpleNamespace
+
+    written = []
+
+    async def insert(session, model, rows, conflict_columns=None, batch_size=5000):
+        rows = list(rows)
+        written.extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(daily_update, "bulk_insert_ignore", insert)
+    stocks = [SimpleNamespace(id=1, symbol="aaa", last_close_price=None), SimpleNamespace(id=2, symbol="ZZZ", last_close_price=None)]
+    session = _IngestSession(existing=[(1, date(2026, 2, 9))])
+
+    result = await daily_update.ingest_chunk(session, stocks, _multi_frame(["AAA"]))
+
+    assert result["success_count"] == 1
+    assert result["failures"] == [{"symbol": "ZZZ", "error": "No data returned from provider"}]
+    assert result["rows_written"] == 2
+    assert {r["date"] for r in written} == {date(2026, 2, 10), date(2026, 2, 11)}
+    assert result["touched"] == [1]
+    assert session.committed
+    revision = session.statements[-1].compile()
+    assert str(revision).startswith("INSERT INTO price_revisions")
+    assert {k: v for k, v in revision.params.items() if not k.startswith("recorded_at")} == {
+        "stock_id_m0": 1, "earliest_date_m0": date(2026, 2, 10),
+    }
+
+
+class _Scalars:
+    def __init__(self, items):
+        self._items = items
+
+    def all(self):
+        return self._items
+
+
+class _FetchResult(_Rows):
+    def scalars(self):
+        return _Scalars(self._rows)
+
+
+class _FetchSession(_IngestSession):
+    """Answers the active-stock query with `stocks` and every other query with no rows."""
+
+    def __init__(self, stocks):
+        super().__init__()
+        self.stocks = stocks
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _FetchResult(self.stocks if len(self.statements) == 1 else [])
+
+
+@pytest.mark.asyncio
+async def test_fetch_daily_prices_reports_empty_gaps_as_no_data_without_retrying(monkeypatch):
+    from contextlib import asynccontextmanager
+    from types import SimpleNamespace
+
+    from src.price_gaps import PriceGap
+
+    today = date(2026, 2, 11)
+    stocks = [SimpleNamespace(id=i, symbol=symbol, last_close_price=None) for i, symbol in enumerate(["AAA", "BBB", "CCC", "DDD"], 1)]
+    session = _FetchSession(stocks)
+    gaps = [
+        PriceGap(1, "AAA", today, today, 1),
+        PriceGap(2, "BBB", today, today, 1),  # halted / delisted: the provider has no BBB column
+        PriceGap(3, "CCC", date(2026, 2, 2), date(2026, 2, 4), 3),  # pre-listing days: empty download
+    ]
+    downloads = []
+    recorded = []
+
+    async def detect(session, start, end):
+        return gaps
+
+    def download(symbols, start, end):
+        downloads.append((symbols, start))
+        if "CCC" in symbols:
+            return pd.DataFrame()
+        return _multi_frame(["AAA"])
+
+    async def insert(session, model, rows, conflict_columns=None, batch_size=5000):
+        return len(list(rows))
+
+    async def record(session, empty_gaps, checked_on=None):
+        recorded.extend(empty_gaps)
+        return len(empty_gaps)
+
+    async def refresh(session, stock_ids):
+        pass
+
+    async def sleep(delay):
+        raise AssertionError("empty gap downloads must not be retried")
+
+    monkeypatch.setattr(daily_update, "AsyncSessionLocal", asynccontextmanager(lambda: _yield(session)))
+    monkeypatch.setattr(daily_update, "detect_price_gaps", detect)
+    monkeypatch.setattr(daily_update, "_download", download)
+    monkeypatch.setattr(daily_update, "bulk_insert_ignore", insert)
+    monkeypatch.setattr(daily_update, "record_no_data", record)
+    monkeypatch.setattr(daily_update, "refresh_stock_stats", refresh)
+    monkeypatch.setattr(daily_update.asyncio, "sleep", sleep)
+
+    summary = await daily_update.fetch_daily_prices(target_date=today)
+
+    assert sorted(downloads) == [(["AAA", "BBB"], today), (["CCC"], date(2026, 2, 2))]
+    assert summary["status"] == "completed"
+    assert summary["failure_count"] == 0 and summary["failures"] == []
+    assert summary["no_data_count"] == 2
+    assert sorted(summary["no_data"]) == ["BBB", "CCC"]
+    assert summary["success_count"] == 2 and summary["skipped_count"] == 1
+    assert summary["missing_days"] == 5
+    assert sorted(gap.symbol for gap in recorded) == ["BBB", "CCC"]
+
+
+async def _yield(value):
+    yield value
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from src import history_backfill
+from src.history_backfill import default_job_name, plan_fetch_start
+from src.market_data import SyntheticProvider
+
+START, END = date(2026, 1, 1), date(2026, 2, 10)
+
+
+def test_plan_fetch_start_skips_completed_stocks():
+    assert plan_fetch_start(START, END, None, ("done", END)) is None
+    assert plan_fetch_start(START, END, None, ("empty", END)) is None
+    assert plan_fetch_start(START, END, END - timedelta(days=1), None) is None
+
+
+def test_plan_fetch_start_resumes_after_stored_prices_and_checkpoints():
+    assert plan_fetch_start(START, END, None, None) == START
+    assert plan_fetch_start(START, END, date(2026, 1, 20), None) == date(2026, 1, 21)
+    # An older run's checkpoint (earlier end date) resumes after it
+    assert plan_fetch_start(START, END, date(2026, 1, 20), ("done", date(2026, 1, 30))) == date(2026, 1, 31)
+    # Failures retry from the start of the missing range
+    assert plan_fetch_start(START, END, None, ("failed", None)) == START
+
+
+def test_default_job_name_is_stable_per_command():
+    assert default_job_name(365) == "history-365d"
+    assert default_job_name(30, "aapl") == "history-30d-AAPL"
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, stocks):
+        self.stocks = stocks
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        return _Rows(self.stocks)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+class _ThrottlingProvider(SyntheticProvider):
+    """Answers 429 on the first request for each symbol."""
+
+    def __init__(self):
+        super().__init__(seed=5)
+        self.seen = []
+
+    def needs_network(self, symbol, start, end):
+        return True
+
+    def history(self, symbol, start, end):
+        first = symbol not in self.seen
+        self.seen.append(symbol)
+        if first:
+            raise RuntimeError("429 Too Many Requests")
+        return super().history(symbol, start, end)
+
+
+@pytest.mark.asyncio
+async def test_backfill_requeues_throttled_symbols_and_checkpoints_each_stock(monkeypatch):
+    stocks = [(1, "AAA"), (2, "BBB"), (3, "CCC")]
+    checkpoints = []
+    inserted = []
+
+    async def last_price_dates(session, ids):
+        return {3: date.today()}  # already up to date
+
+    async def load_checkpoints(session, job):
+        return {}
+
+    async def insert(session, model, rows, conflict_columns=None):
+        inserted.extend(rows)
+        return len(rows)
+
+    async def save_checkpoint(session, job, stock_id, status, completed_through, rows_written=0, attempts=1, error=None):
+        checkpoints.append((job, stock_id, status, completed_through, attempts))
+
+    monkeypatch.setattr(history_backfill, "AsyncSessionLocal", lambda: _Session(stocks))
+    monkeypatch.setattr(history_backfill, "last_price_dates", last_price_dates)
+    monkeypatch.setattr(history_backfill, "load_checkpoints", load_checkpoints)
+    monkeypatch.setattr(history_backfill, "bulk_insert_ignore", insert)
+    monkeypatch.setattr(history_backfill, "save_checkpoint", save_checkpoint)
+    refreshed = []
+
+    async def refresh(session, ids):
+        refreshed.extend(ids)
+
+    monkeypatch.setattr(history_backfill, "refresh_stock_stats", refresh)
+    monkeypatch.setattr(history_backfill.AdaptiveTokenBucket, "on_throttle", lambda self, retry_after=None: setattr(self, "throttled", self.throttled + 1))
+
+    summary = await history_backfill.backfill_history(
+        days_back=30, workers=2, rate_per_hour=3600 * 1000, provider=_ThrottlingProvider()
+    )
+
+    assert summary["skipped_count"] == 1
+    assert summary["success_count"] == 2
+    assert summary["failure_count"] == 0
+    assert summary["throttled"] == 2
+    assert summary["rows_written"] == len(inserted) > 0
+    assert sorted((c[1], c[2], c[4]) for c in checkpoints) == [(1, "done", 2), (2, "done", 2)]
+    assert all(c[0] == "history-30d" and c[3] == date.today() for c in checkpoints)
+    assert sorted(refreshed) == [1, 2]
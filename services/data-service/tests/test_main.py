@@ -5,6 +5,7 @@ from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
 import pytest
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 
 from src import main as data_main
@@ -95,7 +96,7 @@ async def test_daily_update_success(monkeypatch):
     result = await data_main.daily_update(payload)
 
     assert result["status"] == "completed"
-    fetch.assert_awaited_once_with(target_date=date(2026, 2, 10), lookback_days=2)
+    fetch.assert_awaited_once_with(target_date=date(2026, 2, 10), lookback_days=2, overwrite=False)
 
 
 @pytest.mark.asyncio
@@ -214,3 +215,74 @@ async def test_get_alert_history_failure(monkeypatch):
 
     assert result["status"] == "error"
     assert "db unavailable" in result["message"]
+
+
+class _BatchSession:
+    """Symbol lookup returns `stocks`; the insert returns rows for keys not in `existing`."""
+
+    def __init__(self, stocks, existing=()):
+        self.stocks = stocks
+        self.existing = set(existing)
+        self.statements = []
+        self.committed = False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        if len(self.statements) == 1:
+            return _ResultRows(self.stocks)
+        rows = stmt.compile().params
+        inserted = []
+        for i in range(len([k for k in rows if k.startswith("stock_id_m")])):
+            key = (rows[f"stock_id_m{i}"], rows[f"date_m{i}"], rows[f"crossover_type_m{i}"])
+            if key not in self.existing:
+                inserted.append((100 + i, *key))
+        return _ResultRows(inserted)
+
+    async def commit(self):
+        self.committed = True
+
+
+def _alert(symbol, crossover_type="esm_entry"):
+    return data_main.AlertCreate(
+        stock_symbol=symbol,
+        triggered_at=datetime(2026, 2, 10, 16, 30),
+        date=date(2026, 2, 10),
+        condition_met="ESM Entry",
+        crossover_type=crossover_type,
+        direction="bullish",
+        price=100.0,
+        indicator_values={"ema_9": 100.0},
+    )
+
+
+@pytest.mark.asyncio
+async def test_record_alerts_reports_per_item_status_in_one_transaction(monkeypatch):
+    session = _BatchSession(
+        stocks=[(1, "AAPL"), (2, "MSFT"), (3, "NVDA")],
+        existing={(2, date(2026, 2, 10), "esm_entry")},
+    )
+    monkeypatch.setattr(data_main, "AsyncSessionLocal", _SessionFactory(session))
+
+    result = await data_main.record_alerts(
+        [_alert("AAPL"), _alert("MSFT"), _alert("ZZZZ"), _alert("AAPL"), _alert("NVDA", None)]
+    )
+
+    assert [r["status"] for r in result["results"]] == ["success", "skipped", "error", "skipped", "success"]
+    assert result["results"][0] == {"status": "success", "id": 100}
+    assert result["results"][2] == {"status": "error", "message": "Stock not found"}
+    assert (result["recorded"], result["skipped"], result["errors"]) == (2, 2, 1)
+    # One symbol lookup and one INSERT ... ON CONFLICT DO NOTHING RETURNING
+    assert len(session.statements) == 2
+    assert session.committed is True
+    sql = str(session.statements[1].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (stock_id, date, crossover_type) DO NOTHING RETURNING" in sql
+
+
+@pytest.mark.asyncio
+async def test_record_alerts_failure_returns_error(monkeypatch):
+    session = _FakeSession(execute_error=RuntimeError("db down"))
+    monkeypatch.setattr(data_main, "AsyncSessionLocal", _SessionFactory(session))
+
+    result = await data_main.record_alerts([_alert("AAPL")])
+
+    assert result == {"status": "error", "message": "db down"}
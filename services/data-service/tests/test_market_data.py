@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src import market_data
+from src.market_data import LocalFileProvider, SyntheticProvider, get_provider, record_fixtures
+
+
+def test_synthetic_provider_is_deterministic_across_ranges():
+    provider = SyntheticProvider(seed=7)
+
+    wide = provider.history("AAPL", date(2024, 1, 1), date(2024, 3, 1))
+    narrow = provider.history("AAPL", date(2024, 2, 1), date(2024, 2, 10))
+
+    assert list(wide.columns) == market_data.PRICE_FIELDS
+    assert narrow.index.min() >= pd.Timestamp("2024-02-01")
+    assert narrow.index.max() < pd.Timestamp("2024-02-10")
+    pd.testing.assert_frame_equal(narrow, wide.loc[narrow.index])
+    assert (wide["Low"] <= wide[["Open", "Close"]].min(axis=1)).all()
+    assert (wide["High"] >= wide[["Open", "Close"]].max(axis=1)).all()
+
+
+def test_synthetic_provider_download_is_grouped_by_symbol():
+    df = SyntheticProvider(seed=7).download(["AAA", "BBB"], date(2024, 1, 1), date(2024, 1, 10))
+
+    assert isinstance(df.columns, pd.MultiIndex)
+    assert set(df.columns.get_level_values(0)) == {"AAA", "BBB"}
+    assert not df["AAA"]["Close"].equals(df["BBB"]["Close"])
+
+
+def test_local_provider_replays_recorded_csv(tmp_path):
+    source = SyntheticProvider(seed=1)
+    assert record_fixtures(source, ["MSFT"], date(2024, 1, 1), date(2024, 2, 1), str(tmp_path), fmt="csv") == 1
+
+    local = LocalFileProvider(str(tmp_path))
+    replayed = local.download(["MSFT", "NOPE"], date(2024, 1, 8), date(2024, 1, 13))
+
+    assert set(replayed.columns.get_level_values(0)) == {"MSFT"}
+    expected = source.history("MSFT", date(2024, 1, 8), date(2024, 1, 13))
+    assert list(replayed.index) == list(expected.index)
+    assert replayed["MSFT"]["Close"].tolist() == pytest.approx(expected["Close"].tolist())
+    assert local.history("NOPE", date(2024, 1, 1), date(2024, 2, 1)).empty
+
+
+def test_local_provider_reads_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    record_fixtures(SyntheticProvider(seed=1), ["MSFT"], date(2024, 1, 1), date(2024, 2, 1), str(tmp_path))
+
+    assert not LocalFileProvider(str(tmp_path)).history("MSFT", date(2024, 1, 1), date(2024, 2, 1)).empty
+
+
+def test_get_provider_by_name():
+    assert get_provider("synthetic").name == "synthetic"
+    assert get_provider("LOCAL").name == "local"
+    with pytest.raises(ValueError, match="MARKET_DATA_PROVIDER"):
+        get_provider("bloomberg")
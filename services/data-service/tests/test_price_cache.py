@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.market_data import SyntheticProvider
+from src.price_cache import CachedProvider, PriceCache
+
+
+class _CountingProvider(SyntheticProvider):
+    """Synthetic bars that record every (symbols, start, end) request."""
+
+    name = "counting"
+
+    def __init__(self):
+        super().__init__(seed=3)
+        self.calls = []
+
+    def needs_network(self, symbol, start, end):
+        return True
+
+    def download(self, symbols, start, end):
+        self.calls.append((tuple(symbols), start, end))
+        return super().download(symbols, start, end)
+
+
+def _cached(tmp_path, **kwargs):
+    inner = _CountingProvider()
+    cache = PriceCache(str(tmp_path), ttl_seconds=kwargs.pop("ttl_seconds", 3600), fmt="csv", **kwargs)
+    return inner, CachedProvider(inner, cache)
+
+
+def test_repeat_download_is_served_from_cache(tmp_path):
+    inner, provider = _cached(tmp_path)
+
+    first = provider.download(["AAA", "BBB"], date(2024, 1, 1), date(2024, 2, 1))
+    second = provider.download(["AAA", "BBB"], date(2024, 1, 1), date(2024, 2, 1))
+
+    assert len(inner.calls) == 1
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+    assert provider.cache.hits == 2
+
+
+def test_sub_range_is_served_from_covering_entry(tmp_path):
+    inner, provider = _cached(tmp_path)
+    provider.download(["AAA"], date(2024, 1, 1), date(2024, 3, 1))
+
+    df = provider.download(["AAA"], date(2024, 1, 15), date(2024, 2, 1))
+
+    assert len(inner.calls) == 1
+    assert df.index.min() >= pd.Timestamp("2024-01-15")
+    assert df.index.max() < pd.Timestamp("2024-02-01")
+
+
+def test_extended_range_fetches_only_missing_tail(tmp_path):
+    inner, provider = _cached(tmp_path)
+    provider.download(["AAA"], date(2024, 1, 1), date(2024, 2, 1))
+
+    df = provider.download(["AAA"], date(2024, 1, 1), date(2024, 3, 1))
+
+    assert inner.calls[-1] == (("AAA",), date(2024, 2, 1), date(2024, 3, 1))
+    expected = SyntheticProvider(seed=3).history("AAA", date(2024, 1, 1), date(2024, 3, 1))
+    assert df["AAA"]["Close"].tolist() == pytest.approx(expected["Close"].tolist())
+    # The merged range replaced the shorter entry
+    assert [p.name for p in (tmp_path / "counting" / "AAA").iterdir()] == ["20240101_20240301.csv"]
+
+
+def test_recent_entries_expire_but_settled_ones_do_not(tmp_path):
+    inner, provider = _cached(tmp_path, ttl_seconds=60)
+    provider.download(["AAA"], date(2024, 1, 1), date(2024, 2, 1))
+    entry = next((tmp_path / "counting" / "AAA").iterdir())
+
+    # Written after the range ended: settled, kept regardless of age
+    assert provider.cache.is_fresh(entry, date(2024, 2, 1), now=time.time() + 10**6)
+    # Written before the range ended (e.g. today's bar): subject to the TTL
+    written = pd.Timestamp("2024-01-31 18:00").timestamp()
+    os.utime(entry, (written, written))
+    assert provider.cache.is_fresh(entry, date(2024, 2, 1), now=written + 30)
+    assert not provider.cache.is_fresh(entry, date(2024, 2, 1), now=written + 120)
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    inner, provider = _cached(tmp_path)
+    provider.download(["AAA"], date(2024, 1, 1), date(2024, 2, 1))
+    provider.download(["BBB"], date(2024, 1, 1), date(2024, 2, 1))
+    aaa = next((tmp_path / "counting" / "AAA").iterdir())
+    os.utime(aaa, (time.time() - 100, time.time() - 100))
+
+    provider.cache.max_bytes = aaa.stat().st_size + 1
+    stats = provider.cache.evict()
+
+    assert stats["evicted"] == 1
+    assert not aaa.exists()
+    assert any((tmp_path / "counting" / "BBB").iterdir())
+
+
+def test_empty_results_are_not_cached(tmp_path):
+    inner, provider = _cached(tmp_path)
+
+    assert provider.download(["AAA"], date(1990, 1, 1), date(1990, 2, 1)).empty
+    provider.download(["AAA"], date(1990, 1, 1), date(1990, 2, 1))
+
+    assert len(inner.calls) == 2
+
+
+def test_needs_network_only_for_uncached_ranges(tmp_path):
+    inner, provider = _cached(tmp_path)
+    assert provider.needs_network("AAA", date(2024, 1, 1), date(2024, 2, 1))
+
+    provider.download(["AAA"], date(2024, 1, 1), date(2024, 2, 1))
+
+    assert not provider.needs_network("AAA", date(2024, 1, 1), date(2024, 2, 1))
+    assert provider.needs_network("AAA", date(2024, 1, 1), date(2024, 3, 1))
+
+
+def test_history_fetches_through_inner_history_and_caches(tmp_path):
+    class _Failing(_CountingProvider):
+        def history(self, symbol, start, end):
+            self.calls.append(((symbol,), start, end))
+            if start < date(2024, 1, 1):
+                raise RuntimeError("429 Too Many Requests")
+            return super().history(symbol, start, end)
+
+    inner = _Failing()
+    provider = CachedProvider(inner, PriceCache(str(tmp_path), ttl_seconds=3600, fmt="csv"))
+
+    with pytest.raises(RuntimeError, match="429"):
+        provider.history("AAA", date(2023, 12, 1), date(2024, 1, 15))
+    first = provider.history("AAA", date(2024, 1, 1), date(2024, 2, 1))
+    second = provider.history("AAA", date(2024, 1, 1), date(2024, 2, 1))
+
+    assert len(inner.calls) == 2
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
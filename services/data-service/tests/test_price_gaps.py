@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+import pytest_asyncio
+
+from src import price_gaps
+from src.config import settings
+from src.price_gaps import PriceGap, detect_price_gaps, plan_gap_fetches, record_no_data
+
+ENABLE_LIVE = os.getenv("RUN_LIVE_DATA_SERVICE_INTEGRATION", "").lower() in {"1", "true", "yes"}
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def execute(self, stmt, params=None):
+        self.calls.append((str(stmt), params))
+        return _Rows(self.rows)
+
+
+def test_trading_days_falls_back_to_weekdays_without_calendar(monkeypatch):
+    monkeypatch.setattr(price_gaps, "mcal", None)
+
+    days = price_gaps.trading_days(date(2026, 2, 6), date(2026, 2, 10))
+
+    assert days == [date(2026, 2, 6), date(2026, 2, 9), date(2026, 2, 10)]
+    assert price_gaps.trading_days(date(2026, 2, 10), date(2026, 2, 9)) == []
+
+
+@pytest.mark.asyncio
+async def test_detect_price_gaps_runs_one_query_over_trading_days(monkeypatch):
+    days = [date(2026, 2, 6), date(2026, 2, 9), date(2026, 2, 10)]
+    monkeypatch.setattr(price_gaps, "trading_days", lambda start, end: days)
+    session = _Session([(1, "AAA", date(2026, 2, 9), date(2026, 2, 10), 2)])
+
+    gaps = await detect_price_gaps(session, date(2026, 2, 1), date(2026, 2, 10), min_history_bars=50)
+
+    assert gaps == [PriceGap(1, "AAA", date(2026, 2, 9), date(2026, 2, 10), 2)]
+    assert len(session.calls) == 1
+    sql, params = session.calls[0]
+    assert "WITH ORDINALITY" in sql and "price_data_misses" in sql
+    assert params == {
+        "days": days,
+        "stock_ids": None,
+        "start": date(2026, 2, 6),
+        "end": date(2026, 2, 10),
+        "min_history": 50,
+        "grace_days": settings.GAP_NO_DATA_GRACE_DAYS,
+    }
+
+
+@pytest.mark.asyncio
+async def test_detect_price_gaps_without_trading_days_skips_query(monkeypatch):
+    monkeypatch.setattr(price_gaps, "trading_days", lambda start, end: [])
+    session = _Session([])
+
+    assert await detect_price_gaps(session, date(2026, 2, 7), date(2026, 2, 8)) == []
+    assert session.calls == []
+
+
+def test_plan_gap_fetches_groups_shared_ranges_into_chunks():
+    today = date(2026, 2, 10)
+    gaps = [PriceGap(i, f"S{i}", today, today, 1) for i in range(1, 4)]
+    gaps.append(PriceGap(9, "HOLE", date(2026, 1, 20), date(2026, 1, 21), 2))
+
+    requests = plan_gap_fetches(gaps, chunk_size=2)
+
+    assert [(start, end, [g.stock_id for g in group]) for start, end, group in requests] == [
+        (date(2026, 1, 20), date(2026, 1, 22), [9]),
+        (today, date(2026, 2, 11), [1, 2]),
+        (today, date(2026, 2, 11), [3]),
+    ]
+
+
+# -----------------------------------------------------------------------------
+# Gap semantics against a real database (opt-in, like test_api_integration)
+# -----------------------------------------------------------------------------
+
+DAYS = [d.date() for d in pd.bdate_range("2026-01-05", periods=10)]
+
+
+def _bars(indexes):
+    return [DAYS[i] for i in indexes]
+
+
+# symbol -> stored bars. Detection runs with min_history_bars=5.
+LIVE_STOCKS = {
+    "ZZGAPA": _bars([0, 1, 2, 3, 5, 6, 7, 8, 9]),  # interior hole on day 4
+    "ZZGAPB": _bars([7, 8, 9]),  # 3 bars, under the threshold: pre-listing days are missing
+    "ZZGAPC": _bars(range(3, 10)),  # 7 bars, at/over the threshold: earlier days are not missing
+    "ZZGAPD": _bars([0, 1, 2, 3, 5, 6, 7, 8, 9]),  # hole on day 4, recorded empty after the grace period
+    "ZZGAPE": _bars([0, 1, 2, 3, 5, 6, 7, 8, 9]),  # hole on day 4, recorded empty the same day only
+}
+
+
+@pytest_asyncio.fixture
+async def live_stocks(monkeypatch):
+    from sqlalchemy import delete
+
+    from shared.models import PriceData, Stock
+    from src.database import AsyncSessionLocal
+    from src.models import PriceDataMiss
+
+    monkeypatch.setattr(price_gaps, "trading_days", lambda start, end: [d for d in DAYS if start <= d <= end])
+    async with AsyncSessionLocal() as session:
+        ids = {}
+        for symbol, days in LIVE_STOCKS.items():
+            stock = Stock(symbol=symbol, is_active=True)
+            session.add(stock)
+            await session.flush()
+            ids[symbol] = stock.id
+            session.add_all(PriceData(stock_id=stock.id, date=day, close=10.0, volume=1000) for day in days)
+        await session.commit()
+        try:
+            yield session, ids
+        finally:
+            stock_ids = list(ids.values())
+            await session.rollback()
+            await session.execute(delete(PriceDataMiss).where(PriceDataMiss.stock_id.in_(stock_ids)))
+            await session.execute(delete(PriceData).where(PriceData.stock_id.in_(stock_ids)))
+            await session.execute(delete(Stock).where(Stock.id.in_(stock_ids)))
+            await session.commit()
+
+
+@pytest.mark.skipif(not ENABLE_LIVE, reason="Set RUN_LIVE_DATA_SERVICE_INTEGRATION=1 to run live gap detection checks")
+@pytest.mark.asyncio
+async def test_live_gap_semantics_hole_pre_listing_threshold_and_recorded_misses(live_stocks):
+    session, ids = live_stocks
+    hole = DAYS[4]
+    await record_no_data(session, [PriceGap(ids["ZZGAPD"], "ZZGAPD", hole, hole, 1)], checked_on=hole + timedelta(days=3))
+    await record_no_data(session, [PriceGap(ids["ZZGAPE"], "ZZGAPE", hole, hole, 1)], checked_on=hole)
+    await session.commit()
+
+    gaps = await detect_price_gaps(
+        session, DAYS[0], DAYS[-1], stock_ids=list(ids.values()), min_history_bars=5, grace_days=3
+    )
+
+    by_symbol = {}
+    for gap in gaps:
+        by_symbol.setdefault(gap.symbol, []).append((gap.start, gap.end, gap.missing_days))
+    assert by_symbol == {
+        "ZZGAPA": [(hole, hole, 1)],
+        "ZZGAPB": [(DAYS[0], DAYS[6], 7)],
+        "ZZGAPE": [(hole, hole, 1)],
+    }
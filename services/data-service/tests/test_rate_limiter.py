@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+
+from src.rate_limiter import AdaptiveTokenBucket, is_rate_limited
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _bucket(clock, **kwargs):
+    return AdaptiveTokenBucket(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_spaced_at_the_configured_rate():
+    clock = _Clock()
+    bucket = _bucket(clock, rate=2.0, burst=1)
+
+    for _ in range(5):
+        await bucket.acquire()
+
+    # First token is the initial burst, then one every 0.5s
+    assert clock.now == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_throttle_halves_rate_and_pauses_callers():
+    clock = _Clock()
+    bucket = _bucket(clock, rate=4.0, burst=1, cooldown_seconds=30)
+    await bucket.acquire()
+
+    bucket.on_throttle()
+    await bucket.acquire()
+
+    assert bucket.rate == 2.0
+    assert bucket.throttled == 1
+    assert clock.now >= 30
+
+
+def test_successes_recover_rate_up_to_max():
+    bucket = AdaptiveTokenBucket(rate=4.0, increase_after=2, increase_step=1.0)
+    bucket.on_throttle(retry_after=0)
+    assert bucket.rate == 2.0
+
+    for _ in range(10):
+        bucket.on_success()
+
+    assert bucket.rate == 4.0
+
+
+def test_rate_never_drops_below_min_rate():
+    bucket = AdaptiveTokenBucket(rate=1.0, min_rate=0.25)
+    for _ in range(10):
+        bucket.on_throttle(retry_after=0)
+    assert bucket.rate == 0.25
+
+
+def test_is_rate_limited_detects_429s():
+    class YFRateLimitError(Exception):
+        pass
+
+    assert is_rate_limited(RuntimeError("HTTP Error 429"))
+    assert is_rate_limited(RuntimeError("Too Many Requests. Rate limited."))
+    assert is_rate_limited(YFRateLimitError("try later"))
+    assert not is_rate_limited(ValueError("No timezone found, symbol may be delisted"))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.stock_stats import refresh_stock_stats
+
+
+class _Session:
+    def __init__(self, rowcount=0):
+        self.calls = []
+        self.rowcount = rowcount
+
+    async def execute(self, stmt, params=None):
+        self.calls.append((str(stmt), params))
+        return SimpleNamespace(rowcount=self.rowcount)
+
+
+@pytest.mark.asyncio
+async def test_refresh_updates_only_touched_stocks_in_one_statement():
+    session = _Session(rowcount=2)
+
+    updated = await refresh_stock_stats(session, [5, 3, 5], as_of=date(2026, 2, 10))
+
+    assert updated == 2
+    assert len(session.calls) == 1
+    sql, params = session.calls[0]
+    assert "p.stock_id = ANY(:stock_ids)" in sql
+    assert "UPDATE stocks s" in sql and "FROM stats" in sql
+    assert params == {
+        "stock_ids": [3, 5],
+        "window_start": date(2025, 12, 27),
+        "avg_30d_start": date(2026, 1, 11),
+        "avg_bars": 20,
+    }
+
+
+@pytest.mark.asyncio
+async def test_refresh_without_stocks_skips_the_statement():
+    session = _Session()
+
+    assert await refresh_stock_stats(session, []) == 0
+    assert session.calls == []
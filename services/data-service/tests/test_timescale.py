@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+
+from src import cleanup, timescale
+from src.config import settings
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self._rows = list(rows)
+        self.rowcount = rowcount
+
+    def all(self):
+        return self._rows
+
+
+class _Conn:
+    """Records statements; statements containing `fail_on` raise."""
+
+    def __init__(self, rows=(), compression_enabled=False, fail_on=None):
+        self.statements = []
+        self.rows = rows
+        self.compression_enabled = compression_enabled
+        self.fail_on = fail_on
+        self.savepoints = 0
+        self.committed = False
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        self.savepoints += 1
+        yield
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append((sql, params))
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"{self.fail_on} failed")
+        return _Result(self.rows, rowcount=3)
+
+    async def scalar(self, stmt, params=None):
+        return self.compression_enabled
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+def _sql(conn):
+    return [sql for sql, _ in conn.statements]
+
+
+@pytest.fixture
+def policy_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TIMESCALE_CHUNK_INTERVAL_DAYS", 30)
+    monkeypatch.setattr(settings, "TIMESCALE_COMPRESS_AFTER_DAYS", 180)
+    monkeypatch.setattr(settings, "PRICE_RETENTION_DAYS", 0)
+    monkeypatch.setattr(settings, "INDICATOR_RETENTION_DAYS", 730)
+
+
+@pytest.mark.asyncio
+async def test_setup_hypertables_installs_chunk_compression_and_retention_policies(policy_settings):
+    conn = _Conn()
+
+    await timescale.setup_hypertables(conn)
+
+    sql = _sql(conn)
+    assert any("create_hypertable('price_data'" in s and "chunk_time_interval" in s for s in sql)
+    assert any("set_chunk_time_interval('indicators'" in s for s in sql)
+    assert any(
+        "ALTER TABLE indicators SET (timescaledb.compress" in s and "compress_segmentby = 'stock_id'" in s
+        for s in sql
+    )
+    assert any("add_compression_policy('indicator_snapshots'" in s for s in sql)
+    assert any("add_retention_policy('indicators'" in s for s in sql)
+    # Prices are kept forever by default: the old policy is removed, none added
+    assert any("remove_retention_policy('price_data'" in s for s in sql)
+    assert not any("add_retention_policy('price_data'" in s for s in sql)
+    assert conn.savepoints == len(sql)
+
+
+@pytest.mark.asyncio
+async def test_setup_hypertables_keeps_existing_compression_settings_and_survives_failures(policy_settings):
+    conn = _Conn(compression_enabled=True, fail_on="add_compression_policy")
+
+    await timescale.setup_hypertables(conn)
+
+    sql = _sql(conn)
+    assert not any("ALTER TABLE" in s for s in sql)
+    assert any("add_retention_policy('indicator_snapshots'" in s for s in sql)
+
+
+@pytest.mark.asyncio
+async def test_drop_and_compress_report_chunk_counts():
+    conn = _Conn(rows=[("_hyper_1_1_chunk",), ("_hyper_1_2_chunk",)])
+
+    assert await timescale.drop_old_chunks(conn, "indicators", date(2024, 1, 1)) == 2
+    assert await timescale.compress_old_chunks(conn, "indicators", date(2025, 6, 1)) == 2
+    assert "drop_chunks('indicators'" in conn.statements[0][0]
+    assert conn.statements[1][1] == {"table": "indicators", "cutoff": date(2025, 6, 1)}
+
+
+@pytest.mark.asyncio
+async def test_chunk_stats_fills_tables_without_chunks():
+    conn = _Conn(rows=[("price_data", 12, 6, date(2025, 1, 1), date(2026, 2, 28), 4096)])
+
+    stats = await timescale.chunk_stats(conn, ["price_data", "indicators"])
+
+    assert stats["price_data"] == {
+        "chunks": 12,
+        "compressed_chunks": 6,
+        "oldest": "2025-01-01",
+        "newest": "2026-02-28",
+        "total_bytes": 4096,
+    }
+    assert stats["indicators"]["chunks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_prune_old_data_drops_chunks_instead_of_deleting_indicators(monkeypatch, policy_settings):
+    conn = _Conn(rows=[("_hyper_2_1_chunk",)])
+    monkeypatch.setattr(cleanup, "AsyncSessionLocal", asynccontextmanager(lambda: _yield(conn)))
+
+    summary = await cleanup.prune_old_data()
+
+    assert summary["status"] == "completed"
+    assert summary["chunks_dropped"] == {"indicators": 1, "indicator_snapshots": 1}
+    assert summary["indicators_deleted"] == 0
+    assert not any("DELETE FROM indicators" in s for s in _sql(conn))
+    assert summary["alerts_deleted"] == 3
+    assert conn.committed
+
+
+@pytest.mark.asyncio
+async def test_prune_old_data_falls_back_to_row_deletes_without_timescale(monkeypatch, policy_settings):
+    conn = _Conn(fail_on="drop_chunks")
+    monkeypatch.setattr(cleanup, "AsyncSessionLocal", asynccontextmanager(lambda: _yield(conn)))
+
+    async def prune(session, cutoff):
+        return {"indicators_deleted": 5, "snapshots_deleted": 2}
+
+    monkeypatch.setattr(cleanup, "prune_indicators", prune)
+
+    summary = await cleanup.prune_old_data()
+
+    assert summary["status"] == "completed"
+    assert summary["chunks_dropped"] == {}
+    assert summary["indicators_deleted"] == 5 and summary["snapshots_deleted"] == 2
+
+
+async def _yield(value):
+    yield value
@@ -0,0 +1,349 @@
+"""
+Indicator engine benchmarks.
+
+Times the indicator engines against synthetic price panels and writes the
+results as JSON so runs from different versions can be compared.
+
+Cases (each symbols x years combination):
+- pandas:            `calculate_all_indicators` per stock (the per-symbol path)
+- panel:             `calculate_panel_indicators` over the whole (bar x symbol) panel
+- daily_full:        the daily job's full-recompute compute path on its price window
+                     (columns -> panel -> indicators -> latest values + state)
+- daily_incremental: the daily job's incremental path (advance every state by one bar)
+
+Each case runs in a fresh process so peak RSS is attributable to that case.
+Database I/O is not included; the daily cases start from already-loaded columns.
+
+Usage:
+    python benchmarks/bench_indicators.py
+    python benchmarks/bench_indicators.py --symbols 100 1000 --years 1 5 --engines panel pandas
+    python benchmarks/bench_indicators.py --compare benchmarks/results/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from src.daily_calculate import WINDOW_DAYS  # noqa: E402
+from src.indicator_registry import STANDARD_INDICATORS  # noqa: E402
+from src.indicator_state import advance_through, state_values, states_from_panel  # noqa: E402
+from src.indicators import calculate_all_indicators  # noqa: E402
+from src.panel_indicators import (  # noqa: E402
+    calculate_panel_indicators,
+    latest_values,
+    panel_from_columns,
+)
+
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_SYMBOLS = (100, 1_000, 10_000)
+DEFAULT_YEARS = (1, 5, 20)
+ENGINES = ("pandas", "panel", "daily_full", "daily_incremental")
+# Per-stock pandas timing is linear in symbols; time a sample and report throughput
+DEFAULT_PANDAS_SAMPLE = 200
+# Cases whose estimated working set exceeds this are skipped
+DEFAULT_MEMORY_LIMIT_GB = 8.0
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# =============================================================================
+# Synthetic data
+# =============================================================================
+
+def synthetic_columns(n_symbols: int, n_bars: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Flat (stock_id, date, close, volume) columns sorted by (stock_id, date), shaped
+    like `price_loader.load_price_columns` output. Prices are geometric random walks.
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.02, size=(n_bars, n_symbols))
+    close = 50.0 * np.exp(np.cumsum(returns, axis=0))
+    volume = rng.lognormal(13.0, 0.5, size=(n_bars, n_symbols)).round()
+
+    start = date(2000, 1, 3)
+    day_list = [start + timedelta(days=i) for i in range(n_bars)]
+    dates = np.empty(n_bars, dtype=object)
+    dates[:] = day_list
+
+    return {
+        "stock_id": np.repeat(np.arange(1, n_symbols + 1, dtype=np.int64), n_bars),
+        "date": np.tile(dates, n_symbols),
+        "close": close.T.reshape(-1),
+        "volume": volume.T.reshape(-1),
+    }
+
+
+def estimated_gb(engine: str, n_symbols: int, n_bars: int) -> float:
+    """Rough peak working set: (bars x symbols) float64 matrices alive at once."""
+    if engine == "pandas":
+        return 0.0
+    if engine in ("daily_full", "daily_incremental"):
+        n_bars = min(n_bars, WINDOW_DAYS)
+    # inputs + ~20 indicator matrices + temporaries
+    matrices = 6 + len(STANDARD_INDICATORS) + 8
+    return n_bars * n_symbols * 8 * matrices / 1e9
+
+
+# =============================================================================
+# Cases
+# =============================================================================
+
+def _timed(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _per_indicator_ms(
+    compute: Callable[[Optional[List[str]]], Any],
+    repeat: int,
+) -> Dict[str, float]:
+    """Cost of requesting each indicator alone (its dependencies included)."""
+    return {name: round(_timed(lambda: compute([name]), repeat) * 1000, 3) for name in STANDARD_INDICATORS}
+
+
+def _bench_pandas(cols, n_symbols, n_bars, repeat, sample, per_indicator):
+    sampled = min(n_symbols, sample)
+    frames = []
+    for i in range(sampled):
+        rows = slice(i * n_bars, (i + 1) * n_bars)
+        frames.append(pd.DataFrame({"date": cols["date"][rows], "close": cols["close"][rows], "volume": cols["volume"][rows]}))
+
+    def run():
+        for df in frames:
+            calculate_all_indicators(df)
+
+    seconds = _timed(run, repeat)
+    result = {"seconds": seconds, "measured_symbols": sampled, "measured_bars": sampled * n_bars}
+    if per_indicator:
+        result["per_indicator_ms"] = _per_indicator_ms(lambda names: calculate_all_indicators(frames[0], names), repeat)
+        result["per_indicator_scope"] = "one symbol"
+    return result
+
+
+def _bench_panel(cols, n_symbols, n_bars, repeat, per_indicator):
+    panel = panel_from_columns(cols["stock_id"], cols["date"], cols["close"], cols["volume"])
+    seconds = _timed(lambda: calculate_panel_indicators(panel.close, panel.volume), repeat)
+    result = {"seconds": seconds, "measured_symbols": n_symbols, "measured_bars": n_symbols * n_bars}
+    if per_indicator:
+        result["per_indicator_ms"] = _per_indicator_ms(
+            lambda names: calculate_panel_indicators(panel.close, panel.volume, names), repeat
+        )
+        result["per_indicator_scope"] = "whole panel"
+    return result
+
+
+def _window(cols, n_symbols, n_bars):
+    """Restrict columns to the daily job's price window (trailing bars per stock)."""
+    window = min(n_bars, WINDOW_DAYS)
+    keep = np.tile(np.arange(n_bars) >= n_bars - window, n_symbols)
+    return {k: v[keep] for k, v in cols.items()}, window
+
+
+def _bench_daily_full(cols, n_symbols, n_bars, repeat):
+    cols, window = _window(cols, n_symbols, n_bars)
+
+    def run():
+        panel = panel_from_columns(cols["stock_id"], cols["date"], cols["close"], cols["volume"])
+        indicators = calculate_panel_indicators(panel.close, panel.volume)
+        latest = {sid: dict(latest_values(indicators, col)) for col, sid in enumerate(panel.stock_ids)}
+        states = states_from_panel(panel, indicators)
+        return latest, states
+
+    seconds = _timed(run, repeat)
+    return {"seconds": seconds, "measured_symbols": n_symbols, "measured_bars": n_symbols * window, "window_bars": window}
+
+
+def _bench_daily_incremental(cols, n_symbols, n_bars, repeat):
+    cols, window = _window(cols, n_symbols, n_bars)
+    panel = panel_from_columns(cols["stock_id"], cols["date"], cols["close"], cols["volume"])
+    states = states_from_panel(panel, calculate_panel_indicators(panel.close, panel.volume))
+    next_day = panel.dates[-1, 0] + timedelta(days=1)
+    bars = {sid: [(next_day, panel.close[-1, col] * 1.01, panel.volume[-1, col])] for col, sid in enumerate(panel.stock_ids)}
+
+    def run():
+        for sid, state in states.items():
+            state_values(advance_through(state, bars[sid]))
+
+    seconds = _timed(run, repeat)
+    # One new bar per symbol
+    return {"seconds": seconds, "measured_symbols": n_symbols, "measured_bars": n_symbols, "window_bars": window}
+
+
+def run_case(
+    engine: str,
+    n_symbols: int,
+    years: int,
+    repeat: int = 3,
+    pandas_sample: int = DEFAULT_PANDAS_SAMPLE,
+    per_indicator: bool = True,
+) -> Dict[str, Any]:
+    """Run one benchmark case in the current process and return its measurements."""
+    n_bars = years * TRADING_DAYS_PER_YEAR
+    rss_before = _peak_rss_mb()
+    cols = synthetic_columns(n_symbols, n_bars)
+
+    if engine == "pandas":
+        result = _bench_pandas(cols, n_symbols, n_bars, repeat, pandas_sample, per_indicator)
+    elif engine == "panel":
+        result = _bench_panel(cols, n_symbols, n_bars, repeat, per_indicator)
+    elif engine == "daily_full":
+        result = _bench_daily_full(cols, n_symbols, n_bars, repeat)
+    elif engine == "daily_incremental":
+        result = _bench_daily_incremental(cols, n_symbols, n_bars, repeat)
+    else:
+        raise ValueError(f"Unknown engine '{engine}' (expected one of {', '.join(ENGINES)})")
+
+    seconds = result["seconds"]
+    return {
+        "engine": engine,
+        "symbols": n_symbols,
+        "years": years,
+        "bars_per_symbol": n_bars,
+        **result,
+        "seconds": round(seconds, 6),
+        "symbol_bars_per_sec": round(result["measured_bars"] / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_before_mb": round(rss_before, 1),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _case_worker(args):
+    return run_case(*args)
+
+
+def run_isolated(args: tuple) -> Dict[str, Any]:
+    """Run one case in a fresh process so its peak RSS is not shared with others."""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(_case_worker, (args,))
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _case_key(result: Dict[str, Any]) -> tuple:
+    return result["engine"], result["symbols"], result["years"]
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path) -> List[Dict[str, Any]]:
+    """Throughput and peak RSS ratios against a previous results file (ratio > 1 = faster / larger)."""
+    baseline = {_case_key(r): r for r in json.loads(baseline_path.read_text())["results"] if "seconds" in r}
+    rows = []
+    for result in results:
+        base = baseline.get(_case_key(result))
+        if not base or "seconds" not in result or not base.get("symbol_bars_per_sec"):
+            continue
+        rows.append({
+            "engine": result["engine"],
+            "symbols": result["symbols"],
+            "years": result["years"],
+            "throughput_ratio": round(result["symbol_bars_per_sec"] / base["symbol_bars_per_sec"], 3),
+            "peak_rss_ratio": round(result["peak_rss_mb"] / base["peak_rss_mb"], 3) if base.get("peak_rss_mb") else None,
+        })
+    return rows
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    label = f"{result['engine']:<18} {result['symbols']:>6} sym x {result['years']:>2}y"
+    if "skipped" in result:
+        print(f"{label}  skipped: {result['skipped']}")
+        return
+    print(
+        f"{label}  {result['seconds']:>9.3f}s  {result['symbol_bars_per_sec']:>14,.0f} bars/s  "
+        f"peak RSS {result['peak_rss_mb']:>8.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the indicator engines on synthetic panels")
+    parser.add_argument("--symbols", type=int, nargs="+", default=list(DEFAULT_SYMBOLS))
+    parser.add_argument("--years", type=int, nargs="+", default=list(DEFAULT_YEARS))
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per case (best time is kept)")
+    parser.add_argument("--pandas-sample", type=int, default=DEFAULT_PANDAS_SAMPLE,
+                        help="Symbols timed for the per-stock pandas engine")
+    parser.add_argument("--memory-limit-gb", type=float, default=DEFAULT_MEMORY_LIMIT_GB,
+                        help="Skip cases whose estimated working set exceeds this")
+    parser.add_argument("--no-per-indicator", action="store_true", help="Skip per-indicator timings")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for engine in args.engines:
+        for n_symbols in args.symbols:
+            for years in args.years:
+                needed = estimated_gb(engine, n_symbols, years * TRADING_DAYS_PER_YEAR)
+                if needed > args.memory_limit_gb:
+                    result = {"engine": engine, "symbols": n_symbols, "years": years,
+                              "skipped": f"estimated {needed:.1f} GB > {args.memory_limit_gb} GB limit"}
+                else:
+                    result = run_isolated((engine, n_symbols, years, args.repeat, args.pandas_sample,
+                                           not args.no_per_indicator))
+                _print_result(result)
+                results.append(result)
+
+    report = {"environment": environment(), "results": results}
+    if args.compare:
+        report["comparison"] = compare(results, args.compare)
+        for row in report["comparison"]:
+            print(f"{row['engine']:<18} {row['symbols']:>6} sym x {row['years']:>2}y  "
+                  f"throughput x{row['throughput_ratio']}  peak RSS x{row['peak_rss_ratio']}")
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
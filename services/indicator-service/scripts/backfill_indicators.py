@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+
+from src.backfill import DEFAULT_CHUNK_SIZE, backfill_indicators
+
+
+def _parse_date(value: str | None):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+async def run_backfill(args: argparse.Namespace) -> None:
+    summary = await backfill_indicators(
+        start_date=_parse_date(args.start_date),
+        end_date=_parse_date(args.end_date),
+        symbols=args.symbols,
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        extra_indicators=args.indicators,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill historical indicators")
+    parser.add_argument("--start", dest="start_date", default=None, help="Start date in YYYY-MM-DD (default: full history)")
+    parser.add_argument("--end", dest="end_date", default=None, help="End date in YYYY-MM-DD (default: today)")
+    parser.add_argument("--symbols", nargs="+", default=None, help="Symbols to backfill (default: all active stocks)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Stocks per compute task")
+    parser.add_argument(
+        "--indicators",
+        nargs="+",
+        default=None,
+        help="Non-standard indicators to include, e.g. ema_7 rsi_21 (default: those of enabled strategies)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run_backfill(args))
+
+
+if __name__ == "__main__":
+    main()
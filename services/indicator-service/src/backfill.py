@@ -0,0 +1,240 @@
+"""
+Historical Indicator Backfill
+
+Computes and stores every indicator for every date in a range, for all active
+stocks or a selected set of symbols. Used when a symbol or a new indicator is
+added and its history has to be populated.
+
+Stocks are processed in chunks: each chunk's price history is bulk-loaded, the
+CPU-bound panel computation runs in a ProcessPoolExecutor sized to the host, and
+the resulting rows are written through the shared indicator store.
+Loading, computing and writing overlap across chunks.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from src.database import AsyncSessionLocal
+from src.indicator_registry import STANDARD_INDICATORS, lookback_bars
+from src.indicator_view import indicator_cache
+from src.models import PriceData, Stock
+from src.panel_indicators import calculate_panel_indicators, day_numbers, panel_from_columns
+from src.price_loader import load_price_columns
+from src.strategy_indicators import extra_indicator_names, fetch_strategy_indicators
+from shared.indicator_store import store_indicators
+
+logger = logging.getLogger(__name__)
+
+# Calendar days loaded before start_date so 200-bar windows and EMAs are warmed up
+WARMUP_DAYS = 400
+# Stocks per compute task; bounds memory per worker and per bulk write
+DEFAULT_CHUNK_SIZE = 100
+EPOCH = date(1970, 1, 1)
+
+# (stock_ids, days, name_codes, values) for one chunk, plus the name lookup
+ChunkRows = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[str]]
+
+
+def compute_chunk_rows(
+    stock_id: np.ndarray,
+    dates: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    start_date: date,
+    end_date: date,
+    names: Optional[Sequence[str]] = None,
+) -> ChunkRows:
+    """
+    Compute indicators (default: all stored ones) for one chunk and keep the
+    values dated within [start_date, end_date]. Runs inside a worker process, so
+    it only takes and returns plain NumPy arrays (cheap to pickle).
+    """
+    panel = panel_from_columns(stock_id, dates, close, volume)
+    indicators = calculate_panel_indicators(panel.close, panel.volume, names)
+
+    start_day, end_day = day_numbers([start_date, end_date])
+    in_range = (panel.day >= start_day) & (panel.day <= end_day)
+    panel_ids = np.asarray(panel.stock_ids, dtype=np.int64)
+
+    names = list(indicators.keys())
+    out_ids, out_days, out_names, out_values = [], [], [], []
+    for code, name in enumerate(names):
+        matrix = indicators[name]
+        rows, cols = np.nonzero(in_range & ~np.isnan(matrix))
+        out_ids.append(panel_ids[cols])
+        out_days.append(panel.day[rows, cols].astype(np.int64))
+        out_names.append(np.full(len(rows), code, dtype=np.int16))
+        out_values.append(matrix[rows, cols])
+
+    return (
+        np.concatenate(out_ids),
+        np.concatenate(out_days),
+        np.concatenate(out_names),
+        np.concatenate(out_values),
+        names,
+    )
+
+
+def iter_chunk_rows(chunk: ChunkRows) -> Iterator[Tuple[int, date, str, float]]:
+    """Expand a computed chunk into (stock_id, date, indicator_name, value) tuples."""
+    stock_ids, days, name_codes, values, names = chunk
+    day_cache: Dict[int, date] = {}
+    for stock_id, day, code, value in zip(stock_ids.tolist(), days.tolist(), name_codes.tolist(), values.tolist()):
+        dt = day_cache.get(day)
+        if dt is None:
+            dt = day_cache[day] = EPOCH + timedelta(days=day)
+        yield stock_id, dt, names[code], value
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def backfill_indicators(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    symbols: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    extra_indicators: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Calculate and store indicators for every date in [start_date, end_date].
+
+    Args:
+        start_date: First date to store indicators for. Defaults to the
+            earliest stored price (full history).
+        end_date: Last date to store indicators for. Defaults to today.
+        symbols: Optional list of symbols. Defaults to all active stocks.
+        max_workers: Process pool size. Defaults to the host CPU count.
+        chunk_size: Stocks per compute task.
+        extra_indicators: Non-standard indicators to include. Defaults to the ones
+            referenced by the scanner's strategies.
+
+    Returns:
+        Summary dict with counts and duration
+    """
+    start_time = datetime.now()
+    end_date = end_date or date.today()
+    workers = max_workers or os.cpu_count() or 1
+    failures = []
+    indicators_created = 0
+    chunks_done = 0
+
+    if start_date and start_date > end_date:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+
+    if extra_indicators is None:
+        extras, extras_status = await fetch_strategy_indicators()
+    else:
+        extras, extras_status = extra_indicator_names(extra_indicators), "provided"
+    names = list(STANDARD_INDICATORS) + extras
+
+    async with AsyncSessionLocal() as session:
+        stmt = select(Stock.id, Stock.symbol)
+        if symbols:
+            stmt = stmt.where(Stock.symbol.in_([s.upper() for s in symbols]))
+        else:
+            stmt = stmt.where(Stock.is_active == True)
+        stocks = (await session.execute(stmt.order_by(Stock.id))).all()
+
+        total_stocks = len(stocks)
+        symbol_by_id = {stock_id: symbol for stock_id, symbol in stocks}
+        if symbols:
+            missing = sorted({s.upper() for s in symbols} - set(symbol_by_id.values()))
+            failures.extend({"symbol": s, "error": "Stock not found"} for s in missing)
+
+        if start_date is None:
+            start_date = await session.scalar(
+                select(func.min(PriceData.date)).where(PriceData.stock_id.in_(list(symbol_by_id)))
+            ) if symbol_by_id else None
+            start_date = start_date or end_date
+
+        logger.info(
+            f"Starting indicator backfill {start_date} to {end_date} "
+            f"for {total_stocks} stocks with {workers} workers"
+        )
+
+        warmup_days = max(WARMUP_DAYS, lookback_bars(names) * 2)
+        warmup_start = start_date - timedelta(days=warmup_days)
+        chunks = list(_chunks([stock_id for stock_id, _ in stocks], chunk_size))
+        loop = asyncio.get_running_loop()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: List[Tuple[Sequence[int], asyncio.Future]] = []
+
+            async def _drain_one():
+                nonlocal indicators_created, chunks_done
+                chunk_ids, future = pending.pop(0)
+                try:
+                    computed = await future
+                    created = sum((await store_indicators(session, iter_chunk_rows(computed))).values())
+                    await session.commit()
+                    indicators_created += created
+                    chunks_done += 1
+                    logger.info(
+                        f"Backfill progress: {chunks_done}/{len(chunks)} chunks, "
+                        f"{indicators_created} indicators created"
+                    )
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Backfill chunk failed ({len(chunk_ids)} stocks): {e}", exc_info=True)
+                    failures.extend({"symbol": symbol_by_id[sid], "error": str(e)} for sid in chunk_ids)
+
+            for chunk_ids in chunks:
+                columns = await load_price_columns(session, chunk_ids, warmup_start, end_date)
+                if not len(columns.stock_id):
+                    chunks_done += 1
+                    continue
+                future = loop.run_in_executor(
+                    pool,
+                    compute_chunk_rows,
+                    columns.stock_id,
+                    columns.date,
+                    columns.close,
+                    columns.volume,
+                    start_date,
+                    end_date,
+                    names,
+                )
+                pending.append((chunk_ids, future))
+                # Keep at most ~2 chunks per worker in flight to bound memory
+                if len(pending) >= workers * 2:
+                    await _drain_one()
+
+            while pending:
+                await _drain_one()
+
+    # Served views may have been computed on the fly for dates now stored
+    indicator_cache.invalidate()
+
+    duration = (datetime.now() - start_time).total_seconds()
+    summary = {
+        "status": "completed",
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "total_stocks": total_stocks,
+        "chunks": len(chunks),
+        "chunks_completed": chunks_done,
+        "workers": workers,
+        "extra_indicators": extras,
+        "strategy_indicators_status": extras_status,
+        "indicators_created": indicators_created,
+        "failure_count": len(failures),
+        "duration_seconds": round(duration, 2),
+        "failures": failures[:10] if failures else [],
+        "timestamp": datetime.now().isoformat()
+    }
+
+    logger.info(
+        f"Indicator backfill complete: {indicators_created} indicators for "
+        f"{total_stocks} stocks in {duration:.2f}s"
+    )
+    return summary
@@ -2,23 +2,68 @@
 Daily Indicator Calculation Endpoint
 
 Handles incremental indicator calculation - computes indicators only for latest date.
+Indicators for the whole universe are computed in a single cross-sectional pass
+(see src/panel_indicators.py) rather than one DataFrame per stock. In incremental
+mode, stocks with a fresh persisted state are advanced by one bar instead
+(see src/indicator_state.py); the state also carries the strategy-referenced
+periods, so their values advance without reloading price history.
 """
 import logging
 from datetime import datetime, date, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
 from sqlalchemy import select
 from src.database import AsyncSessionLocal
-from src.models import Stock, PriceData, Indicator
-from src.indicators import calculate_all_indicators
-import pandas as pd
+from src.models import Stock
+from src.indicator_registry import lookback_bars
+from src.panel_indicators import calculate_panel_indicators, latest_values, panel_from_columns, recent_indicator_rows
+from src.price_loader import load_price_columns
+from src.strategy_indicators import extra_indicator_names, fetch_strategy_indicators
+from shared.indicator_store import store_indicators
+from src.indicator_state import (
+    MAX_CATCHUP_BARS,
+    advance_state,
+    clear_price_revisions,
+    extra_values,
+    load_bars_since_state,
+    load_stale_state_ids,
+    load_states,
+    save_states,
+    state_values,
+    states_from_panel,
+    usable_state,
+)
 
 logger = logging.getLogger(__name__)
 
+# Calendar-day price window for a full recompute
+WINDOW_DAYS = 250
+# Strategy-referenced (non-standard) indicators are written for the last few bars,
+# so cross conditions have a previous value on the first day they are used
+EXTRA_HISTORY_BARS = 5
 
-async def calculate_daily_indicators(target_date: date = None) -> Dict[str, Any]:
+
+def _window_days(extra_names: Sequence[str]) -> int:
+    """Calendar days of prices needed to cover the longest extra indicator period."""
+    bars = lookback_bars(extra_names) + EXTRA_HISTORY_BARS
+    return max(WINDOW_DAYS, bars * 7 // 5 + 30)  # ~5 trading days per 7, plus holidays
+
+
+async def calculate_daily_indicators(
+    target_date: date = None,
+    mode: str = "incremental",
+    extra_indicators: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
     """
     Calculate indicators for TODAY (or target_date) for all active stocks.
     Only calculates for the latest date, not historical backfill.
+
+    Args:
+        target_date: Optional date to calculate for. Defaults to today.
+        mode: "incremental" advances each stock's persisted indicator state by the
+              new bar(s) and falls back to a full recompute when the state is missing
+              or stale; "full" always recomputes from the 250-day price window.
+        extra_indicators: Non-standard indicators (e.g. "ema_7") to compute in the same
+              panel pass. Defaults to the ones referenced by the scanner's strategies.
     
     Returns:
         Summary dict with success/failure counts and duration
@@ -29,13 +74,26 @@ async def calculate_daily_indicators(target_date: date = None) -> Dict[str, Any]
     failure_count = 0
     indicators_created = 0
     skipped_count = 0
+    incremental_count = 0
+    full_recompute_count = 0
+    stale_state_count = 0
     failures = []
     latest_processed_date = None
     
     today = target_date if target_date else date.today()
-    logger.info(f"Starting daily indicator calculation for {today}")
+    if mode not in ("incremental", "full"):
+        raise ValueError(f"Unsupported mode '{mode}' (expected 'incremental' or 'full')")
+    logger.info(f"Starting daily indicator calculation for {today} (mode={mode})")
+
+    if extra_indicators is None:
+        extras, extras_status = await fetch_strategy_indicators()
+    else:
+        extras, extras_status = extra_indicator_names(extra_indicators), "provided"
     
     async with AsyncSessionLocal() as session:
+        # Watermark for the saved states: price rows written after this are not seen
+        prices_read_at = datetime.utcnow()
+
         # Get all active stocks
         result = await session.execute(select(Stock).where(Stock.is_active == True))
         stocks = result.scalars().all()
@@ -43,94 +101,117 @@ async def calculate_daily_indicators(target_date: date = None) -> Dict[str, Any]
         total_stocks = len(stocks)
         logger.info(f"Found {total_stocks} active stocks to process")
         
-        for i, stock in enumerate(stocks, 1):
-            try:
-                # Get last 200 days of price data (need for 200-day SMA)
-                cutoff_date = today - timedelta(days=250)  # Extra buffer for weekends
-                price_query = select(PriceData).where(
-                    PriceData.stock_id == stock.id,
-                    PriceData.date >= cutoff_date,
-                    PriceData.date <= today  # Ensure we don't peek into future if backfilling
-                ).order_by(PriceData.date.asc())
-                
-                price_result = await session.execute(price_query)
-                prices = price_result.scalars().all()
-                
-                if len(prices) < 50:  # Need minimum data for indicators
-                    logger.warning(f"[{i}/{total_stocks}] {stock.symbol}: Insufficient price data ({len(prices)} days)")
-                    failure_count += 1
-                    failures.append({"symbol": stock.symbol, "error": "Insufficient price data"})
+        stock_by_id = {stock.id: stock for stock in stocks}
+        latest = {}      # stock_id -> (date, {indicator_name: value})
+        new_states = {}  # stock_id -> advanced/rebuilt state
+        full_stocks = list(stocks)
+        extra_rows: List[tuple] = []
+
+        # 1. Incremental mode: advance persisted state by the new bar(s) only
+        if mode == "incremental":
+            states = await load_states(session, list(stock_by_id.keys()))
+            new_bars = await load_bars_since_state(session, today)
+            # States whose past bars were back-filled or overwritten since they were saved
+            stale_ids = await load_stale_state_ids(session)
+            full_stocks = []
+            for stock in stocks:
+                state = states.get(stock.id)
+                bars = new_bars.get(stock.id, [])
+                if stock.id in stale_ids and state is not None:
+                    stale_state_count += 1
+                    full_stocks.append(stock)
+                    continue
+                # A state without a newly referenced strategy indicator is rebuilt once
+                if not usable_state(state, today, extras) or len(bars) > MAX_CATCHUP_BARS:
+                    full_stocks.append(stock)
                     continue
-                
-                # Convert to DataFrame
-                df = pd.DataFrame([{
-                    'date': p.date,
-                    'close': p.close,
-                    'high': p.high,
-                    'low': p.low,
-                    'open': p.open,
-                    'volume': p.volume or 0
-                } for p in prices])
-                
-                # Calculate all indicators
-                indicators_map = calculate_all_indicators(df)
-                
-                # Get ONLY the last row (today's indicators)
-                last_idx = df.index[-1]
-                last_date = df['date'].iloc[-1]
-                if latest_processed_date is None or last_date > latest_processed_date:
-                    latest_processed_date = last_date
-
-                # Check if indicators already exist for the actual last_date
-                existing_result = await session.execute(
-                    select(Indicator.indicator_name).where(
-                        Indicator.stock_id == stock.id,
-                        Indicator.date == last_date
+                if not bars:
+                    # State already covers the latest available bar
+                    skipped_count += 1
+                    continue
+                for bar_date, close, volume in bars:
+                    state = advance_state(state, bar_date, close, volume or 0)
+                    extra_rows.extend(
+                        (stock.id, bar_date, name, value) for name, value in extra_values(state, extras).items()
                     )
-                )
-                existing_names = set(existing_result.scalars().all())
-                
-                # Create indicator records for TODAY only
-                batch_indicators = []
-                for indicator_name, series in indicators_map.items():
-                    if indicator_name in existing_names:
-                        continue
-                    if last_idx in series.index:
-                        val = series.loc[last_idx]
-                        if pd.notna(val):
-                            indicator = Indicator(
-                                stock_id=stock.id,
-                                date=last_date,
-                                indicator_name=indicator_name,
-                                value=float(val)
-                            )
-                            batch_indicators.append(indicator)
-                
-                if not batch_indicators:
-                    if existing_names:
-                        logger.debug(f"[{i}/{total_stocks}] {stock.symbol}: Indicators already exist for {last_date} (skipping)")
-                        skipped_count += 1
-                        continue
-                    logger.warning(f"[{i}/{total_stocks}] {stock.symbol}: No indicators calculated")
+                new_states[stock.id] = state
+                latest[stock.id] = (bars[-1][0], state_values(state))
+                incremental_count += 1
+            logger.info(
+                f"Advanced {incremental_count} stocks incrementally; {len(full_stocks)} need a full recompute "
+                f"({stale_state_count} with past bars changed since their state was saved)"
+            )
+
+        # 2. Full recompute: load every price window in a few column-only queries
+        cutoff_date = today - timedelta(days=_window_days(extras))  # Extra buffer for weekends
+        eligible_ids = []
+        if full_stocks:
+            columns = await load_price_columns(session, [s.id for s in full_stocks], cutoff_date, today)
+            bar_counts = columns.counts()
+            logger.info(f"Loaded {len(columns.stock_id)} price rows for {len(bar_counts)} stocks")
+            for stock in full_stocks:
+                n_bars = bar_counts.get(stock.id, 0)
+                if n_bars < 50:  # Need minimum data for indicators
+                    logger.warning(f"{stock.symbol}: Insufficient price data ({n_bars} days)")
                     failure_count += 1
-                    failures.append({"symbol": stock.symbol, "error": "No indicators calculated"})
+                    failures.append({"symbol": stock.symbol, "error": "Insufficient price data"})
                     continue
-                
-                # Batch insert
-                session.add_all(batch_indicators)
-                indicators_created += len(batch_indicators)
-                success_count += 1
-                
-                if i % 50 == 0:
-                    logger.info(f"Progress: {i}/{total_stocks} stocks, {indicators_created} indicators created")
-                    await session.commit()  # Commit in batches
-                
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"[{i}/{total_stocks}] {stock.symbol}: Error - {e}")
+                eligible_ids.append(stock.id)
+
+        # Calculate all indicators for the recompute set in one panel pass
+        if eligible_ids:
+            panel = panel_from_columns(
+                columns.stock_id, columns.date, columns.close, columns.volume, stock_ids=eligible_ids
+            )
+            indicators_map = calculate_panel_indicators(panel.close, panel.volume)
+            for col, stock_id in enumerate(panel.stock_ids):
+                latest[stock_id] = (panel.dates[-1, col], dict(latest_values(indicators_map, col)))
+            extra_map = calculate_panel_indicators(panel.close, panel.volume, names=extras) if extras else {}
+            new_states.update(states_from_panel(panel, {**indicators_map, **extra_map}, extras))
+            if extras:
+                extra_rows.extend(recent_indicator_rows(panel, extra_map, EXTRA_HISTORY_BARS))
+            full_recompute_count = len(panel.stock_ids)
+            logger.info(f"Calculated indicators for {full_recompute_count} stocks in one panel pass")
+
+        if extras:
+            logger.info(f"Calculated {len(extras)} strategy indicators ({len(extra_rows)} values)")
+
+        # 3. Persist the last row (today's indicators) per stock, plus recent strategy extras
+        rows = []
+        written_ids = []
+        for stock_id, (last_date, values) in latest.items():
+            stock = stock_by_id[stock_id]
+            if latest_processed_date is None or last_date > latest_processed_date:
+                latest_processed_date = last_date
+            if not values:
+                logger.warning(f"{stock.symbol}: No indicators calculated")
                 failure_count += 1
-                failures.append({"symbol": stock.symbol, "error": str(e)})
-        
+                failures.append({"symbol": stock.symbol, "error": "No indicators calculated"})
+                continue
+            rows.extend((stock_id, last_date, name, value) for name, value in values.items())
+            written_ids.append(stock_id)
+        rows.extend(extra_rows)
+
+        try:
+            # Existing indicators are skipped on conflict, so no existence check is needed
+            created_per_stock = await store_indicators(session, rows)
+            indicators_created = sum(created_per_stock.values())
+            for stock_id in written_ids:
+                if created_per_stock[stock_id]:
+                    success_count += 1
+                else:
+                    logger.debug(f"{stock_by_id[stock_id].symbol}: Indicators already exist (skipping)")
+                    skipped_count += 1
+
+            # Persist the advanced/rebuilt state for tomorrow's run
+            await save_states(session, new_states, prices_read_at=prices_read_at)
+            await clear_price_revisions(session, new_states.keys(), prices_read_at)
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Failed to write indicators: {e}")
+            failure_count += len(written_ids)
+            failures.extend({"symbol": stock_by_id[sid].symbol, "error": str(e)} for sid in written_ids)
+
         # Final commit
         await session.commit()
     
@@ -145,6 +226,12 @@ async def calculate_daily_indicators(target_date: date = None) -> Dict[str, Any]
         "failure_count": failure_count,
         "skipped_count": skipped_count,
         "indicators_created": indicators_created,
+        "mode": mode,
+        "incremental_count": incremental_count,
+        "full_recompute_count": full_recompute_count,
+        "stale_state_count": stale_state_count,
+        "extra_indicators": extras,
+        "strategy_indicators_status": extras_status,
         "success_rate": round((success_count / total_stocks * 100), 2) if total_stocks > 0 else 0,
         "duration_seconds": round(duration, 2),
         "failures": failures[:10] if failures else [],
@@ -1,7 +1,20 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 from src.config import settings
 
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+async def init_db():
+    # Only create indicator-service owned tables; shared tables are managed by data-service.
+    from shared.database import Base
+    from src.models import IndicatorState, StrategyIndicatorSnapshot
+
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[IndicatorState.__table__, StrategyIndicatorSnapshot.__table__],
+        )
+        # Price-read watermark for stale-state detection (tables created before it existed)
+        await conn.execute(text("ALTER TABLE indicator_state ADD COLUMN IF NOT EXISTS prices_read_at TIMESTAMP;"))
@@ -0,0 +1,161 @@
+"""
+Indicator registry.
+
+Each indicator is declared once as a spec: the kernel that computes it, the
+inputs it reads (price sources such as `close`/`volume` or other indicators) and
+its parameters. `compute_indicators` resolves the requested names into a
+dependency-ordered plan and evaluates it with a backend's kernels, so:
+- only the requested indicators and their dependencies are computed, and
+- shared intermediates (e.g. `ema_12`/`ema_26` under MACD, `sma_20` under the
+  Bollinger middle band) are computed once and reused.
+
+Besides the fixed catalogue, period-parameterised names (`sma_<n>`, `ema_<n>`,
+`rsi_<n>`, `sma_vol_<n>`) resolve on demand, so strategies can reference any
+period without a code change.
+
+The registry is backend-agnostic. `src.indicators` evaluates it with pandas
+Series, `src.panel_indicators` with (bar x symbol) NumPy matrices.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+SOURCES = ("close", "volume")
+
+SMA_WINDOWS = (9, 20, 50, 200)
+EMA_SPANS = (9, 12, 20, 26, 50)
+VOLUME_SMA_WINDOW = 20
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_WINDOW, BB_NUM_STD = 20, 2
+MAX_PERIOD = 500
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    kernel: str  # key into a backend's kernel table
+    inputs: Tuple[str, ...]
+    params: Dict[str, Any] = field(default_factory=dict)
+    stored: bool = True  # False for intermediates that are never persisted
+
+
+def _standard_specs() -> List[IndicatorSpec]:
+    specs = [IndicatorSpec(f"sma_{w}", "sma", ("close",), {"window": w}) for w in SMA_WINDOWS]
+    specs.append(IndicatorSpec(f"sma_vol_{VOLUME_SMA_WINDOW}", "sma", ("volume",), {"window": VOLUME_SMA_WINDOW}))
+    specs += [IndicatorSpec(f"ema_{s}", "ema", ("close",), {"span": s}) for s in EMA_SPANS]
+    specs.append(IndicatorSpec(f"rsi_{RSI_WINDOW}", "rsi", ("close",), {"window": RSI_WINDOW}))
+    specs += [
+        IndicatorSpec("macd_line", "sub", (f"ema_{MACD_FAST}", f"ema_{MACD_SLOW}")),
+        IndicatorSpec("macd_signal", "ema", ("macd_line",), {"span": MACD_SIGNAL}),
+        IndicatorSpec("macd_hist", "sub", ("macd_line", "macd_signal")),
+        IndicatorSpec(f"bb_std_{BB_WINDOW}", "rolling_std", ("close",), {"window": BB_WINDOW}, stored=False),
+        IndicatorSpec("bb_upper", "band", (f"sma_{BB_WINDOW}", f"bb_std_{BB_WINDOW}"), {"num_std": BB_NUM_STD}),
+        IndicatorSpec("bb_middle", "identity", (f"sma_{BB_WINDOW}",)),
+        IndicatorSpec("bb_lower", "band", (f"sma_{BB_WINDOW}", f"bb_std_{BB_WINDOW}"), {"num_std": -BB_NUM_STD}),
+    ]
+    return specs
+
+
+REGISTRY: Dict[str, IndicatorSpec] = {spec.name: spec for spec in _standard_specs()}
+
+# Names persisted by the daily job / backfill, in output order
+STANDARD_INDICATORS: Tuple[str, ...] = tuple(name for name, spec in REGISTRY.items() if spec.stored)
+
+# Period-parameterised families: name pattern -> (kernel, source, param name)
+PARAMETRIC_FAMILIES = (
+    (re.compile(r"^sma_vol_(\d+)$"), "sma", "volume", "window"),
+    (re.compile(r"^sma_(\d+)$"), "sma", "close", "window"),
+    (re.compile(r"^ema_(\d+)$"), "ema", "close", "span"),
+    (re.compile(r"^rsi_(\d+)$"), "rsi", "close", "window"),
+)
+
+# Kernels shared by every backend (plain arithmetic works on Series and ndarrays alike)
+COMMON_KERNELS: Dict[str, Callable[..., Any]] = {
+    "sub": lambda a, b: a - b,
+    "band": lambda middle, std, num_std: middle + std * num_std,
+    "identity": lambda x: x,
+}
+
+
+def _parametric_spec(name: str) -> Optional[IndicatorSpec]:
+    for pattern, kernel, source, param in PARAMETRIC_FAMILIES:
+        match = pattern.match(name)
+        if match:
+            period = int(match.group(1))
+            if not 1 <= period <= MAX_PERIOD:
+                return None
+            return IndicatorSpec(name, kernel, (source,), {param: period})
+    return None
+
+
+def get_spec(name: str) -> IndicatorSpec:
+    spec = REGISTRY.get(name) or _parametric_spec(name)
+    if spec is None:
+        raise ValueError(f"Unknown indicator: {name}")
+    return spec
+
+
+def is_known_indicator(name: str) -> bool:
+    return name in REGISTRY or _parametric_spec(name) is not None
+
+
+def lookback_bars(names: Iterable[str]) -> int:
+    """Longest window/span any of `names` (or their dependencies) reads."""
+    periods = [spec.params[key] for spec in resolve_plan(names) for key in ("window", "span") if key in spec.params]
+    return max(periods, default=0)
+
+
+def resolve_plan(names: Iterable[str]) -> List[IndicatorSpec]:
+    """Return the specs needed for `names` (dependencies included) in evaluation order."""
+    plan: List[IndicatorSpec] = []
+    seen = set()
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in seen or name in SOURCES:
+            return
+        if name in visiting:
+            raise ValueError(f"Indicator dependency cycle at {name}")
+        visiting.add(name)
+        spec = get_spec(name)
+        for dep in spec.inputs:
+            visit(dep)
+        visiting.discard(name)
+        seen.add(name)
+        plan.append(spec)
+
+    for name in names:
+        visit(name)
+    return plan
+
+
+def required_sources(names: Iterable[str]) -> set[str]:
+    """Price sources (`close`, `volume`) the requested indicators read."""
+    return {dep for spec in resolve_plan(names) for dep in spec.inputs if dep in SOURCES}
+
+
+def compute_indicators(
+    sources: Mapping[str, Any],
+    kernels: Mapping[str, Callable[..., Any]],
+    names: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate the requested indicators (default: all stored ones) against `sources`.
+
+    Indicators whose inputs include a source missing from `sources` (e.g. no
+    volume) are skipped. Returns {name: result} for the requested names only,
+    in request order.
+    """
+    requested = list(STANDARD_INDICATORS if names is None else names)
+    values: Dict[str, Any] = {k: v for k, v in sources.items() if v is not None}
+
+    for spec in resolve_plan(requested):
+        if not all(dep in values for dep in spec.inputs):
+            continue
+        kernel = kernels.get(spec.kernel) or COMMON_KERNELS[spec.kernel]
+        values[spec.name] = kernel(*(values[dep] for dep in spec.inputs), **spec.params)
+
+    return {name: values[name] for name in requested if name in values}
@@ -0,0 +1,414 @@
+"""
+Stateful incremental indicators.
+
+Every recursive or windowed indicator can be advanced by one bar from a small
+amount of carried state:
+- EMAs / MACD signal: the last smoothed value
+- RSI: Wilder average gain and average loss
+- SMAs / Bollinger: rolling sums (and sum of squares) plus the trailing closes
+  needed to drop the oldest bar out of each window
+- strategy-referenced periods outside the standard set (`ema_7`, `rsi_21`,
+  `sma_15`, ...): the last EMA value or Wilder averages under `extra`, and SMA
+  windows read from trailing close/volume buffers lengthened to cover them
+
+The state is persisted per stock in `indicator_state` so the nightly job only has
+to read the new bar instead of ~250 days of history. Each state records when its
+prices were read (`prices_read_at`). data-service records the earliest date it
+writes per stock in `price_revisions`; a revision dated on or before the state's
+bar and recorded after its prices were read (a back-filled hole, an overwritten
+bar) makes the state stale, and the stock is recomputed from full history.
+Revisions are cleared once the stock's state has been rebuilt past them.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.indicator_registry import get_spec
+from src.models import IndicatorState, PriceData, PriceRevision
+from src.panel_indicators import EMA_SPANS, SMA_WINDOWS, PricePanel, panel_rsi_components
+
+STATE_VERSION = 1
+BB_WINDOW = 20
+BB_NUM_STD = 2
+VOLUME_WINDOW = 20
+RSI_WINDOW = 14
+MACD_SIGNAL_SPAN = 9
+CLOSE_BUFFER = max(SMA_WINDOWS)
+
+# States that lag by more than this many bars are rebuilt from full history.
+MAX_CATCHUP_BARS = 5
+
+
+def _alpha(span: int) -> float:
+    return 2.0 / (span + 1)
+
+
+def _window_sum(values: Sequence[float], window: int) -> float:
+    return float(sum(values[-window:]))
+
+
+def _buffer_lengths(extra_names: Iterable[str]) -> Tuple[int, int]:
+    """Trailing closes and volumes to keep so every extra SMA window can be read."""
+    close_len, volume_len = CLOSE_BUFFER, VOLUME_WINDOW
+    for name in extra_names:
+        spec = get_spec(name)
+        if spec.kernel == "sma":
+            if spec.inputs[0] == "volume":
+                volume_len = max(volume_len, spec.params["window"])
+            else:
+                close_len = max(close_len, spec.params["window"])
+    return close_len, volume_len
+
+
+def build_state(
+    closes: Sequence[float],
+    volumes: Sequence[float],
+    as_of: date,
+    emas: Dict[int, float],
+    macd_signal: float,
+    avg_gain: float,
+    avg_loss: float,
+    extras: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Create a state snapshot from the tail of a fully computed history. `extras`
+    maps strategy indicators to their carried value: the EMA, [avg_gain,
+    avg_loss] for RSI, or None for SMAs (read from the buffers).
+    """
+    close_len, volume_len = _buffer_lengths(extras or ())
+    closes = [float(c) for c in closes][-close_len:]
+    volumes = [float(v) for v in volumes][-volume_len:]
+    state = {
+        "version": STATE_VERSION,
+        "as_of": as_of.isoformat(),
+        "closes": closes,
+        "volumes": volumes,
+        "sums": {str(w): _window_sum(closes, w) for w in SMA_WINDOWS},
+        "sumsq_bb": float(sum(c * c for c in closes[-BB_WINDOW:])),
+        "volume_sum": _window_sum(volumes, VOLUME_WINDOW),
+        "ema": {str(span): float(emas[span]) for span in EMA_SPANS},
+        "macd_signal": float(macd_signal),
+        "avg_gain": float(avg_gain),
+        "avg_loss": float(avg_loss),
+    }
+    if extras:
+        state["extra"] = dict(extras)
+    return state
+
+
+def _advance_extras(extras: Dict[str, Any], close: float, delta: float) -> Dict[str, Any]:
+    advanced = {}
+    for name, carried in extras.items():
+        spec = get_spec(name)
+        if spec.kernel == "ema":
+            alpha = _alpha(spec.params["span"])
+            advanced[name] = (1 - alpha) * carried + alpha * close
+        elif spec.kernel == "rsi":
+            alpha = 1.0 / spec.params["window"]
+            gain, loss = carried
+            advanced[name] = [
+                (1 - alpha) * gain + alpha * max(delta, 0.0),
+                (1 - alpha) * loss + alpha * max(-delta, 0.0),
+            ]
+        else:
+            advanced[name] = None
+    return advanced
+
+
+def advance_state(state: Dict[str, Any], bar_date: date, close: float, volume: float) -> Dict[str, Any]:
+    """Advance a state by one bar in O(1). Returns a new state dict."""
+    extras = state.get("extra") or {}
+    close_len, volume_len = _buffer_lengths(extras)
+    closes: List[float] = list(state["closes"])
+    volumes: List[float] = list(state["volumes"])
+    sums = {int(w): s for w, s in state["sums"].items()}
+    close = float(close)
+    volume = float(volume)
+
+    for window in SMA_WINDOWS:
+        if len(closes) >= window:
+            sums[window] -= closes[-window]
+        sums[window] += close
+
+    sumsq_bb = state["sumsq_bb"] + close * close
+    if len(closes) >= BB_WINDOW:
+        sumsq_bb -= closes[-BB_WINDOW] ** 2
+
+    volume_sum = state["volume_sum"] + volume
+    if len(volumes) >= VOLUME_WINDOW:
+        volume_sum -= volumes[-VOLUME_WINDOW]
+
+    delta = close - closes[-1]
+    alpha_rsi = 1.0 / RSI_WINDOW
+    avg_gain = (1 - alpha_rsi) * state["avg_gain"] + alpha_rsi * max(delta, 0.0)
+    avg_loss = (1 - alpha_rsi) * state["avg_loss"] + alpha_rsi * max(-delta, 0.0)
+
+    emas = {}
+    for span in EMA_SPANS:
+        alpha = _alpha(span)
+        emas[span] = (1 - alpha) * state["ema"][str(span)] + alpha * close
+
+    macd_line = emas[12] - emas[26]
+    alpha_signal = _alpha(MACD_SIGNAL_SPAN)
+    macd_signal = (1 - alpha_signal) * state["macd_signal"] + alpha_signal * macd_line
+
+    closes.append(close)
+    volumes.append(volume)
+
+    advanced = {
+        "version": STATE_VERSION,
+        "as_of": bar_date.isoformat(),
+        "closes": closes[-close_len:],
+        "volumes": volumes[-volume_len:],
+        "sums": {str(w): s for w, s in sums.items()},
+        "sumsq_bb": sumsq_bb,
+        "volume_sum": volume_sum,
+        "ema": {str(span): v for span, v in emas.items()},
+        "macd_signal": macd_signal,
+        "avg_gain": avg_gain,
+        "avg_loss": avg_loss,
+    }
+    if extras:
+        advanced["extra"] = _advance_extras(extras, close, delta)
+    return advanced
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> Optional[float]:
+    if avg_loss > 0:
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+    if avg_gain > 0:
+        return 100.0
+    return None
+
+
+def state_values(state: Dict[str, Any]) -> Dict[str, float]:
+    """Indicator values at the state's bar, keyed like `calculate_all_indicators`."""
+    n_bars = len(state["closes"])
+    values: Dict[str, float] = {}
+
+    for window in SMA_WINDOWS:
+        if n_bars >= window:
+            values[f"sma_{window}"] = state["sums"][str(window)] / window
+
+    if len(state["volumes"]) >= VOLUME_WINDOW:
+        values["sma_vol_20"] = state["volume_sum"] / VOLUME_WINDOW
+
+    for span in EMA_SPANS:
+        values[f"ema_{span}"] = state["ema"][str(span)]
+
+    rsi = _rsi(state["avg_gain"], state["avg_loss"])
+    if rsi is not None:
+        values["rsi_14"] = rsi
+
+    macd_line = values["ema_12"] - values["ema_26"]
+    values["macd_line"] = macd_line
+    values["macd_signal"] = state["macd_signal"]
+    values["macd_hist"] = macd_line - state["macd_signal"]
+
+    if n_bars >= BB_WINDOW:
+        total = state["sums"][str(BB_WINDOW)]
+        var = (state["sumsq_bb"] - total * total / BB_WINDOW) / (BB_WINDOW - 1)
+        std = math.sqrt(max(var, 0.0))
+        middle = total / BB_WINDOW
+        values["bb_upper"] = middle + std * BB_NUM_STD
+        values["bb_middle"] = middle
+        values["bb_lower"] = middle - std * BB_NUM_STD
+
+    return values
+
+
+def extra_values(state: Dict[str, Any], names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Strategy indicator values at the state's bar (all carried ones, or `names`)."""
+    extras = state.get("extra") or {}
+    values: Dict[str, float] = {}
+    for name in extras if names is None else names:
+        if name not in extras:
+            continue
+        spec = get_spec(name)
+        if spec.kernel == "ema":
+            values[name] = extras[name]
+        elif spec.kernel == "rsi":
+            rsi = _rsi(*extras[name])
+            if rsi is not None:
+                values[name] = rsi
+        else:
+            source = state["volumes"] if spec.inputs[0] == "volume" else state["closes"]
+            window = spec.params["window"]
+            if len(source) >= window:
+                values[name] = _window_sum(source, window) / window
+    return values
+
+
+def states_from_panel(
+    panel: PricePanel,
+    indicators: Dict[str, np.ndarray],
+    extra_names: Sequence[str] = (),
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Build a state for every stock in a fully computed panel. `extra_names` are
+    carried too; their EMAs are read from `indicators`.
+    """
+    avg_gain, avg_loss = panel_rsi_components(panel.close, RSI_WINDOW)
+    rsi_components = {
+        name: panel_rsi_components(panel.close, get_spec(name).params["window"])
+        for name in extra_names
+        if get_spec(name).kernel == "rsi"
+    }
+    states: Dict[int, Dict[str, Any]] = {}
+
+    for col, stock_id in enumerate(panel.stock_ids):
+        observed = ~np.isnan(panel.close[:, col])
+        if not observed.any():
+            continue
+        extras: Dict[str, Any] = {}
+        for name in extra_names:
+            if name in rsi_components:
+                carried = [float(c[-1, col]) for c in rsi_components[name]]
+            elif get_spec(name).kernel == "ema":
+                carried = float(indicators[name][-1, col])
+            else:
+                carried = None
+            # Unseeded values are not carried; the stock is recomputed until they are
+            if carried is None or np.isfinite(carried).all():
+                extras[name] = carried
+        states[stock_id] = build_state(
+            closes=panel.close[observed, col],
+            volumes=panel.volume[observed, col],
+            as_of=panel.dates[-1, col],
+            emas={span: indicators[f"ema_{span}"][-1, col] for span in EMA_SPANS},
+            macd_signal=indicators["macd_signal"][-1, col],
+            avg_gain=avg_gain[-1, col],
+            avg_loss=avg_loss[-1, col],
+            extras=extras,
+        )
+    return states
+
+
+def usable_state(state: Optional[Dict[str, Any]], today: date, extra_names: Iterable[str] = ()) -> bool:
+    """
+    A state can be advanced if it exists, matches the current layout, is not ahead
+    of `today` and carries every strategy indicator in `extra_names`.
+    """
+    if not state or state.get("version") != STATE_VERSION:
+        return False
+    if not set(extra_names) <= set(state.get("extra") or {}):
+        return False
+    return date.fromisoformat(state["as_of"]) <= today
+
+
+def advance_through(
+    state: Dict[str, Any],
+    bars: Iterable[Tuple[date, float, float]],
+) -> Dict[str, Any]:
+    """Advance a state across consecutive new bars (sorted ascending)."""
+    for bar_date, close, volume in bars:
+        state = advance_state(state, bar_date, close, volume or 0)
+    return state
+
+
+# =============================================================================
+# Persistence
+# =============================================================================
+
+async def load_states(session, stock_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """Load persisted states for the given stocks in one query."""
+    if not stock_ids:
+        return {}
+    result = await session.execute(
+        select(IndicatorState.stock_id, IndicatorState.state)
+        .where(IndicatorState.stock_id.in_(list(stock_ids)))
+    )
+    return {stock_id: state for stock_id, state in result.all()}
+
+
+async def load_stale_state_ids(session) -> set[int]:
+    """
+    Stocks whose state missed a price change: a bar dated on or before the state's
+    `as_of_date` was written after its prices were read. One join of two small
+    tables (`price_revisions` holds at most one row per stock); price_data is not read.
+    """
+    watermark = func.coalesce(IndicatorState.prices_read_at, IndicatorState.updated_at)
+    result = await session.execute(
+        select(IndicatorState.stock_id)
+        .join(PriceRevision, PriceRevision.stock_id == IndicatorState.stock_id)
+        .where(PriceRevision.earliest_date <= IndicatorState.as_of_date)
+        .where(PriceRevision.recorded_at > watermark)
+    )
+    return {stock_id for (stock_id,) in result.all()}
+
+
+async def clear_price_revisions(session, stock_ids: Iterable[int], prices_read_at: datetime) -> None:
+    """
+    Drop revisions of `stock_ids` recorded before `prices_read_at`: their states were
+    just rebuilt from prices that include them. Later revisions are kept. Does not commit.
+    """
+    stock_ids = list(stock_ids)
+    if not stock_ids:
+        return
+    await session.execute(
+        delete(PriceRevision)
+        .where(PriceRevision.stock_id.in_(stock_ids))
+        .where(PriceRevision.recorded_at <= prices_read_at)
+    )
+
+
+async def load_bars_since_state(session, today: date) -> Dict[int, List[Tuple[date, float, float]]]:
+    """
+    Load price bars newer than each stock's state (up to `today`) in one query.
+    Returns {stock_id: [(date, close, volume), ...]} sorted by date.
+    """
+    result = await session.execute(
+        select(PriceData.stock_id, PriceData.date, PriceData.close, PriceData.volume)
+        .join(IndicatorState, IndicatorState.stock_id == PriceData.stock_id)
+        .where(PriceData.date > IndicatorState.as_of_date)
+        .where(PriceData.date <= today)
+        .order_by(PriceData.stock_id, PriceData.date.asc())
+    )
+    bars: Dict[int, List[Tuple[date, float, float]]] = {}
+    for stock_id, bar_date, close, volume in result.all():
+        bars.setdefault(stock_id, []).append((bar_date, close, volume or 0))
+    return bars
+
+
+async def save_states(
+    session,
+    states: Dict[int, Dict[str, Any]],
+    prices_read_at: Optional[datetime] = None,
+) -> None:
+    """
+    Upsert states, never replacing a newer state with an older one.
+    `prices_read_at` (UTC) is when the prices behind the states were read.
+    """
+    if not states:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "stock_id": stock_id,
+            "as_of_date": date.fromisoformat(state["as_of"]),
+            "version": state["version"],
+            "state": state,
+            "prices_read_at": prices_read_at or now,
+            "updated_at": now,
+        }
+        for stock_id, state in states.items()
+    ]
+    stmt = insert(IndicatorState).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IndicatorState.stock_id],
+        set_={
+            "as_of_date": stmt.excluded.as_of_date,
+            "version": stmt.excluded.version,
+            "state": stmt.excluded.state,
+            "prices_read_at": stmt.excluded.prices_read_at,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=IndicatorState.as_of_date <= stmt.excluded.as_of_date,
+    )
+    await session.execute(stmt)
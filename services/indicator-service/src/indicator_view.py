@@ -0,0 +1,171 @@
+"""
+Indicator views for GET /indicators/{symbol}.
+
+Answers from stored indicators (read through `shared.indicator_store`). Only when some requested dates have
+no stored rows are indicators computed, and then over the last `days + 250`
+bars instead of the full history. Responses are kept in a small in-process LRU
+cache keyed by (stock_id, latest price date, days, names), so a new price bar for a
+stock naturally misses the cache and evicts that stock's older entries.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from src.models import PriceData
+from src.indicator_registry import lookback_bars
+from src.panel_indicators import build_price_panel, calculate_panel_indicators
+from shared.indicator_store import load_indicator_map
+
+# Extra bars loaded before the requested window when computing on the fly
+WARMUP_BARS = 250
+DEFAULT_CACHE_SIZE = 1024
+
+CacheKey = Tuple[int, date, int, Tuple[str, ...]]
+
+
+class IndicatorViewCache:
+    """Small LRU cache of indicator responses keyed by (stock_id, latest price date, days, names)."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[CacheKey, List[Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: CacheKey, value: List[Dict[str, Any]]) -> None:
+        stock_id, latest_date = key[0], key[1]
+        # Entries for an older latest date are stale once new prices land
+        for stale in [k for k in self._entries if k[0] == stock_id and k[1] != latest_date]:
+            del self._entries[stale]
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, stock_id: Optional[int] = None) -> None:
+        """Drop entries for one stock, or everything when stock_id is None."""
+        if stock_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == stock_id]:
+            del self._entries[key]
+
+
+indicator_cache = IndicatorViewCache()
+
+
+async def latest_price_date(session, stock_id: int) -> Optional[date]:
+    return await session.scalar(select(func.max(PriceData.date)).where(PriceData.stock_id == stock_id))
+
+
+async def _recent_prices(session, stock_id: int, limit: int) -> List[Tuple[date, float, Optional[int]]]:
+    """Last `limit` (date, close, volume) bars, oldest first."""
+    result = await session.execute(
+        select(PriceData.date, PriceData.close, PriceData.volume)
+        .where(PriceData.stock_id == stock_id)
+        .order_by(PriceData.date.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.all()))
+
+
+async def _stored_indicators(
+    session,
+    stock_id: int,
+    start: date,
+    end: date,
+    names: Optional[Sequence[str]] = None,
+) -> Dict[date, Dict[str, float]]:
+    stored = await load_indicator_map(session, [stock_id], start, end, names or None)
+    return {
+        day: {name: float(value) for name, value in values.items()}
+        for day, values in stored.get(stock_id, {}).items()
+        if values
+    }
+
+
+def compute_indicator_rows(
+    bars: Sequence[Tuple[date, float, Optional[int]]],
+    dates: Sequence[date],
+    names: Optional[Sequence[str]] = None,
+) -> Dict[date, Dict[str, float]]:
+    """Compute indicators (default: all stored ones) over `bars` (oldest first) and return the values for `dates`."""
+    panel = build_price_panel({0: [(d, c, v or 0) for d, c, v in bars]})
+    indicators = calculate_panel_indicators(panel.close, panel.volume, names)
+    wanted = set(dates)
+    computed: Dict[date, Dict[str, float]] = {}
+    for row, day in enumerate(panel.dates[:, 0]):
+        if day not in wanted:
+            continue
+        computed[day] = {
+            name: float(values[row, 0])
+            for name, values in indicators.items()
+            if values[row, 0] == values[row, 0]  # skip NaN
+        }
+    return computed
+
+
+def build_response(
+    bars: Sequence[Tuple[date, float, Optional[int]]],
+    values: Dict[date, Dict[str, float]],
+) -> List[Dict[str, Any]]:
+    """Shape (date, close, volume) bars plus per-date indicator values, latest first."""
+    return [
+        {
+            "date": day.isoformat(),
+            "close": float(close),
+            "volume": int(volume) if volume is not None else 0,
+            "indicators": dict(values.get(day, {})),
+        }
+        for day, close, volume in reversed(bars)
+    ]
+
+
+async def get_indicator_view(
+    session,
+    stock_id: int,
+    days: int,
+    names: Optional[Sequence[str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the last `days` bars with their indicators (latest first), or None
+    when the stock has no price data. `names` limits the indicators returned
+    (and computed, when stored rows are missing).
+    """
+    days = max(days, 1)
+    latest = await latest_price_date(session, stock_id)
+    if latest is None:
+        return None
+
+    names = tuple(sorted(set(names))) if names else ()
+    key = (stock_id, latest, days, names)
+    cached = indicator_cache.get(key)
+    if cached is not None:
+        return cached
+
+    bars = await _recent_prices(session, stock_id, days)
+    dates = [d for d, _, _ in bars]
+    values = await _stored_indicators(session, stock_id, dates[0], dates[-1], names)
+
+    # With an explicit subset, a date also counts as missing when any requested
+    # (e.g. strategy-specific) indicator was never stored for it
+    missing = [d for d in dates if d not in values or any(n not in values[d] for n in names)]
+    if missing:
+        warmup = max(WARMUP_BARS, lookback_bars(names)) if names else WARMUP_BARS
+        history = await _recent_prices(session, stock_id, days + warmup)
+        values.update(compute_indicator_rows(history, missing, names or None))
+
+    response = build_response(bars, values)
+    indicator_cache.put(key, response)
+    return response
@@ -1,5 +1,9 @@
+from typing import Optional, Sequence
+
 import pandas as pd
 
+from src.indicator_registry import compute_indicators
+
 def calculate_sma(series: pd.Series, window: int) -> pd.Series:
     """Calculate Simple Moving Average"""
     return series.rolling(window=window).mean()
@@ -52,42 +56,31 @@ def calculate_bollinger_bands(series: pd.Series, window: int = 20, num_std: int
         'bb_lower': lower
     })
 
-def calculate_all_indicators(df: pd.DataFrame) -> dict:
+def calculate_rolling_std(series: pd.Series, window: int) -> pd.Series:
+    """Calculate rolling sample standard deviation"""
+    return series.rolling(window=window).std()
+
+PANDAS_KERNELS = {
+    'sma': calculate_sma,
+    'ema': calculate_ema,
+    'rsi': calculate_rsi,
+    'rolling_std': calculate_rolling_std,
+}
+
+def calculate_all_indicators(df: pd.DataFrame, names: Optional[Sequence[str]] = None) -> dict:
     """
-    Calculate all indicators for a dataframe containing a 'close' column.
+    Calculate indicators for a dataframe containing a 'close' column.
     Returns a dictionary of {indicator_name: series/value}
+
+    `names` limits the result to a subset (e.g. just what a scan condition reads);
+    only those indicators and their dependencies are computed. Defaults to every
+    stored indicator.
     """
     if 'close' not in df.columns:
         raise ValueError("DataFrame must contain 'close' column")
-    
-    close = df['close']
-    results = {}
-    
-    # SMAs
-    for window in [9, 20, 50, 200]:
-        results[f'sma_{window}'] = calculate_sma(close, window)
-        
-    # Volume SMA
-    if 'volume' in df.columns:
-        results['sma_vol_20'] = calculate_sma(df['volume'], 20)
-        
-    # EMAs
-    for span in [9, 12, 20, 26, 50]:
-        results[f'ema_{span}'] = calculate_ema(close, span)
-        
-    # RSI
-    results['rsi_14'] = calculate_rsi(close, 14)
-    
-    # MACD
-    macd_df = calculate_macd(close)
-    results['macd_line'] = macd_df['macd']
-    results['macd_signal'] = macd_df['signal']
-    results['macd_hist'] = macd_df['histogram']
-    
-    # Bollinger Bands
-    bb_df = calculate_bollinger_bands(close)
-    results['bb_upper'] = bb_df['bb_upper']
-    results['bb_middle'] = bb_df['bb_middle']
-    results['bb_lower'] = bb_df['bb_lower']
-    
-    return results
+
+    sources = {
+        'close': df['close'],
+        'volume': df['volume'] if 'volume' in df.columns else None,
+    }
+    return compute_indicators(sources, PANDAS_KERNELS, names)
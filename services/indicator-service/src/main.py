@@ -1,10 +1,11 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks
 from sqlalchemy import select
-from src.database import AsyncSessionLocal
-from src.models import PriceData, Stock
-from src.indicators import calculate_all_indicators
-import pandas as pd
+from src.database import AsyncSessionLocal, init_db
+from src.models import Stock
+from src.indicator_registry import is_known_indicator
+from src.indicator_view import get_indicator_view, indicator_cache
 from datetime import datetime, date
+from typing import List, Optional
 
 import logging
 
@@ -18,86 +19,66 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def startup_event():
+    # Create indicator-service owned tables (indicator_state, strategy_indicator_snapshot)
+    await init_db()
+
 @app.get("/")
 async def root():
     return {"message": "Indicator Service is running"}
 
 @app.get("/indicators/{symbol}")
-async def get_indicators(symbol: str, days: int = 1):
-    logger.info(f"Received request for {symbol} (days={days})")
+async def get_indicators(symbol: str, days: int = 1, names: Optional[str] = None):
+    """
+    Latest `days` bars with indicators. `names` is an optional comma-separated
+    subset (e.g. "ema_9,sma_20"); only those indicators are read or computed.
+    """
+    logger.info(f"Received request for {symbol} (days={days}, names={names})")
     async with AsyncSessionLocal() as session:
         # Get stock_id
-        stock_res = await session.execute(select(Stock).where(Stock.symbol == symbol))
-        stock = stock_res.scalars().first()
-        
-        if not stock:
+        stock_res = await session.execute(select(Stock.id).where(Stock.symbol == symbol))
+        stock_id = stock_res.scalar()
+
+        if stock_id is None:
             raise HTTPException(status_code=404, detail="Stock not found")
 
-        # Get price data
-        query = select(PriceData).where(PriceData.stock_id == stock.id).order_by(PriceData.date.asc())
-        result = await session.execute(query)
-        prices = result.scalars().all()
-        
-        if not prices:
+        # Stored indicators (computed over a bounded window when missing), latest first
+        requested = [n.strip() for n in names.split(",") if n.strip()] if names else None
+        unknown = [n for n in requested or [] if not is_known_indicator(n)]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown indicators: {', '.join(unknown)}")
+
+        results = await get_indicator_view(session, stock_id, days, requested)
+        if results is None:
             raise HTTPException(status_code=404, detail="No price data found for symbol")
-            
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': p.date,
-            'close': p.close,
-            'high': p.high,
-            'low': p.low,
-            'open': p.open,
-            'volume': p.volume
-        } for p in prices])
-        
-        # Calculate Indicators using shared logic
-        indicators_map = calculate_all_indicators(df)
-        
-        # Prepare response list (latest first)
-        results = []
-        
-        # Take the last N rows
-        target_rows = df.iloc[-days:]
-        # Reverse to have latest first
-        target_rows = target_rows.iloc[::-1]
-
-        for idx, row in target_rows.iterrows():
-            rec = {
-                'date': row['date'].isoformat(),
-                'close': float(row['close']),
-                'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-                'indicators': {}
-            }
-            
-            for name, series in indicators_map.items():
-                if idx in series.index:
-                    val = series.loc[idx]
-                    if pd.notna(val):
-                        rec['indicators'][name] = float(val)
-            
-            results.append(rec)
-        
+
         return results
 
 from src.daily_calculate import calculate_daily_indicators
 
+from src.backfill import backfill_indicators
+
 from pydantic import BaseModel
-from typing import Optional
 
 class DatePayload(BaseModel):
     target_date: Optional[date] = None
+    mode: str = "incremental"  # incremental | full
 
 @app.post("/api/daily-calculate")
 async def daily_calculate(payload: DatePayload = None):
     """
     Calculate indicators for TODAY for all active stocks.
     Incremental mode - only calculates latest date, not historical.
+    By default each stock's persisted indicator state is advanced by the new bar;
+    pass mode="full" to force a recompute from the price window.
     """
     logger.info("Starting Indicator Service...")
     try:
         target = payload.target_date if payload else None
-        summary = await calculate_daily_indicators(target_date=target)
+        mode = payload.mode if payload else "incremental"
+        summary = await calculate_daily_indicators(target_date=target, mode=mode)
+        indicator_cache.invalidate()
         return summary
     except Exception as e:
         logger.error(f"Daily indicator calculation failed: {e}", exc_info=True)
@@ -106,3 +87,42 @@ async def daily_calculate(payload: DatePayload = None):
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }
+
+
+class BackfillPayload(BaseModel):
+    start_date: Optional[date] = None  # defaults to earliest stored price
+    end_date: Optional[date] = None    # defaults to today
+    symbols: Optional[List[str]] = None  # defaults to all active stocks
+    max_workers: Optional[int] = None  # defaults to host CPU count
+    indicators: Optional[List[str]] = None  # non-standard names; defaults to the enabled strategies'
+
+@app.post("/api/backfill-indicators")
+async def backfill(background_tasks: BackgroundTasks, payload: BackfillPayload = None):
+    """
+    Backfill indicators for every date in a range (full history by default).
+    Runs in the background; progress and the final summary are logged.
+    `indicators` adds non-standard names (e.g. `ema_7`) read only by a disabled
+    or draft strategy, so it can be backtested before it is enabled.
+    """
+    payload = payload or BackfillPayload()
+    if payload.start_date and payload.end_date and payload.start_date > payload.end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    unknown = [n for n in payload.indicators or [] if not is_known_indicator(n)]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown indicators: {', '.join(unknown)}")
+
+    background_tasks.add_task(
+        backfill_indicators,
+        start_date=payload.start_date,
+        end_date=payload.end_date,
+        symbols=payload.symbols,
+        max_workers=payload.max_workers,
+        extra_indicators=payload.indicators,
+    )
+    return {
+        "message": "Indicator backfill triggered in background",
+        "start_date": payload.start_date.isoformat() if payload.start_date else None,
+        "end_date": payload.end_date.isoformat() if payload.end_date else None,
+        "symbols": payload.symbols or "all active",
+        "indicators": payload.indicators or "enabled strategies",
+    }
@@ -1,2 +1,37 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from shared.database import Base
+
 # Re-export shared models for use by scripts and other modules
-from shared.models import Stock, PriceData, Indicator
+from shared.models import Stock, PriceData, PriceRevision, Indicator
+
+
+class IndicatorState(Base):
+    """
+    Per-stock recursive indicator state (EMA values, Wilder averages, rolling sums)
+    used to advance the daily indicators one bar at a time.
+    """
+    __tablename__ = "indicator_state"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    as_of_date = Column(Date, nullable=False)
+    version = Column(Integer, nullable=False)
+    state = Column(JSONB, nullable=False)
+    # When the prices behind the state were read. A price_revisions row dated on or
+    # before as_of_date and recorded later (a back-filled hole or an overwritten bar)
+    # means the state is stale.
+    prices_read_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class StrategyIndicatorSnapshot(Base):
+    """
+    Last indicator list fetched from the scanner (single row), used when the
+    scanner is unreachable so strategy indicators keep being computed.
+    """
+    __tablename__ = "strategy_indicator_snapshot"
+
+    id = Column(Integer, primary_key=True)
+    names = Column(JSONB, nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
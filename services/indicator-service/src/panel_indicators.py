@@ -0,0 +1,265 @@
+"""
+Cross-sectional indicator engine.
+
+Computes the same indicators as `calculate_all_indicators` for a whole universe
+at once. Prices are held in a (bar x symbol) NumPy matrix and every indicator is
+evaluated with array operations across all symbols, so the per-symbol Python
+overhead of building DataFrames disappears.
+
+Each column is bottom-aligned: row -1 is that symbol's latest bar, row -2 the bar
+before it, and so on. Shorter histories are padded with leading NaNs. This keeps
+the results identical to running the per-stock pandas functions on each symbol's
+own history (missing sessions are not treated as gaps).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from src.indicator_registry import EMA_SPANS, SMA_WINDOWS, compute_indicators
+
+
+@dataclass
+class PricePanel:
+    """Bottom-aligned price matrix for a set of stocks."""
+    stock_ids: List[int]
+    dates: np.ndarray   # (bars, symbols) object array of datetime.date / None
+    close: np.ndarray   # (bars, symbols) float64, NaN padded
+    volume: np.ndarray  # (bars, symbols) float64, NaN padded
+    day: np.ndarray     # (bars, symbols) float64 days since 1970-01-01, NaN padded
+
+    @property
+    def last_dates(self) -> List[date]:
+        return list(self.dates[-1]) if len(self.dates) else []
+
+
+def day_numbers(dates: Sequence[date]) -> np.ndarray:
+    """Convert dates to float days since 1970-01-01 (vectorized date comparisons)."""
+    if len(dates) == 0:
+        return np.empty(0)
+    return np.asarray(list(dates), dtype="datetime64[D]").astype(np.int64).astype(float)
+
+
+def build_price_panel(
+    history: Dict[int, Sequence[Tuple[date, float, float]]],
+) -> PricePanel:
+    """
+    Build a bottom-aligned panel from {stock_id: [(date, close, volume), ...]}.
+
+    Each history must be sorted by date ascending.
+    """
+    stock_ids = list(history.keys())
+    n_bars = max((len(rows) for rows in history.values()), default=0)
+    n_symbols = len(stock_ids)
+
+    dates = np.full((n_bars, n_symbols), None, dtype=object)
+    close = np.full((n_bars, n_symbols), np.nan)
+    volume = np.full((n_bars, n_symbols), np.nan)
+    day = np.full((n_bars, n_symbols), np.nan)
+
+    for col, stock_id in enumerate(stock_ids):
+        rows = history[stock_id]
+        if not rows:
+            continue
+        offset = n_bars - len(rows)
+        row_dates, row_close, row_volume = zip(*rows)
+        dates[offset:, col] = row_dates
+        close[offset:, col] = np.asarray(row_close, dtype=float)
+        volume[offset:, col] = np.asarray(row_volume, dtype=float)
+        day[offset:, col] = day_numbers(row_dates)
+
+    return PricePanel(stock_ids=stock_ids, dates=dates, close=close, volume=volume, day=day)
+
+
+def panel_from_columns(
+    stock_id: np.ndarray,
+    dates: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    stock_ids: Sequence[int] | None = None,
+) -> PricePanel:
+    """
+    Build a bottom-aligned panel from flat column arrays sorted by (stock_id, date).
+
+    Vectorized equivalent of `build_price_panel`; `stock_ids` selects and orders
+    the columns (defaults to every stock present).
+    """
+    if stock_ids is None:
+        stock_ids = list(dict.fromkeys(stock_id.tolist()))
+    else:
+        stock_ids = list(stock_ids)
+        keep = np.isin(stock_id, stock_ids)
+        stock_id, dates, close, volume = stock_id[keep], dates[keep], close[keep], volume[keep]
+
+    col_of = {sid: col for col, sid in enumerate(stock_ids)}
+    cols = np.fromiter((col_of[sid] for sid in stock_id.tolist()), dtype=np.int64, count=len(stock_id))
+    counts = np.bincount(cols, minlength=len(stock_ids))
+    n_bars = int(counts.max()) if len(counts) else 0
+
+    # Position of each row within its stock's run, then shift so the last bar lands on row -1
+    starts = np.zeros(len(stock_ids), dtype=np.int64)
+    starts[1:] = np.cumsum(counts)[:-1]
+    order = np.argsort(cols, kind="stable")
+    rank = np.empty(len(cols), dtype=np.int64)
+    rank[order] = np.arange(len(cols)) - starts[cols[order]]
+    rows = n_bars - counts[cols] + rank
+
+    panel_dates = np.full((n_bars, len(stock_ids)), None, dtype=object)
+    panel_close = np.full((n_bars, len(stock_ids)), np.nan)
+    panel_volume = np.full((n_bars, len(stock_ids)), np.nan)
+    panel_day = np.full((n_bars, len(stock_ids)), np.nan)
+    panel_dates[rows, cols] = dates
+    panel_close[rows, cols] = close
+    panel_volume[rows, cols] = volume
+    panel_day[rows, cols] = day_numbers(dates)
+
+    return PricePanel(
+        stock_ids=stock_ids,
+        dates=panel_dates,
+        close=panel_close,
+        volume=panel_volume,
+        day=panel_day,
+    )
+
+
+def panel_sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean over `window` bars; NaN until a full window is available."""
+    total, count = _rolling_sum(values, window)
+    out = np.full(values.shape, np.nan)
+    full = count == window
+    out[full] = total[full] / window
+    return out
+
+
+def panel_rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample standard deviation (ddof=1), matching pandas' rolling().std()."""
+    # Shift each column by a reference value to keep the sum-of-squares well conditioned.
+    with np.errstate(invalid="ignore"):
+        ref = np.nanmean(values, axis=0) if len(values) else np.zeros(values.shape[1])
+    ref = np.where(np.isnan(ref), 0.0, ref)
+    shifted = values - ref
+
+    total, count = _rolling_sum(shifted, window)
+    total_sq, _ = _rolling_sum(shifted * shifted, window)
+
+    out = np.full(values.shape, np.nan)
+    full = count == window
+    var = (total_sq[full] - total[full] * total[full] / window) / (window - 1)
+    out[full] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def panel_ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponentially weighted mean with adjust=False, seeded by each column's first
+    valid value. Recurses over bars; every step is vectorized across symbols.
+    """
+    out = np.full(values.shape, np.nan)
+    if values.size == 0:
+        return out
+
+    state = np.full(values.shape[1], np.nan)
+    for i in range(values.shape[0]):
+        row = values[i]
+        observed = ~np.isnan(row)
+        seeded = ~np.isnan(state)
+        state = np.where(observed & seeded, (1 - alpha) * state + alpha * row, state)
+        state = np.where(observed & ~seeded, row, state)
+        out[i] = state
+    return out
+
+
+def panel_ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average (pandas ewm(span=span, adjust=False))."""
+    return panel_ewm(values, 2.0 / (span + 1))
+
+
+def panel_rsi_components(values: np.ndarray, window: int = 14) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder-smoothed average gain and average loss used by RSI."""
+    gain, loss = _gain_loss(values)
+    return panel_ewm(gain, 1.0 / window), panel_ewm(loss, 1.0 / window)
+
+
+def panel_rsi(values: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing, matching `calculate_rsi`."""
+    avg_gain, avg_loss = panel_rsi_components(values, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+PANEL_KERNELS = {
+    "sma": panel_sma,
+    "ema": panel_ema,
+    "rsi": panel_rsi,
+    "rolling_std": panel_rolling_std,
+}
+
+
+def calculate_panel_indicators(
+    close: np.ndarray,
+    volume: np.ndarray | None = None,
+    names: Sequence[str] | None = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate indicators for all symbols in the panel.
+    Returns {indicator_name: (bars, symbols) array}, using the same names as
+    `calculate_all_indicators`. `names` limits the computation to a subset and
+    its dependencies (default: every stored indicator).
+    """
+    return compute_indicators({"close": close, "volume": volume}, PANEL_KERNELS, names)
+
+
+def latest_values(indicators: Dict[str, np.ndarray], col: int) -> Iterable[Tuple[str, float]]:
+    """Yield (indicator_name, value) for the latest bar of one symbol, skipping NaNs."""
+    for name, matrix in indicators.items():
+        if not len(matrix):
+            continue
+        val = matrix[-1, col]
+        if not np.isnan(val):
+            yield name, float(val)
+
+
+def recent_indicator_rows(
+    panel: PricePanel,
+    indicators: Dict[str, np.ndarray],
+    bars: int = 1,
+) -> Iterator[Tuple[int, date, str, float]]:
+    """Yield (stock_id, date, indicator_name, value) for the last `bars` rows, skipping NaNs."""
+    dates = panel.dates[-bars:]
+    for name, matrix in indicators.items():
+        tail = matrix[-bars:]
+        rows, cols = np.nonzero(~np.isnan(tail))
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            yield panel.stock_ids[col], dates[row, col], name, float(tail[row, col])
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling sum and count of non-NaN values over `window` bars via cumulative sums."""
+    observed = ~np.isnan(values)
+    filled = np.where(observed, values, 0.0)
+
+    csum = np.cumsum(filled, axis=0)
+    ccount = np.cumsum(observed, axis=0)
+
+    total = csum.copy()
+    count = ccount.copy()
+    total[window:] -= csum[:-window]
+    count[window:] -= ccount[:-window]
+    return total, count
+
+
+def _gain_loss(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split bar-to-bar changes into gains and losses (0 on the first observed bar)."""
+    delta = np.full(values.shape, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+
+    observed = ~np.isnan(values)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[~observed] = np.nan
+    loss[~observed] = np.nan
+    return gain, loss
@@ -0,0 +1,82 @@
+"""
+Bulk price loaders for the indicator jobs.
+
+Pulls price windows for many stocks with a few column-only queries (no ORM
+hydration) and returns them as flat NumPy columns ready for
+`panel_from_columns`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from src.models import PriceData
+
+# Stocks per price query; keeps IN-lists and result sets bounded on large universes.
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class PriceColumns:
+    """Flat price columns sorted by (stock_id, date)."""
+    stock_id: np.ndarray  # int64
+    date: np.ndarray      # object array of datetime.date
+    close: np.ndarray     # float64
+    volume: np.ndarray    # float64 (NULL volume -> 0)
+
+    def counts(self) -> Dict[int, int]:
+        """Number of bars loaded per stock."""
+        ids, counts = np.unique(self.stock_id, return_counts=True)
+        return dict(zip(ids.tolist(), counts.tolist()))
+
+
+def _to_columns(rows: Sequence[Tuple[int, date, float, int]]) -> PriceColumns:
+    if not rows:
+        return PriceColumns(
+            stock_id=np.empty(0, dtype=np.int64),
+            date=np.empty(0, dtype=object),
+            close=np.empty(0, dtype=float),
+            volume=np.empty(0, dtype=float),
+        )
+    stock_ids, dates, closes, volumes = zip(*rows)
+    date_col = np.empty(len(dates), dtype=object)
+    date_col[:] = dates
+    return PriceColumns(
+        stock_id=np.asarray(stock_ids, dtype=np.int64),
+        date=date_col,
+        close=np.asarray(closes, dtype=float),
+        volume=np.asarray([v or 0 for v in volumes], dtype=float),
+    )
+
+
+def _chunks(items: Sequence[int], size: int) -> Iterable[Sequence[int]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def load_price_columns(
+    session,
+    stock_ids: Sequence[int],
+    start_date: date,
+    end_date: date,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> PriceColumns:
+    """
+    Load (stock_id, date, close, volume) for all stocks in [start_date, end_date]
+    using one column-only query per chunk of `chunk_size` stocks.
+    """
+    rows = []
+    for chunk in _chunks(list(stock_ids), chunk_size):
+        result = await session.execute(
+            select(PriceData.stock_id, PriceData.date, PriceData.close, PriceData.volume)
+            .where(PriceData.stock_id.in_(chunk))
+            .where(PriceData.date >= start_date)
+            .where(PriceData.date <= end_date)
+            .order_by(PriceData.stock_id, PriceData.date.asc())
+        )
+        rows.extend(result.all())
+    return _to_columns(rows)
@@ -0,0 +1,93 @@
+"""
+Indicators referenced by loaded strategies.
+
+Strategies can reference any period (e.g. `ma_cross` with fast_period=7 reads
+`ema_7`). The scanner publishes the names its enabled strategies read; the
+daily job and backfill compute the ones outside the standard set in the same
+panel pass, so a new strategy needs neither a code change nor a full backfill.
+
+Each successful fetch is saved in `strategy_indicator_snapshot`. When the scanner
+is unreachable the last saved list is used instead ("stale"); with no saved list
+only the standard set is computed ("unavailable"). Callers report the status in
+their job summary so the scheduler can alert on it.
+"""
+from datetime import datetime
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config import settings
+from src.database import AsyncSessionLocal
+from src.indicator_registry import STANDARD_INDICATORS, is_known_indicator
+from src.models import StrategyIndicatorSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def extra_indicator_names(names: Iterable[str]) -> List[str]:
+    """Resolvable names outside the standard set, sorted and de-duplicated."""
+    extras = []
+    for name in sorted(set(names)):
+        if name in STANDARD_INDICATORS:
+            continue
+        if not is_known_indicator(name):
+            logger.warning(f"Ignoring unsupported strategy indicator '{name}'")
+            continue
+        extras.append(name)
+    return extras
+
+
+async def load_snapshot() -> Optional[StrategyIndicatorSnapshot]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(StrategyIndicatorSnapshot).where(StrategyIndicatorSnapshot.id == 1))
+        return result.scalar_one_or_none()
+
+
+async def save_snapshot(names: List[str]) -> None:
+    async with AsyncSessionLocal() as session:
+        stmt = insert(StrategyIndicatorSnapshot).values(id=1, names=names, fetched_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"names": stmt.excluded.names, "fetched_at": stmt.excluded.fetched_at},
+        )
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def fetch_strategy_indicators(timeout: float = 10.0) -> Tuple[List[str], str]:
+    """
+    Non-standard indicator names referenced by the scanner's enabled strategies,
+    and where they came from: "fresh" (the scanner), "stale" (the last saved list,
+    scanner unreachable) or "unavailable" (no list: standard indicators only).
+    """
+    url = f"{settings.SCANNER_SERVICE_URL}/strategies/indicators"
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            names = response.json().get("indicators", [])
+    except Exception as e:
+        logger.warning(f"Could not load strategy indicators from {url}: {e}")
+        try:
+            snapshot = await load_snapshot()
+        except Exception as db_error:
+            logger.error(f"Could not load saved strategy indicators: {db_error}")
+            snapshot = None
+        if snapshot is None:
+            logger.error("No saved strategy indicators; computing standard indicators only")
+            return [], "unavailable"
+        extras = extra_indicator_names(snapshot.names)
+        logger.warning(f"Using {len(extras)} strategy indicators saved at {snapshot.fetched_at}")
+        return extras, "stale"
+
+    extras = extra_indicator_names(names)
+    if extras:
+        logger.info(f"Strategies reference {len(extras)} non-standard indicators: {', '.join(extras)}")
+    try:
+        await save_snapshot(extras)
+    except Exception as e:
+        logger.warning(f"Could not save strategy indicators: {e}")
+    return extras, "fresh"
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.backfill import compute_chunk_rows, iter_chunk_rows
+from src.indicators import calculate_all_indicators
+
+
+def _columns(lengths, seed=11):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for stock_id, length in enumerate(lengths, 1):
+        closes = 100 + np.cumsum(rng.normal(0, 1, length))
+        volumes = rng.integers(100_000, 1_000_000, length)
+        for i in range(length):
+            rows.append((stock_id, date(2024, 1, 1) + timedelta(days=i), closes[i], volumes[i]))
+    stock_id, dates, close, volume = (np.array(col) for col in zip(*rows))
+    return rows, stock_id, dates.astype(object), close.astype(float), volume.astype(float)
+
+
+def test_compute_chunk_rows_matches_per_stock_history_in_range():
+    rows, stock_id, dates, close, volume = _columns([240, 30])
+    start, end = date(2024, 1, 20), date(2024, 8, 1)
+
+    actual = {(sid, d, name): value for sid, d, name, value in
+              iter_chunk_rows(compute_chunk_rows(stock_id, dates, close, volume, start, end))}
+
+    expected = {}
+    for sid in (1, 2):
+        df = pd.DataFrame([r[1:] for r in rows if r[0] == sid], columns=["date", "close", "volume"])
+        for name, series in calculate_all_indicators(df).items():
+            for d, value in zip(df["date"], series):
+                if start <= d <= end and pd.notna(value):
+                    expected[(sid, d, name)] = value
+
+    assert set(actual) == set(expected)
+    for key, value in expected.items():
+        assert abs(actual[key] - value) <= 1e-9 * max(1.0, abs(value)), key
+
+
+def test_compute_chunk_rows_empty_range():
+    _, stock_id, dates, close, volume = _columns([20])
+    chunk = compute_chunk_rows(stock_id, dates, close, volume, date(2030, 1, 1), date(2030, 2, 1))
+    assert list(iter_chunk_rows(chunk)) == []
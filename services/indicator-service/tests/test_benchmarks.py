@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_indicators import ENGINES, compare, estimated_gb, run_case, synthetic_columns
+from src.indicator_registry import STANDARD_INDICATORS
+
+
+def test_synthetic_columns_are_sorted_by_stock_then_date():
+    cols = synthetic_columns(3, 10)
+    assert len(cols["stock_id"]) == 30
+    assert list(cols["stock_id"][:10]) == [1] * 10
+    assert list(cols["date"][:10]) == sorted(cols["date"][:10])
+    assert np.all(cols["close"] > 0)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_run_case_reports_throughput_and_rss(engine):
+    result = run_case(engine, 5, 1, repeat=1, pandas_sample=2)
+    assert result["engine"] == engine
+    assert result["bars_per_symbol"] == 252
+    assert result["symbol_bars_per_sec"] > 0
+    assert result["peak_rss_mb"] > 0
+    if engine in ("pandas", "panel"):
+        assert list(result["per_indicator_ms"]) == list(STANDARD_INDICATORS)
+    if engine == "pandas":
+        assert result["measured_symbols"] == 2
+
+
+def test_daily_cases_do_not_grow_with_history():
+    assert estimated_gb("daily_full", 1000, 252 * 20) == estimated_gb("daily_full", 1000, 252 * 5)
+    assert estimated_gb("panel", 1000, 252 * 20) > estimated_gb("panel", 1000, 252 * 5)
+
+
+def test_compare_ratios_against_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": [
+        {"engine": "panel", "symbols": 100, "years": 1, "seconds": 1.0, "symbol_bars_per_sec": 1000.0, "peak_rss_mb": 100.0},
+    ]}))
+    rows = compare(
+        [{"engine": "panel", "symbols": 100, "years": 1, "seconds": 0.5, "symbol_bars_per_sec": 2000.0, "peak_rss_mb": 50.0},
+         {"engine": "panel", "symbols": 100, "years": 5, "skipped": "too large"}],
+        baseline,
+    )
+    assert rows == [{"engine": "panel", "symbols": 100, "years": 1, "throughput_ratio": 2.0, "peak_rss_ratio": 0.5}]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicator_registry import (
+    STANDARD_INDICATORS,
+    compute_indicators,
+    is_known_indicator,
+    lookback_bars,
+    required_sources,
+    resolve_plan,
+)
+from src.indicators import PANDAS_KERNELS, calculate_all_indicators
+
+
+def _counting_kernels(calls):
+    def wrap(kind, fn):
+        def kernel(*args, **params):
+            calls.append((kind, tuple(sorted(params.items()))))
+            return fn(*args, **params)
+        return kernel
+    return {kind: wrap(kind, fn) for kind, fn in PANDAS_KERNELS.items()}
+
+
+def _frame(length=250, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "close": 100 + np.cumsum(rng.normal(0, 1, length)),
+        "volume": rng.integers(100_000, 1_000_000, length).astype(float),
+    })
+
+
+def test_resolve_plan_orders_dependencies_first():
+    plan = [spec.name for spec in resolve_plan(["macd_hist"])]
+    assert plan == ["ema_12", "ema_26", "macd_line", "macd_signal", "macd_hist"]
+
+
+def test_shared_intermediates_computed_once():
+    calls = []
+    df = _frame()
+    compute_indicators({"close": df["close"], "volume": df["volume"]}, _counting_kernels(calls))
+
+    assert calls.count(("ema", (("span", 12),))) == 1
+    assert calls.count(("ema", (("span", 26),))) == 1
+    assert calls.count(("sma", (("window", 20),))) == 2  # sma_20 on close, sma_vol_20 on volume
+
+
+def test_subset_skips_unrequested_indicators():
+    calls = []
+    df = _frame()
+    results = compute_indicators({"close": df["close"]}, _counting_kernels(calls), ["ema_9", "sma_20"])
+
+    assert list(results) == ["ema_9", "sma_20"]
+    assert sorted(calls) == [("ema", (("span", 9),)), ("sma", (("window", 20),))]
+
+
+def test_subset_matches_full_calculation():
+    df = _frame()
+    full = calculate_all_indicators(df)
+    subset = calculate_all_indicators(df, names=["bb_upper", "rsi_14"])
+
+    assert set(subset) == {"bb_upper", "rsi_14"}
+    for name, series in subset.items():
+        pd.testing.assert_series_equal(series, full[name], check_names=False)
+
+
+def test_missing_source_and_unknown_names():
+    df = _frame()
+    assert "sma_vol_20" not in calculate_all_indicators(df[["close"]])
+    assert required_sources(["sma_vol_20", "macd_line"]) == {"volume", "close"}
+    assert "bb_std_20" not in STANDARD_INDICATORS
+
+    with pytest.raises(ValueError):
+        calculate_all_indicators(df, names=["sma_7x"])
+
+
+def test_parametric_names_resolve_on_demand():
+    df = _frame()
+    results = calculate_all_indicators(df, names=["ema_7", "sma_30", "rsi_21", "sma_vol_10"])
+
+    pd.testing.assert_series_equal(results["ema_7"], df["close"].ewm(span=7, adjust=False).mean(), check_names=False)
+    pd.testing.assert_series_equal(results["sma_30"], df["close"].rolling(30).mean(), check_names=False)
+    pd.testing.assert_series_equal(results["sma_vol_10"], df["volume"].rolling(10).mean(), check_names=False)
+    assert results["rsi_21"].dropna().between(0, 100).all()
+
+
+def test_parametric_validation_and_lookback():
+    assert is_known_indicator("ema_7")
+    assert not is_known_indicator("ema_0")
+    assert not is_known_indicator("wma_10")
+    assert lookback_bars(["sma_vol_30", "macd_hist"]) == 30
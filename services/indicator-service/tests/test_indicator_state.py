@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.indicator_state import (
+    STATE_VERSION,
+    advance_state,
+    advance_through,
+    clear_price_revisions,
+    extra_values,
+    load_stale_state_ids,
+    save_states,
+    state_values,
+    states_from_panel,
+    usable_state,
+)
+from src.panel_indicators import build_price_panel, calculate_panel_indicators, latest_values
+
+
+def _bars(length, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, length))
+    volumes = rng.integers(100_000, 1_000_000, length)
+    dates = [date(2025, 1, 1) + timedelta(days=i) for i in range(length)]
+    return list(zip(dates, closes, volumes))
+
+
+def _full_values(bars):
+    panel = build_price_panel({1: bars})
+    indicators = calculate_panel_indicators(panel.close, panel.volume)
+    return dict(latest_values(indicators, 0)), states_from_panel(panel, indicators)[1]
+
+
+@pytest.mark.parametrize("history_len", [60, 195, 230])
+def test_incremental_advance_matches_full_recompute(history_len):
+    bars = _bars(history_len + 5)
+    _, state = _full_values(bars[:history_len])
+
+    state = advance_through(state, bars[history_len:])
+    expected, _ = _full_values(bars)
+    actual = state_values(state)
+
+    assert state["as_of"] == bars[-1][0].isoformat()
+    assert set(actual) == set(expected)
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_state_values_from_snapshot_match_panel():
+    bars = _bars(80)
+    expected, state = _full_values(bars)
+    actual = state_values(state)
+
+    assert set(actual) == set(expected)
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-9), name
+
+
+EXTRAS = ["ema_7", "rsi_21", "sma_15", "sma_210", "sma_vol_30"]
+
+
+def _full_extras(bars):
+    panel = build_price_panel({1: bars})
+    indicators = calculate_panel_indicators(panel.close, panel.volume)
+    extra_map = calculate_panel_indicators(panel.close, panel.volume, names=EXTRAS)
+    state = states_from_panel(panel, {**indicators, **extra_map}, EXTRAS)[1]
+    return dict(latest_values(extra_map, 0)), state
+
+
+@pytest.mark.parametrize("history_len", [60, 205, 230])
+def test_incremental_advance_carries_strategy_indicators(history_len):
+    bars = _bars(history_len + 5)
+    _, state = _full_extras(bars[:history_len])
+
+    for bar_date, close, volume in bars[history_len:]:
+        state = advance_state(state, bar_date, close, volume)
+    expected, _ = _full_extras(bars)
+    actual = extra_values(state, EXTRAS)
+
+    assert set(state["extra"]) == set(EXTRAS)
+    assert set(actual) == set(expected)
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-9), name
+    # Standard values are unaffected by the longer buffers
+    expected_standard, _ = _full_values(bars)
+    assert state_values(state) == pytest.approx(expected_standard, rel=1e-9)
+
+
+def test_usable_state_rejects_missing_stale_or_future_state():
+    today = date(2025, 6, 2)
+    state = {"version": STATE_VERSION, "as_of": "2025-05-30"}
+
+    assert usable_state(state, today)
+    assert not usable_state(None, today)
+    assert not usable_state({**state, "version": STATE_VERSION + 1}, today)
+    assert not usable_state({**state, "as_of": "2025-06-03"}, today)
+    assert not usable_state(state, today, ["ema_7"])  # strategy indicator not carried yet
+    assert usable_state({**state, "extra": {"ema_7": 1.0}}, today, ["ema_7"])
+
+
+class _RecordingSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        rows = self.rows
+
+        class _Result:
+            def all(self):
+                return rows
+
+        return _Result()
+
+
+@pytest.mark.asyncio
+async def test_load_stale_state_ids_joins_price_revisions_against_watermark():
+    session = _RecordingSession(rows=[(7,), (9,)])
+
+    assert await load_stale_state_ids(session) == {7, 9}
+
+    sql = str(session.statements[0].compile(compile_kwargs={"literal_binds": True}))
+    assert "price_data" not in sql.replace("price_revisions", "")  # never scans price history
+    assert "price_revisions.earliest_date <= indicator_state.as_of_date" in sql
+    assert "price_revisions.recorded_at > coalesce(indicator_state.prices_read_at, indicator_state.updated_at)" in sql
+
+
+@pytest.mark.asyncio
+async def test_clear_price_revisions_keeps_revisions_recorded_after_the_read():
+    session = _RecordingSession()
+    read_at = datetime(2025, 6, 2, 21, 0)
+
+    await clear_price_revisions(session, [1, 2], read_at)
+    await clear_price_revisions(session, [], read_at)
+
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile())
+    assert sql.startswith("DELETE FROM price_revisions")
+    assert "price_revisions.recorded_at <= " in sql
+
+
+@pytest.mark.asyncio
+async def test_save_states_records_when_prices_were_read():
+    session = _RecordingSession()
+    read_at = datetime(2025, 6, 2, 21, 0)
+    state = {"version": STATE_VERSION, "as_of": "2025-05-30"}
+
+    await save_states(session, {1: state}, prices_read_at=read_at)
+
+    params = session.statements[0].compile().params
+    assert read_at in params.values()
+    sql = str(session.statements[0].compile())
+    assert "prices_read_at = excluded.prices_read_at" in sql
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicator_view import IndicatorViewCache, build_response, compute_indicator_rows
+from src.indicators import calculate_all_indicators
+
+
+def _bars(length, seed=5):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, length))
+    volumes = rng.integers(100_000, 1_000_000, length)
+    dates = [date(2025, 1, 1) + timedelta(days=i) for i in range(length)]
+    return [(d, float(c), int(v)) for d, c, v in zip(dates, closes, volumes)]
+
+
+def test_cache_is_lru_and_drops_stale_latest_dates():
+    cache = IndicatorViewCache(maxsize=2)
+    cache.put((1, date(2025, 1, 2), 1, ()), ["a"])
+    cache.put((2, date(2025, 1, 2), 1, ()), ["b"])
+    assert cache.get((1, date(2025, 1, 2), 1, ())) == ["a"]
+
+    cache.put((3, date(2025, 1, 2), 1, ()), ["c"])
+    assert cache.get((2, date(2025, 1, 2), 1, ())) is None  # least recently used
+
+    cache.put((1, date(2025, 1, 3), 1, ()), ["a2"])
+    assert cache.get((1, date(2025, 1, 2), 1, ())) is None
+    assert cache.get((1, date(2025, 1, 3), 1, ())) == ["a2"]
+
+    cache.invalidate(1)
+    assert cache.get((1, date(2025, 1, 3), 1, ())) is None
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_computed_rows_match_full_history_for_recent_dates():
+    bars = _bars(400)
+    window = bars[-(5 + 250):]
+    recent = [d for d, _, _ in bars[-5:]]
+
+    computed = compute_indicator_rows(window, recent)
+
+    df = pd.DataFrame(bars, columns=["date", "close", "volume"])
+    expected = calculate_all_indicators(df)
+    for offset, day in enumerate(recent, start=len(bars) - 5):
+        assert set(computed[day]) == set(expected)
+        for name, series in expected.items():
+            # EMAs are seeded at the window start, so allow a small warm-up error
+            assert computed[day][name] == pytest.approx(series.iloc[offset], rel=1e-4), name
+
+
+def test_build_response_latest_first():
+    bars = [(date(2025, 1, 1), 10.0, None), (date(2025, 1, 2), 11.0, 500)]
+    response = build_response(bars, {date(2025, 1, 2): {"sma_9": 10.5}})
+
+    assert response == [
+        {"date": "2025-01-02", "close": 11.0, "volume": 500, "indicators": {"sma_9": 10.5}},
+        {"date": "2025-01-01", "close": 10.0, "volume": 0, "indicators": {}},
+    ]
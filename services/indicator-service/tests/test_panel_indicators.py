@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import calculate_all_indicators
+from src.panel_indicators import (
+    build_price_panel,
+    calculate_panel_indicators,
+    latest_values,
+    panel_from_columns,
+    panel_rolling_std,
+)
+
+
+def _history(lengths, seed=7):
+    rng = np.random.default_rng(seed)
+    history = {}
+    for stock_id, length in enumerate(lengths, 1):
+        closes = 100 + np.cumsum(rng.normal(0, 1, length))
+        volumes = rng.integers(100_000, 1_000_000, length)
+        dates = [date(2025, 1, 1) + timedelta(days=i) for i in range(length)]
+        history[stock_id] = list(zip(dates, closes, volumes))
+    return history
+
+
+def test_build_price_panel_bottom_aligns_histories():
+    history = _history([5, 3])
+    panel = build_price_panel(history)
+
+    assert panel.close.shape == (5, 2)
+    assert np.isnan(panel.close[:2, 1]).all()
+    assert panel.close[-1, 1] == history[2][-1][1]
+    assert panel.last_dates == [history[1][-1][0], history[2][-1][0]]
+
+
+def test_panel_from_columns_matches_build_price_panel():
+    history = _history([4, 6, 2])
+    rows = [(sid, d, c, v) for sid, bars in history.items() for d, c, v in bars]
+    stock_id, dates, close, volume = (np.array(col) for col in zip(*rows))
+
+    expected = build_price_panel({sid: history[sid] for sid in (3, 1)})
+    panel = panel_from_columns(stock_id, dates.astype(object), close, volume, stock_ids=[3, 1])
+
+    assert panel.stock_ids == [3, 1]
+    np.testing.assert_array_equal(panel.close, expected.close)
+    np.testing.assert_array_equal(panel.volume, expected.volume)
+    assert panel.last_dates == expected.last_dates
+
+
+def test_panel_matches_per_stock_indicators():
+    history = _history([1, 30, 60, 210, 260])
+    panel = build_price_panel(history)
+    panel_results = calculate_panel_indicators(panel.close, panel.volume)
+
+    for col, stock_id in enumerate(panel.stock_ids):
+        rows = history[stock_id]
+        df = pd.DataFrame(rows, columns=["date", "close", "volume"])
+        expected = calculate_all_indicators(df)
+
+        assert set(expected) == set(panel_results)
+        for name, series in expected.items():
+            actual = panel_results[name][-len(rows):, col]
+            np.testing.assert_allclose(actual, series.to_numpy(dtype=float), rtol=1e-9, equal_nan=True)
+
+
+def test_panel_rolling_std_constant_series_is_zero():
+    values = np.full((25, 2), 10.0)
+    std = panel_rolling_std(values, 20)
+    assert (std[19:] == 0.0).all()
+
+
+def test_latest_values_skips_nan():
+    indicators = {
+        "sma_9": np.array([[np.nan, 1.0], [2.0, np.nan]]),
+    }
+    assert list(latest_values(indicators, 0)) == [("sma_9", 2.0)]
+    assert list(latest_values(indicators, 1)) == []
@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+
+from src.price_loader import load_price_columns
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result(self.responses.pop(0))
+
+
+@pytest.mark.asyncio
+async def test_load_price_columns_chunks_queries_and_fills_volume():
+    session = _FakeSession([
+        [(1, date(2025, 1, 2), 10.0, 100), (2, date(2025, 1, 2), 20.0, None)],
+        [(3, date(2025, 1, 2), 30.0, 300), (3, date(2025, 1, 3), 31.0, 310)],
+    ])
+
+    columns = await load_price_columns(session, [1, 2, 3], date(2025, 1, 1), date(2025, 1, 3), chunk_size=2)
+
+    assert len(session.statements) == 2
+    assert columns.stock_id.tolist() == [1, 2, 3, 3]
+    assert columns.volume.tolist() == [100.0, 0.0, 300.0, 310.0]
+    assert columns.counts() == {1: 1, 2: 1, 3: 2}
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import strategy_indicators
+from src.panel_indicators import build_price_panel, calculate_panel_indicators, recent_indicator_rows
+from src.strategy_indicators import extra_indicator_names, fetch_strategy_indicators
+
+
+def test_extra_indicator_names_drops_standard_and_unknown():
+    names = ["ema_9", "sma_20", "ema_7", "rsi_21", "ema_7", "vwap", "sma_vol_30"]
+    assert extra_indicator_names(names) == ["ema_7", "rsi_21", "sma_vol_30"]
+
+
+class _Client:
+    def __init__(self, names=None):
+        self.names = names
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, url):
+        if self.names is None:
+            raise ConnectionError("scanner down")
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"indicators": self.names})
+
+
+def _patch_snapshot(monkeypatch, client, saved):
+    async def load_snapshot():
+        if saved is None:
+            return None
+        return SimpleNamespace(names=list(saved), fetched_at=datetime(2026, 1, 5, 21, 0))
+
+    async def save_snapshot(names):
+        saved[:] = names
+
+    monkeypatch.setattr(strategy_indicators.httpx, "AsyncClient", lambda timeout: client)
+    monkeypatch.setattr(strategy_indicators, "load_snapshot", load_snapshot)
+    monkeypatch.setattr(strategy_indicators, "save_snapshot", save_snapshot)
+
+
+@pytest.mark.asyncio
+async def test_fetch_strategy_indicators_saves_and_falls_back_to_last_good_list(monkeypatch):
+    saved = []
+    _patch_snapshot(monkeypatch, _Client(["ema_9", "ema_7"]), saved)
+    assert await fetch_strategy_indicators() == (["ema_7"], "fresh")
+    assert saved == ["ema_7"]
+
+    _patch_snapshot(monkeypatch, _Client(), saved)
+    assert await fetch_strategy_indicators() == (["ema_7"], "stale")
+
+
+@pytest.mark.asyncio
+async def test_fetch_strategy_indicators_reports_unavailable_without_saved_list(monkeypatch):
+    _patch_snapshot(monkeypatch, _Client(), None)
+    assert await fetch_strategy_indicators() == ([], "unavailable")
+
+
+def test_recent_indicator_rows_covers_last_bars_per_stock():
+    rng = np.random.default_rng(2)
+    history = {}
+    for stock_id, length in ((1, 40), (2, 12)):
+        closes = 100 + np.cumsum(rng.normal(0, 1, length))
+        dates = [date(2025, 1, 1) + timedelta(days=i) for i in range(length)]
+        history[stock_id] = list(zip(dates, closes, np.full(length, 1000.0)))
+    panel = build_price_panel(history)
+    indicators = calculate_panel_indicators(panel.close, panel.volume, names=["sma_15", "ema_7"])
+
+    rows = list(recent_indicator_rows(panel, indicators, bars=3))
+
+    # sma_15 needs 15 bars, so stock 2 (12 bars) only has ema_7 values
+    assert {(sid, name) for sid, _, name, _ in rows} == {(1, "sma_15"), (1, "ema_7"), (2, "ema_7")}
+    assert sorted(d for sid, d, name, _ in rows if (sid, name) == (1, "ema_7")) == [h[0] for h in history[1][-3:]]
+    assert all(isinstance(v, float) for *_, v in rows)
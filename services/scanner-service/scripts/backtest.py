@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+
+from src.backtest import DEFAULT_HORIZONS, run_backtest
+from src.database import AsyncSessionLocal
+from src.signal_worker import SignalWorker
+from src.strategy_loader import parse_strategy
+
+
+async def backtest(
+    strategy: str | None,
+    strategy_file: str | None,
+    start_date: str,
+    end_date: str,
+    symbols: list[str] | None,
+    horizons: list[int],
+) -> dict:
+    if strategy_file:
+        path = Path(strategy_file)
+        definition = parse_strategy(json.loads(path.read_text(encoding="utf-8")), path.name)
+    else:
+        definition = SignalWorker().compiled_strategy(strategy)
+        if definition is None:
+            raise SystemExit(f"Unknown strategy code: {strategy}")
+
+    async with AsyncSessionLocal() as session:
+        try:
+            return await run_backtest(
+                session,
+                definition,
+                datetime.strptime(start_date, "%Y-%m-%d").date(),
+                datetime.strptime(end_date, "%Y-%m-%d").date(),
+                symbols=symbols,
+                horizons=horizons,
+            )
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest a strategy over stored indicators")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--strategy", help="Loaded strategy code (enabled or not)")
+    source.add_argument("--file", dest="strategy_file", help="Strategy JSON file to vet before adding it")
+    parser.add_argument("--start", dest="start_date", required=True, help="Start date in YYYY-MM-DD")
+    parser.add_argument("--end", dest="end_date", required=True, help="End date in YYYY-MM-DD")
+    parser.add_argument(
+        "--symbols",
+        default=None,
+        help="Comma-separated symbols (default: the strategy's top-liquidity filter)",
+    )
+    parser.add_argument(
+        "--horizons",
+        default=",".join(str(h) for h in DEFAULT_HORIZONS),
+        help="Comma-separated forward-return horizons in bars",
+    )
+    parser.add_argument("--trades", action="store_true", help="Include the full trade list in the output")
+    args = parser.parse_args()
+
+    result = asyncio.run(backtest(
+        args.strategy,
+        args.strategy_file,
+        args.start_date,
+        args.end_date,
+        symbols=args.symbols.split(",") if args.symbols else None,
+        horizons=[int(h) for h in args.horizons.split(",")],
+    ))
+    if not args.trades:
+        result.pop("trade_list", None)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
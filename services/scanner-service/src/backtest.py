@@ -0,0 +1,271 @@
+"""
+Vectorized backtests for scanner strategies.
+
+A date range is loaded once (two queries) into a date-aligned panel: one
+(dates x stocks) matrix per indicator, i.e. a (date x stock x indicator) array
+split by indicator so the live scan kernels run on it unchanged. Entry and exit
+masks for every stock and date come out of one kernel call each, and the stats
+are array operations over those masks:
+
+- trades: enter at the close of an entry signal, exit at the close of the next
+  exit signal; entries while a position is open are ignored, and a trade with no
+  exit by the end of the range is reported open at the last close
+- hit rate: share of closed trades with a positive return
+- forward returns: close-to-close returns h bars after every entry/exit signal
+- drawdown: of an equal-weight daily portfolio of the open positions
+- indicator coverage: share of stored (date, stock) rows in range that have each
+  indicator the strategy reads; indicator-service stores only the names enabled
+  strategies need, so a raw or disabled strategy may read names that were never
+  computed, and a name with no stored values in range is an error rather than a
+  silent zero-signal result
+
+The universe is the stocks selected today (or an explicit symbol list), so
+results carry survivorship bias; they are meant for vetting a strategy JSON
+before enabling it, not for performance claims.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+import logging
+
+import numpy as np
+from sqlalchemy import select
+
+from shared.indicator_store import load_indicator_map
+from shared.models import Stock
+from src.signal_detector import load_price_map
+from src.stock_filter import get_top_stocks_by_volume
+from src.strategy_kernels import CompiledStrategy, SignalPanel, build_dated_panel, compile_strategy
+from src.strategy_loader import StrategyDefinition
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS = (1, 5, 10, 20)
+
+# Calendar days loaded before `start_date` so its signals have a previous bar
+WARMUP_DAYS = 7
+
+
+class Trade(NamedTuple):
+    symbol: str
+    stock_id: int
+    entry_date: date
+    entry_price: float
+    exit_date: Optional[date]  # None while the trade is still open at the end of the range
+    exit_price: float  # exit close, or the last close of an open trade
+    bars_held: int
+    return_pct: float
+
+
+def _last_valid_rows(values: np.ndarray) -> np.ndarray:
+    """Row of the last finite value per column (-1 if none)."""
+    valid = np.isfinite(values)
+    rows = np.where(valid, np.arange(values.shape[0])[:, None], -1)
+    return rows.max(axis=0) if values.size else np.full(values.shape[1], -1)
+
+
+def _pair_trades(entry: np.ndarray, exit_mask: np.ndarray) -> List[tuple]:
+    """(col, entry_row, exit_row or None) for non-overlapping trades per stock."""
+    trades = []
+    for col in np.flatnonzero(entry.any(axis=0)):
+        entries = np.flatnonzero(entry[:, col])
+        exits = np.flatnonzero(exit_mask[:, col])
+        row = entries[0]
+        while True:
+            k = np.searchsorted(exits, row, side="right")
+            exit_row = int(exits[k]) if k < len(exits) else None
+            trades.append((int(col), int(row), exit_row))
+            if exit_row is None:
+                break
+            nxt = np.searchsorted(entries, exit_row, side="right")
+            if nxt >= len(entries):
+                break
+            row = entries[nxt]
+    return trades
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """close[t + horizon] / close[t] - 1 (NaN past the end of the panel)."""
+    future = np.full(close.shape, np.nan)
+    if 0 < horizon < close.shape[0]:
+        future[:-horizon] = close[horizon:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return future / close - 1
+
+
+def _return_stats(values: np.ndarray) -> Dict[str, Any]:
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return {"count": 0, "mean_pct": None, "median_pct": None, "hit_rate": None}
+    return {
+        "count": int(values.size),
+        "mean_pct": round(float(values.mean()) * 100, 4),
+        "median_pct": round(float(np.median(values)) * 100, 4),
+        "hit_rate": round(float((values > 0).mean()), 4),
+    }
+
+
+def indicator_coverage(panel: SignalPanel, rows: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    """Stored values per indicator over the (date, stock) cells selected by `rows`."""
+    cells = (panel.dates != None) & rows  # noqa: E711 - elementwise on an object array
+    total = int(cells.sum())
+    coverage = {}
+    for name, values in sorted(panel.indicators.items()):
+        count = int((np.isfinite(values) & cells).sum())
+        coverage[name] = {"values": count, "pct": round(count / total, 4) if total else None}
+    return coverage
+
+
+def max_drawdown(daily_returns: np.ndarray) -> float:
+    """Largest peak-to-trough decline (a fraction <= 0) of the compounded returns."""
+    if not daily_returns.size:
+        return 0.0
+    equity = np.cumprod(1 + daily_returns)
+    peaks = np.maximum.accumulate(np.maximum(equity, 1.0))
+    return float((equity / peaks - 1).min())
+
+
+def backtest_panel(
+    compiled: CompiledStrategy,
+    panel: SignalPanel,
+    days: Sequence[date],
+    symbols: Mapping[int, str],
+    start_date: Optional[date] = None,
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+) -> Dict[str, Any]:
+    """
+    Replay `compiled` over a date-aligned `panel` (see `build_dated_panel`).
+    Rows dated before `start_date` are warmup only: they feed the previous bar of
+    the first day but emit no signals.
+    """
+    close = panel.close
+    priced = np.isfinite(close)
+    in_range = np.array([start_date is None or day >= start_date for day in days], dtype=bool)[:, None]
+    entry = compiled.entry(panel) & priced & in_range
+    exit_mask = compiled.exit(panel) & priced & in_range
+
+    # Trades
+    last_rows = _last_valid_rows(close)
+    held = np.zeros(close.shape, dtype=bool)
+    trades: List[Trade] = []
+    for col, entry_row, exit_row in _pair_trades(entry, exit_mask):
+        end_row = exit_row if exit_row is not None else int(last_rows[col])
+        entry_price = float(close[entry_row, col])
+        exit_price = float(close[end_row, col])
+        held[entry_row + 1:end_row + 1, col] = True
+        stock_id = panel.stock_ids[col]
+        trades.append(
+            Trade(
+                symbol=symbols.get(stock_id, str(stock_id)),
+                stock_id=stock_id,
+                entry_date=days[entry_row],
+                entry_price=round(entry_price, 4),
+                exit_date=days[exit_row] if exit_row is not None else None,
+                exit_price=round(exit_price, 4),
+                bars_held=end_row - entry_row,
+                return_pct=round((exit_price / entry_price - 1) * 100, 4),
+            )
+        )
+    trades.sort(key=lambda t: (t.entry_date, t.symbol))
+    closed = np.array([t.return_pct for t in trades if t.exit_date is not None])
+
+    # Equal-weight daily portfolio of open positions
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = close[1:] / close[:-1] - 1 if close.shape[0] > 1 else np.empty((0, close.shape[1]))
+    active = held[1:] & np.isfinite(daily)
+    counts = active.sum(axis=1)
+    portfolio = np.divide(
+        np.where(active, daily, 0.0).sum(axis=1), counts, out=np.zeros(len(counts)), where=counts > 0
+    )
+    portfolio = portfolio[in_range[1:, 0]]
+
+    return {
+        "strategy_code": compiled.strategy_code,
+        "version": compiled.definition.version,
+        "stocks": len(panel.stock_ids),
+        "dates": int(in_range.sum()),
+        "signals": {"entry": int(entry.sum()), "exit": int(exit_mask.sum())},
+        "indicator_coverage": indicator_coverage(panel, in_range),
+        "trades": {
+            "total": len(trades),
+            "closed": int(closed.size),
+            "open": len(trades) - int(closed.size),
+            "hit_rate": round(float((closed > 0).mean()), 4) if closed.size else None,
+            "avg_return_pct": round(float(closed.mean()), 4) if closed.size else None,
+            "median_return_pct": round(float(np.median(closed)), 4) if closed.size else None,
+            "avg_bars_held": round(float(np.mean([t.bars_held for t in trades])), 2) if trades else None,
+        },
+        "forward_returns": {
+            signal_type: {
+                str(h): _return_stats(forward_returns(close, h)[mask]) for h in horizons
+            }
+            for signal_type, mask in (("entry", entry), ("exit", exit_mask))
+        },
+        "portfolio": {
+            "total_return_pct": round((float(np.prod(1 + portfolio)) - 1) * 100, 4),
+            "max_drawdown_pct": round(max_drawdown(portfolio) * 100, 4),
+        },
+        "trade_list": [
+            {
+                **trade._asdict(),
+                "entry_date": trade.entry_date.isoformat(),
+                "exit_date": trade.exit_date.isoformat() if trade.exit_date else None,
+            }
+            for trade in trades
+        ],
+    }
+
+
+async def run_backtest(
+    session,
+    strategy: StrategyDefinition | CompiledStrategy,
+    start_date: date,
+    end_date: date,
+    symbols: Optional[Sequence[str]] = None,
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+) -> Dict[str, Any]:
+    """
+    Backtest a strategy (enabled or not) over [start_date, end_date] on `symbols`,
+    or on the stocks its filters select today. Raises ValueError when an indicator
+    the strategy reads has no stored values in the range.
+    """
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    compiled = strategy if isinstance(strategy, CompiledStrategy) else compile_strategy(strategy)
+
+    if symbols:
+        result = await session.execute(
+            select(Stock).where(Stock.symbol.in_([s.upper() for s in symbols])).order_by(Stock.symbol)
+        )
+        stocks = result.scalars().all()
+    else:
+        filters = compiled.definition.filters
+        stocks = await get_top_stocks_by_volume(session, limit=filters.top_n, min_price=filters.min_price)
+
+    stock_ids = [s.id for s in stocks]
+    load_start = start_date - timedelta(days=WARMUP_DAYS)
+    names = sorted(compiled.indicator_names)
+    indicator_map = await load_indicator_map(session, stock_ids, load_start, end_date, names) if stock_ids else {}
+    price_map = await load_price_map(session, stock_ids, load_start, end_date) if stock_ids else {}
+    panel, days = build_dated_panel(indicator_map, price_map, stock_ids, names)
+
+    summary = backtest_panel(
+        compiled, panel, days, {s.id: s.symbol for s in stocks}, start_date=start_date, horizons=horizons
+    )
+    if summary["dates"]:
+        missing = [name for name, cov in summary["indicator_coverage"].items() if not cov["values"]]
+        if missing:
+            raise ValueError(
+                f"No stored values for {', '.join(missing)} between {start_date} and {end_date}; "
+                "indicator-service only stores indicators read by enabled strategies. Backfill them first: "
+                f"POST /api/backfill-indicators with start_date {load_start} and indicators {missing}, "
+                f"or scripts/backfill_indicators.py --start {load_start} --indicators {' '.join(missing)}"
+            )
+    summary["start_date"] = start_date.isoformat()
+    summary["end_date"] = end_date.isoformat()
+    logger.info(
+        f"Backtest {compiled.strategy_code} {start_date}..{end_date}: {summary['stocks']} stocks, "
+        f"{summary['dates']} dates, {summary['trades']['total']} trades, hit rate {summary['trades']['hit_rate']}"
+    )
+    return summary
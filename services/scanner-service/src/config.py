@@ -2,6 +2,8 @@ from shared.config import BaseConfig
 
 class Settings(BaseConfig):
     # Scanner uses service URLs, which are already in BaseConfig
-    pass
-    
+
+    # Alert notifications in flight at once after a scan (a symbol's signals stay ordered)
+    SIGNAL_DISPATCH_CONCURRENCY: int = 8
+
 settings = Settings()
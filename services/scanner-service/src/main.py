@@ -1,11 +1,14 @@
 from datetime import date
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException
 from pydantic import BaseModel
 
+from src.backtest import DEFAULT_HORIZONS, run_backtest
+from src.database import AsyncSessionLocal
 from src.signal_worker import SignalWorker
+from src.strategy_loader import parse_strategy
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +27,16 @@ class DatePayload(BaseModel):
     send_notifications: bool = True
 
 
+class BacktestPayload(BaseModel):
+    start_date: date
+    end_date: date
+    # A loaded strategy by code, or raw strategy JSON to vet before adding it
+    strategy_code: Optional[str] = None
+    strategy: Optional[Dict[str, Any]] = None
+    symbols: Optional[List[str]] = None
+    horizons: List[int] = list(DEFAULT_HORIZONS)
+
+
 @app.on_event("startup")
 async def startup_event():
     # Scanner is trigger-based from scheduler/API; no autonomous background loop.
@@ -35,6 +48,39 @@ async def root():
     return {"message": "Scanner Service is running"}
 
 
+@app.get("/strategies/indicators")
+async def strategy_indicators():
+    """
+    Indicator names referenced by the enabled strategies. The indicator service
+    reads this to compute any non-standard periods in its daily pass.
+    """
+    indicators = worker.indicator_names()
+    return {
+        "strategies": worker.strategy_codes,
+        "version": worker.strategy_version,
+        "indicators": indicators,
+    }
+
+
+@app.get("/strategies")
+async def strategies():
+    """Loaded strategy codes with their content versions."""
+    return {"version": worker.strategy_version, "strategies": worker.strategy_versions}
+
+
+@app.post("/admin/reload-strategies")
+async def reload_strategies():
+    """
+    Re-read every strategy file now. An invalid file is reported and the
+    previously loaded definitions stay in use.
+    """
+    try:
+        changed = worker.refresh_strategies(force=True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Strategy reload failed: {e}")
+    return {"changed": changed, "version": worker.strategy_version, "strategies": worker.strategy_versions}
+
+
 @app.post("/run-scan")
 async def run_scan(background_tasks: BackgroundTasks, payload: DatePayload = None):
     """
@@ -91,3 +137,41 @@ async def run_pf_scan(background_tasks: BackgroundTasks, payload: DatePayload =
     Trigger PF strategy scan.
     """
     return await run_strategy_scan("PF", background_tasks, payload)
+
+
+@app.post("/backtest")
+async def backtest(payload: BacktestPayload):
+    """
+    Replay a strategy's entry/exit rules over stored indicators for a date range:
+    trades, hit rate, forward returns and drawdown. Disabled strategies and raw
+    strategy JSON can be backtested, so a new definition can be vetted first.
+    """
+    if payload.strategy is not None:
+        try:
+            strategy = parse_strategy(payload.strategy, "request")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif payload.strategy_code:
+        strategy = worker.compiled_strategy(payload.strategy_code)
+        if strategy is None:
+            raise HTTPException(status_code=404, detail=f"Unknown strategy code: {payload.strategy_code}")
+    else:
+        raise HTTPException(status_code=400, detail="Provide strategy_code or strategy")
+
+    if payload.end_date < payload.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if any(h <= 0 for h in payload.horizons):
+        raise HTTPException(status_code=400, detail="horizons must be positive")
+
+    async with AsyncSessionLocal() as session:
+        try:
+            return await run_backtest(
+                session,
+                strategy,
+                payload.start_date,
+                payload.end_date,
+                symbols=payload.symbols,
+                horizons=payload.horizons,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
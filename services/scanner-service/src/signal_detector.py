@@ -2,18 +2,29 @@
 Generic signal detector for scanner-service.
 
 Evaluates strategy rules from strategy JSON definitions and produces
-strategy-scoped entry/exit signals.
+strategy-scoped entry/exit signals. Rules are compiled into vectorized kernels
+(see `src.strategy_kernels`) and evaluated for every stock at once.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Any, List, Optional, Sequence
+from typing import Any, Iterable, List, Optional, Sequence
 import logging
 
-from sqlalchemy import desc, select
-from shared.models import Indicator, PriceData
-from src.strategy_loader import ConditionRule, StrategyDefinition
+import numpy as np
+from sqlalchemy import select
+from shared.indicator_store import load_indicator_map
+from shared.models import PriceData
+from src.strategy_kernels import (
+    CompiledStrategy,
+    SignalPanel,
+    build_signal_panel,
+    compile_rule,
+    compile_strategy,
+    cross_mask,
+)
+from src.strategy_loader import ConditionRule, CrossRule, StrategyDefinition
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +59,10 @@ class StrategySignal:
         return f"{self.strategy_code} {self.signal_type.capitalize()}"
 
 
+def _as_float(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
 def _detect_cross(
     fast_today: Optional[float],
     fast_prev: Optional[float],
@@ -55,14 +70,10 @@ def _detect_cross(
     slow_prev: Optional[float],
     comparison: str,
 ) -> bool:
-    if any(v is None for v in (fast_today, fast_prev, slow_today, slow_prev)):
-        return False
-
-    if comparison == "cross_up":
-        return fast_prev <= slow_prev and fast_today > slow_today
-    if comparison == "cross_down":
-        return fast_prev >= slow_prev and fast_today < slow_today
-    return False
+    """Scalar form of the cross kernel; a missing value never crosses."""
+    return bool(cross_mask(
+        _as_float(fast_prev), _as_float(slow_prev), _as_float(fast_today), _as_float(slow_today), comparison
+    ))
 
 
 def _signal_strength(fast_value: Optional[float], slow_value: Optional[float]) -> float:
@@ -71,107 +82,9 @@ def _signal_strength(fast_value: Optional[float], slow_value: Optional[float]) -
     return ((fast_value - slow_value) / slow_value) * 100
 
 
-def _indicator_names_for_condition(condition: ConditionRule) -> set[str]:
-    indicator = condition.indicator.lower()
-    params = condition.params or {}
-
-    if indicator == "ma_cross":
-        fast_period = int(params.get("fast_period", 9))
-        slow_period = int(params.get("slow_period", 20))
-        return {f"ema_{fast_period}", f"sma_{slow_period}"}
-    if indicator == "rsi":
-        period = int(params.get("period", 14))
-        return {f"rsi_{period}"}
-    if indicator == "price_vs_sma":
-        sma_period = int(params.get("sma_period", 50))
-        return {f"sma_{sma_period}"}
-    if indicator == "volume":
-        window = int(params.get("window", 20))
-        return {f"sma_vol_{window}"}
-
-    return set()
-
-
-def _evaluate_condition(
-    condition: ConditionRule,
-    curr_indicators: dict[str, Any],
-    prev_indicators: dict[str, Any],
-    curr_price: dict[str, Any],
-) -> bool:
-    indicator = condition.indicator.lower()
-    comparison = condition.comparison
-    params = condition.params or {}
-
-    if indicator == "ma_cross":
-        fast_period = int(params.get("fast_period", 9))
-        slow_period = int(params.get("slow_period", 20))
-        fast_name = f"ema_{fast_period}"
-        slow_name = f"sma_{slow_period}"
-        return _detect_cross(
-            curr_indicators.get(fast_name),
-            prev_indicators.get(fast_name),
-            curr_indicators.get(slow_name),
-            prev_indicators.get(slow_name),
-            comparison,
-        )
-
-    if indicator == "rsi":
-        period = int(params.get("period", 14))
-        rsi_name = f"rsi_{period}"
-        rsi_value = curr_indicators.get(rsi_name)
-        if rsi_value is None:
-            return False
-
-        if comparison == ">":
-            return rsi_value > float(params.get("threshold", 50))
-        if comparison == "<":
-            return rsi_value < float(params.get("threshold", 50))
-        if comparison == "between":
-            low = float(params.get("min", 30))
-            high = float(params.get("max", 70))
-            return low <= rsi_value <= high
-        return False
-
-    if indicator == "volume":
-        volume_value = curr_price.get("volume")
-        if volume_value is None:
-            return False
-
-        if "threshold" in params:
-            threshold = float(params.get("threshold"))
-            if comparison == ">":
-                return volume_value > threshold
-            if comparison == "<":
-                return volume_value < threshold
-            return False
-
-        window = int(params.get("window", 20))
-        sma_vol_name = f"sma_vol_{window}"
-        sma_vol_value = curr_indicators.get(sma_vol_name)
-        if sma_vol_value is None:
-            return False
-
-        multiplier = float(params.get("multiplier", 1.0))
-        threshold = sma_vol_value * multiplier
-        if comparison == ">":
-            return volume_value > threshold
-        if comparison == "<":
-            return volume_value < threshold
-        return False
-
-    if indicator == "price_vs_sma":
-        close_price = curr_price.get("close")
-        sma_period = int(params.get("sma_period", 50))
-        sma_value = curr_indicators.get(f"sma_{sma_period}")
-        if close_price is None or sma_value is None:
-            return False
-        if comparison == ">":
-            return close_price > sma_value
-        if comparison == "<":
-            return close_price < sma_value
-        return False
-
-    return False
+def strategy_indicator_names(strategy: StrategyDefinition) -> set[str]:
+    """Every stored indicator name a strategy's rules and conditions read."""
+    return set(compile_strategy(strategy).indicator_names)
 
 
 def _conditions_match(
@@ -180,161 +93,162 @@ def _conditions_match(
     prev_indicators: dict[str, Any],
     curr_price: dict[str, Any],
 ) -> bool:
-    for condition in conditions:
-        if not _evaluate_condition(condition, curr_indicators, prev_indicators, curr_price):
-            return False
-    return True
-
-
-def _resolve_close_price(
-    by_date: dict[date, dict[str, Any]],
-    curr_date: date,
-) -> float:
-    current = by_date.get(curr_date, {})
-    close = current.get("close")
-    if close is not None:
+    """Evaluate conditions for one stock-day through the same kernels as a scan."""
+    if not conditions:
+        return True
+    kernel, names = compile_rule(CrossRule("cross_up", "", ""), conditions)
+    prev_day, curr_day = date(2000, 1, 1), date(2000, 1, 2)
+    panel = build_signal_panel(
+        {0: {prev_day: prev_indicators, curr_day: curr_indicators}},
+        {0: {curr_day: (curr_price.get("close"), curr_price.get("volume"))}},
+        [0],
+        names,
+    )
+    return bool(kernel(panel)[-1, 0])
+
+
+async def load_price_map(
+    session,
+    stock_ids: Sequence[int],
+    start_date: date,
+    end_date: date,
+) -> dict[int, dict[date, tuple]]:
+    """{stock_id: {date: (close, volume)}} for [start_date, end_date] in one query."""
+    price_query = (
+        select(PriceData.stock_id, PriceData.date, PriceData.close, PriceData.volume)
+        .where(PriceData.stock_id.in_(list(stock_ids)))
+        .where(PriceData.date >= start_date)
+        .where(PriceData.date <= end_date)
+    )
+    price_map: dict[int, dict[date, tuple]] = {}
+    for stock_id, dt, close, volume in (await session.execute(price_query)).all():
+        price_map.setdefault(stock_id, {})[dt] = (close, float(volume) if volume is not None else None)
+    return price_map
+
+
+async def load_signal_panel(
+    session,
+    stock_ids: Sequence[int],
+    indicator_names: Iterable[str],
+    start_date: date,
+    end_date: date,
+    bars: Optional[int] = None,
+) -> SignalPanel:
+    """
+    Load stored indicators and prices for [start_date, end_date] with two queries
+    and build a bottom-aligned panel (the last `bars` indicator dates per stock).
+    """
+    names = sorted(set(indicator_names))
+    indicator_map = await load_indicator_map(session, list(stock_ids), start_date, end_date, names)
+    price_map = await load_price_map(session, stock_ids, start_date, end_date)
+    return build_signal_panel(indicator_map, price_map, stock_ids, names, bars=bars)
+
+
+def _value(panel: SignalPanel, name: str, row: int, col: int) -> Optional[float]:
+    value = panel.values(name)[row, col]
+    return None if np.isnan(value) else float(value)
+
+
+def _close_price(panel: SignalPanel, row: int, col: int) -> float:
+    close = panel.close[row, col]
+    if not np.isnan(close):
         return float(close)
-
-    for dt in sorted(by_date.keys(), reverse=True):
-        fallback = by_date[dt].get("close")
-        if fallback is not None:
-            return float(fallback)
-
+    # Fall back to the latest close loaded for the stock
+    if panel.last_close is not None and not np.isnan(panel.last_close[col]):
+        return float(panel.last_close[col])
     return 0.0
 
 
-async def scan_for_strategy_signals(
-    session,
-    stocks: list,
-    strategy: StrategyDefinition,
-    target_date: date | None = None,
+def signals_from_panel(
+    compiled: CompiledStrategy,
+    panel: SignalPanel,
+    stocks: Sequence,
+    row: int = -1,
 ) -> List[StrategySignal]:
-    if not stocks:
+    """Entry/exit signals of every stock at panel `row` (default: each stock's latest bar)."""
+    if panel.shape[0] == 0:
         return []
-
-    stock_ids = [s.id for s in stocks]
     stock_map = {s.id: s for s in stocks}
+    hits = {
+        "entry": (compiled.entry(panel)[row], compiled.definition.scan.entry),
+        "exit": (compiled.exit(panel)[row], compiled.definition.scan.exit),
+    }
+
     signals: List[StrategySignal] = []
+    candidates = np.flatnonzero(hits["entry"][0] | hits["exit"][0])
+    for col in candidates:
+        stock = stock_map.get(panel.stock_ids[col])
+        if stock is None:
+            continue
+        for signal_type, (mask, rule) in hits.items():
+            if not mask[col]:
+                continue
+            fast_val = _value(panel, rule.fast_indicator, row, col)
+            slow_val = _value(panel, rule.slow_indicator, row, col)
+            signals.append(
+                StrategySignal(
+                    strategy_code=compiled.strategy_code,
+                    signal_type=signal_type,
+                    symbol=stock.symbol,
+                    stock_id=stock.id,
+                    fast_indicator=rule.fast_indicator,
+                    slow_indicator=rule.slow_indicator,
+                    fast_value=fast_val,
+                    slow_value=slow_val,
+                    close_price=_close_price(panel, row, col),
+                    signal_strength=_signal_strength(fast_val, slow_val),
+                )
+            )
+    return signals
 
-    today = target_date if target_date else date.today()
-    start_date = today - timedelta(days=7)
 
-    entry = strategy.scan.entry
-    exit_rule = strategy.scan.exit
-    needed_indicators = {
-        entry.fast_indicator,
-        entry.slow_indicator,
-        exit_rule.fast_indicator,
-        exit_rule.slow_indicator,
-    }
-    for condition in strategy.scan.entry_conditions:
-        needed_indicators.update(_indicator_names_for_condition(condition))
-    for condition in strategy.scan.exit_conditions:
-        needed_indicators.update(_indicator_names_for_condition(condition))
+async def scan_for_strategies(
+    session,
+    scans: Sequence[tuple[CompiledStrategy, Sequence]],
+    target_date: date | None = None,
+) -> dict[str, List[StrategySignal]]:
+    """
+    Evaluate several strategies, each over its own stocks, against one shared panel:
+    the union of their stocks and indicator names is loaded once.
+
+    Each stock's latest indicator bar in the week up to `target_date` is compared
+    with the bar before it.
+    """
+    results: dict[str, List[StrategySignal]] = {compiled.strategy_code: [] for compiled, _ in scans}
+    stock_ids = list(dict.fromkeys(s.id for _, stocks in scans for s in stocks))
+    if not stock_ids:
+        return results
 
-    try:
-        ind_query = (
-            select(Indicator.stock_id, Indicator.date, Indicator.indicator_name, Indicator.value)
-            .where(Indicator.stock_id.in_(stock_ids))
-            .where(Indicator.indicator_name.in_(sorted(needed_indicators)))
-            .where(Indicator.date >= start_date)
-            .where(Indicator.date <= today)
-            .order_by(Indicator.stock_id, desc(Indicator.date))
-        )
-        ind_rows = (await session.execute(ind_query)).all()
-
-        indicator_map: dict[int, dict[date, dict[str, Any]]] = {}
-        for stock_id, dt, name, value in ind_rows:
-            indicator_map.setdefault(stock_id, {}).setdefault(dt, {})[name] = value
-
-        price_query = (
-            select(PriceData.stock_id, PriceData.date, PriceData.close, PriceData.volume)
-            .where(PriceData.stock_id.in_(stock_ids))
-            .where(PriceData.date >= start_date)
-            .where(PriceData.date <= today)
-            .order_by(PriceData.stock_id, desc(PriceData.date))
-        )
-        price_rows = (await session.execute(price_query)).all()
-
-        price_map: dict[int, dict[date, dict[str, Any]]] = {}
-        for stock_id, dt, close, volume in price_rows:
-            price_map.setdefault(stock_id, {})[dt] = {
-                "close": close,
-                "volume": float(volume) if volume is not None else None,
-            }
-
-        for stock_id, by_date in indicator_map.items():
-            stock = stock_map.get(stock_id)
-            if not stock:
-                continue
+    today = target_date if target_date else date.today()
+    start_date = today - timedelta(days=7)
+    names = set().union(*(compiled.indicator_names for compiled, _ in scans))
 
-            dates = sorted(by_date.keys(), reverse=True)
-            if len(dates) < 2:
-                continue
+    panel = await load_signal_panel(session, stock_ids, names, start_date, today, bars=2)
+    for compiled, stocks in scans:
+        try:
+            results[compiled.strategy_code] = signals_from_panel(compiled, panel, stocks)
+        except Exception as e:
+            logger.error(f"Error during strategy scan ({compiled.strategy_code}): {e}", exc_info=True)
+    return results
 
-            curr_date = dates[0]
-            prev_date = dates[1]
-            curr = by_date[curr_date]
-            prev = by_date[prev_date]
-            curr_price = price_map.get(stock_id, {}).get(curr_date, {})
-
-            entry_hit = _detect_cross(
-                curr.get(entry.fast_indicator),
-                prev.get(entry.fast_indicator),
-                curr.get(entry.slow_indicator),
-                prev.get(entry.slow_indicator),
-                entry.comparison,
-            )
-            if strategy.scan.entry_conditions:
-                entry_hit = _conditions_match(strategy.scan.entry_conditions, curr, prev, curr_price)
-
-            exit_hit = _detect_cross(
-                curr.get(exit_rule.fast_indicator),
-                prev.get(exit_rule.fast_indicator),
-                curr.get(exit_rule.slow_indicator),
-                prev.get(exit_rule.slow_indicator),
-                exit_rule.comparison,
-            )
-            if strategy.scan.exit_conditions:
-                exit_hit = _conditions_match(strategy.scan.exit_conditions, curr, prev, curr_price)
-
-            if entry_hit:
-                fast_val = curr.get(entry.fast_indicator)
-                slow_val = curr.get(entry.slow_indicator)
-                signals.append(
-                    StrategySignal(
-                        strategy_code=strategy.strategy_code,
-                        signal_type="entry",
-                        symbol=stock.symbol,
-                        stock_id=stock.id,
-                        fast_indicator=entry.fast_indicator,
-                        slow_indicator=entry.slow_indicator,
-                        fast_value=fast_val,
-                        slow_value=slow_val,
-                        close_price=_resolve_close_price(price_map.get(stock_id, {}), curr_date),
-                        signal_strength=_signal_strength(fast_val, slow_val),
-                    )
-                )
 
-            if exit_hit:
-                fast_val = curr.get(exit_rule.fast_indicator)
-                slow_val = curr.get(exit_rule.slow_indicator)
-                signals.append(
-                    StrategySignal(
-                        strategy_code=strategy.strategy_code,
-                        signal_type="exit",
-                        symbol=stock.symbol,
-                        stock_id=stock.id,
-                        fast_indicator=exit_rule.fast_indicator,
-                        slow_indicator=exit_rule.slow_indicator,
-                        fast_value=fast_val,
-                        slow_value=slow_val,
-                        close_price=_resolve_close_price(price_map.get(stock_id, {}), curr_date),
-                        signal_strength=_signal_strength(fast_val, slow_val),
-                    )
-                )
+async def scan_for_strategy_signals(
+    session,
+    stocks: list,
+    strategy: StrategyDefinition | CompiledStrategy,
+    target_date: date | None = None,
+) -> List[StrategySignal]:
+    """
+    Signals of one strategy over `stocks`. `strategy` may be pre-compiled (see
+    `compile_strategy`).
+    """
+    if not stocks:
+        return []
 
+    compiled = strategy if isinstance(strategy, CompiledStrategy) else compile_strategy(strategy)
+    try:
+        results = await scan_for_strategies(session, [(compiled, stocks)], target_date)
+        return results[compiled.strategy_code]
     except Exception as e:
-        logger.error(f"Error during strategy scan ({strategy.strategy_code}): {e}", exc_info=True)
-
-    return signals
+        logger.error(f"Error during strategy scan ({compiled.strategy_code}): {e}", exc_info=True)
+        return []
@@ -6,44 +6,139 @@ Executes enabled strategy definitions and emits alerts.
 from __future__ import annotations
 
 from datetime import date, datetime
+import asyncio
 import logging
+import time
 
 import httpx
 
 from src.database import AsyncSessionLocal
-from src.stock_filter import get_top_stocks_by_volume
+from src.stock_filter import get_top_stocks_by_volume, get_top_stocks_for_filters
 from src.config import settings
-from src.strategy_loader import load_strategy_definitions
-from src.signal_detector import StrategySignal, scan_for_strategy_signals
+from src.strategy_loader import StrategyCache
+from src.signal_detector import StrategySignal, scan_for_strategies, scan_for_strategy_signals
+from src.strategy_kernels import CompiledStrategy, compile_strategy
 
 logger = logging.getLogger(__name__)
 
 
 class SignalWorker:
-    def __init__(self):
-        self._strategies = load_strategy_definitions()
+    def __init__(self, strategy_dir=None):
+        self._cache = StrategyCache(strategy_dir)
+        self._compiled: dict[str, CompiledStrategy] = {}
+        self.refresh_strategies()
+
+    def refresh_strategies(self, force: bool = False) -> bool:
+        """
+        Pick up changed strategy files (a stat per file when nothing changed).
+        Returns True when any definition changed.
+        """
+        changed = self._cache.refresh(force=force)
+        self._strategies = self._cache.definitions
+        # Rules are compiled into vectorized kernels once per strategy version, not per scan
+        compiled = {}
+        for code, strategy in self._strategies.items():
+            current = self._compiled.get(code)
+            if current is None or current.definition.version != strategy.version:
+                current = compile_strategy(strategy)
+            compiled[code] = current
+        self._compiled = compiled
+        return changed
+
+    def _refresh_for_scan(self) -> None:
+        """Hot reload before a scan; a broken edit keeps the last good definitions."""
+        try:
+            self.refresh_strategies()
+        except Exception as e:
+            logger.error(f"Strategy reload failed, keeping version {self.strategy_version[:12]}: {e}")
 
-    def refresh_strategies(self) -> None:
-        self._strategies = load_strategy_definitions()
+    def compiled_strategy(self, strategy_code: str) -> CompiledStrategy | None:
+        """Compiled strategy by code, enabled or not (after picking up file changes)."""
+        self._refresh_for_scan()
+        return self._compiled.get(strategy_code.upper())
 
     @property
     def strategy_codes(self) -> list[str]:
         return sorted(self._strategies.keys())
 
+    @property
+    def strategy_versions(self) -> dict[str, str]:
+        return self._cache.versions
+
+    @property
+    def strategy_version(self) -> str:
+        return self._cache.version
+
+    def indicator_names(self) -> list[str]:
+        """Indicator names referenced by the enabled strategies."""
+        self._refresh_for_scan()
+        names: set[str] = set()
+        for strategy in self._strategies.values():
+            if strategy.enabled:
+                names.update(self._compiled[strategy.strategy_code].indicator_names)
+        return sorted(names)
+
     async def run_all(
         self,
         target_date: date | None = None,
         send_notifications: bool = True,
-    ) -> None:
-        self.refresh_strategies()
-        for strategy in sorted(self._strategies.values(), key=lambda s: s.strategy_code):
-            if not strategy.enabled:
-                continue
-            await self.run_strategy(
-                strategy.strategy_code,
-                target_date=target_date,
-                send_notifications=send_notifications,
-            )
+    ) -> dict:
+        """
+        Scan every enabled strategy in one pass: one stock query covering all
+        strategies' filters, one shared indicator/price panel, then each strategy's
+        kernels over its own stocks.
+        """
+        self._refresh_for_scan()
+        strategies = [
+            self._compiled[strategy.strategy_code]
+            for strategy in sorted(self._strategies.values(), key=lambda s: s.strategy_code)
+            if strategy.enabled
+        ]
+        start = datetime.now()
+        logger.info(
+            f"[{start}] Starting multi-strategy scan ({', '.join(s.strategy_code for s in strategies)}) "
+            f"for {target_date or date.today()}..."
+        )
+        summary = {"status": "completed", "strategies": {}, "total_signals": 0}
+
+        try:
+            async with AsyncSessionLocal() as session:
+                universes = await get_top_stocks_for_filters(
+                    session,
+                    [(s.definition.filters.top_n, s.definition.filters.min_price) for s in strategies],
+                )
+                scans = list(zip(strategies, universes))
+                results = await scan_for_strategies(session, scans, target_date=target_date)
+
+            all_signals: list[StrategySignal] = []
+            for compiled, stocks in scans:
+                signals = results.get(compiled.strategy_code, [])
+                logger.info(f"{compiled.strategy_code}: found {len(signals)} signals in {len(stocks)} stocks.")
+                summary["strategies"][compiled.strategy_code] = {
+                    "version": compiled.definition.version,
+                    "stocks": len(stocks),
+                    "signals": len(signals),
+                }
+                all_signals.extend(signals)
+            summary["total_signals"] = len(all_signals)
+
+            if all_signals:
+                async with self._http_client() as client:
+                    summary["dispatch"] = await self._process_signals(
+                        all_signals,
+                        client,
+                        target_date=target_date,
+                        send_notifications=send_notifications,
+                    )
+        except Exception as e:
+            logger.error(f"Multi-strategy scan failed: {e}", exc_info=True)
+            summary["status"] = "failed"
+            summary["error"] = str(e)
+        finally:
+            duration = (datetime.now() - start).total_seconds()
+            summary["duration_seconds"] = round(duration, 2)
+            logger.info(f"Multi-strategy scan finished in {duration:.2f}s")
+        return summary
 
     async def run_strategy(
         self,
@@ -51,7 +146,7 @@ class SignalWorker:
         target_date: date | None = None,
         send_notifications: bool = True,
     ) -> None:
-        self.refresh_strategies()
+        self._refresh_for_scan()
         strategy = self._strategies.get(strategy_code.upper())
         if not strategy:
             logger.error(f"Unknown strategy code: {strategy_code}")
@@ -77,84 +172,175 @@ class SignalWorker:
                 signals = await scan_for_strategy_signals(
                     session,
                     stocks,
-                    strategy,
+                    self._compiled[strategy.strategy_code],
                     target_date=target_date,
                 )
                 logger.info(f"{strategy.strategy_code}: found {len(signals)} signals.")
 
                 if signals:
-                    async with httpx.AsyncClient(timeout=10.0) as client:
-                        for signal in signals:
-                            await self._process_signal(
-                                signal,
-                                client,
-                                target_date=target_date,
-                                send_notifications=send_notifications,
-                            )
+                    async with self._http_client() as client:
+                        await self._process_signals(
+                            signals,
+                            client,
+                            target_date=target_date,
+                            send_notifications=send_notifications,
+                        )
         except Exception as e:
             logger.error(f"{strategy.strategy_code} scan failed: {e}", exc_info=True)
         finally:
             duration = (datetime.now() - start).total_seconds()
             logger.info(f"{strategy.strategy_code} scan finished in {duration:.2f}s")
 
-    async def _process_signal(
+    @staticmethod
+    def _http_client() -> httpx.AsyncClient:
+        """Keep-alive client sized for the dispatch concurrency."""
+        concurrency = max(settings.SIGNAL_DISPATCH_CONCURRENCY, 1)
+        return httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1),
+        )
+
+    @staticmethod
+    def _indicator_values(signal: StrategySignal) -> dict:
+        rounded_fast = round(signal.fast_value, 2) if signal.fast_value is not None else None
+        rounded_slow = round(signal.slow_value, 2) if signal.slow_value is not None else None
+        indicator_values = {
+            signal.fast_indicator: rounded_fast,
+            signal.slow_indicator: rounded_slow,
+            "strength": round(signal.signal_strength, 2),
+        }
+        # Keep legacy keys for chart overlays/formatters that expect EMA/SMA names.
+        if signal.fast_indicator == "ema_9":
+            indicator_values["ema_9"] = rounded_fast
+        if signal.slow_indicator == "sma_20":
+            indicator_values["sma_20"] = rounded_slow
+        return indicator_values
+
+    def _record_payload(self, signal: StrategySignal, target_date: date | None = None) -> dict:
+        signal_date = target_date.isoformat() if target_date else date.today().isoformat()
+        return {
+            "stock_symbol": signal.symbol,
+            "triggered_at": datetime.utcnow().isoformat(),
+            "date": signal_date,
+            "condition_met": signal.condition_met,
+            "crossover_type": signal.signal_type_key,
+            "direction": signal.direction,
+            "price": float(signal.close_price) if signal.close_price is not None else 0.0,
+            "indicator_values": self._indicator_values(signal),
+        }
+
+    async def _process_signals(
         self,
-        signal: StrategySignal,
+        signals: list[StrategySignal],
         client: httpx.AsyncClient,
         target_date: date | None = None,
         send_notifications: bool = True,
-    ) -> None:
-        try:
-            signal_date = target_date.isoformat() if target_date else date.today().isoformat()
-            rounded_fast = round(signal.fast_value, 2) if signal.fast_value is not None else None
-            rounded_slow = round(signal.slow_value, 2) if signal.slow_value is not None else None
-
-            indicator_values = {
-                signal.fast_indicator: rounded_fast,
-                signal.slow_indicator: rounded_slow,
-                "strength": round(signal.signal_strength, 2),
-            }
-            # Keep legacy keys for chart overlays/formatters that expect EMA/SMA names.
-            if signal.fast_indicator == "ema_9":
-                indicator_values["ema_9"] = rounded_fast
-            if signal.slow_indicator == "sma_20":
-                indicator_values["sma_20"] = rounded_slow
-
-            record_payload = {
-                "stock_symbol": signal.symbol,
-                "triggered_at": datetime.utcnow().isoformat(),
-                "date": signal_date,
-                "condition_met": signal.condition_met,
-                "crossover_type": signal.signal_type_key,
-                "direction": signal.direction,
-                "price": float(signal.close_price) if signal.close_price is not None else 0.0,
-                "indicator_values": indicator_values,
-            }
+    ) -> dict:
+        """
+        Record all signals with one /api/record-alerts call, then notify the newly
+        recorded ones with at most SIGNAL_DISPATCH_CONCURRENCY requests in flight.
+        A symbol's signals are notified one after another, in input order.
 
-            record_resp = await client.post(f"{settings.DATA_SERVICE_URL}/api/record-alert", json=record_payload)
-            record_data = record_resp.json() if record_resp.status_code == 200 else {}
+        Returns a dispatch summary: record/notify counts, latencies and failures.
+        """
+        stats = {
+            "signals": len(signals),
+            "recorded": 0,
+            "duplicates": 0,
+            "record_failed": 0,
+            "notified": 0,
+            "notify_failed": 0,
+            "record_ms": None,
+            "notify_latency_ms": None,
+            "failures": [],
+        }
+
+        record_start = time.perf_counter()
+        try:
+            payload = [self._record_payload(signal, target_date) for signal in signals]
+            record_resp = await client.post(f"{settings.DATA_SERVICE_URL}/api/record-alerts", json=payload)
+            error = None
             if record_resp.status_code != 200:
-                logger.error(f"Failed to record {signal.signal_code} for {signal.symbol}: {record_resp.text}")
-                return
-            if record_data.get("status") != "success":
+                error = record_resp.text
+            else:
+                record_data = record_resp.json()
+                if record_data.get("status") != "success":
+                    error = record_data.get("message")
+        except Exception as e:
+            error = str(e)
+        stats["record_ms"] = round((time.perf_counter() - record_start) * 1000, 1)
+        if error is not None:
+            logger.error(f"Failed to record {len(signals)} signals: {error}")
+            stats["record_failed"] = len(signals)
+            stats["failures"].append({"stage": "record", "error": str(error)})
+            return stats
+
+        stats["recorded"] = record_data.get("recorded", 0)
+        stats["duplicates"] = record_data.get("skipped", 0)
+        stats["record_failed"] = record_data.get("errors", 0)
+        logger.info(
+            f"Recorded {stats['recorded']} signals "
+            f"({stats['duplicates']} duplicates, {stats['record_failed']} errors) in {stats['record_ms']}ms."
+        )
+
+        lanes: dict[str, list[StrategySignal]] = {}
+        for signal, result in zip(signals, record_data.get("results", [])):
+            if result.get("status") != "success":
                 logger.info(
                     f"Skipping notify for {signal.symbol} ({signal.signal_code}): "
-                    f"{record_data.get('message', 'record skipped')}"
+                    f"{result.get('message', 'record skipped')}"
                 )
-                return
-
+                continue
             if not send_notifications:
                 logger.info(f"Recorded {signal.signal_code} for {signal.symbol} with notifications disabled.")
-                return
+                continue
+            lanes.setdefault(signal.symbol, []).append(signal)
+
+        if not lanes:
+            return stats
 
+        semaphore = asyncio.Semaphore(max(settings.SIGNAL_DISPATCH_CONCURRENCY, 1))
+        latencies: list[float] = []
+        failures: list[dict] = []
+
+        async def _dispatch_lane(lane: list[StrategySignal]) -> None:
+            for signal in lane:
+                async with semaphore:
+                    sent = time.perf_counter()
+                    error = await self._notify_signal(signal, client)
+                    latencies.append((time.perf_counter() - sent) * 1000)
+                if error is not None:
+                    failures.append(
+                        {"symbol": signal.symbol, "signal_code": signal.signal_code, "stage": "notify", "error": error}
+                    )
+
+        await asyncio.gather(*(_dispatch_lane(lane) for lane in lanes.values()))
+
+        stats["notified"] = len(latencies) - len(failures)
+        stats["notify_failed"] = len(failures)
+        stats["notify_latency_ms"] = {
+            "avg": round(sum(latencies) / len(latencies), 1),
+            "max": round(max(latencies), 1),
+        }
+        stats["failures"] = failures[:10]
+        logger.info(
+            f"Notified {stats['notified']}/{len(latencies)} signals across {len(lanes)} symbols "
+            f"(avg {stats['notify_latency_ms']['avg']}ms, max {stats['notify_latency_ms']['max']}ms)."
+        )
+        return stats
+
+    async def _notify_signal(self, signal: StrategySignal, client: httpx.AsyncClient) -> str | None:
+        """Send one signal to alert-service. Returns the error, or None on success."""
+        try:
+            indicator_values = self._indicator_values(signal)
             notify_payload = {
                 "signal_code": signal.signal_code,
                 "symbol": signal.symbol,
                 "timestamp": int(datetime.now().timestamp()),
                 "data": {
                     "price": signal.close_price,
-                    signal.fast_indicator: rounded_fast,
-                    signal.slow_indicator: rounded_slow,
+                    signal.fast_indicator: indicator_values[signal.fast_indicator],
+                    signal.slow_indicator: indicator_values[signal.slow_indicator],
                     "pct_diff": f"{signal.signal_strength:+.2f}%",
                 },
             }
@@ -162,5 +348,8 @@ class SignalWorker:
             notify_resp = await client.post(f"{settings.ALERT_SERVICE_URL}/signal", json=notify_payload)
             if notify_resp.status_code != 200:
                 logger.error(f"Failed to notify {signal.signal_code} for {signal.symbol}: {notify_resp.text}")
+                return f"HTTP {notify_resp.status_code}"
         except Exception as e:
             logger.error(f"Error processing {signal.signal_code} for {signal.symbol}: {e}")
+            return str(e)
+        return None
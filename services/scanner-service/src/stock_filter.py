@@ -4,9 +4,9 @@ Stock Filter Module
 Provides filtering functions to select top stocks by volume
 for crossover alert monitoring.
 """
-from sqlalchemy import select, desc
+from sqlalchemy import and_, desc, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Sequence, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,4 +50,66 @@ async def get_top_stocks_by_volume(
     return stocks
 
 
+async def get_top_stocks_for_filters(
+    session: AsyncSession,
+    filters: Sequence[Tuple[int, float]],
+) -> List[List]:
+    """
+    Top stocks for several (limit, min_price) filters with one query.
+
+    Each filter ranks stocks at or above its min price by 30-day average dollar
+    volume (a running count per filter), so a strict min price still gets its full
+    `limit` rather than a slice of a looser filter's list.
+
+    Returns:
+        One list of Stock objects per filter, sorted by avg dollar volume descending
+    """
+    from shared.models import Stock
+
+    if not filters:
+        return []
+
+    avg_dollar_volume = Stock.avg_volume_30d * Stock.last_close_price
+    order = (desc(avg_dollar_volume), Stock.id)
+    ranks = [
+        func.count()
+        .filter(Stock.last_close_price >= min_price)
+        .over(order_by=order, rows=(None, 0))
+        .label(f"rank_{i}")
+        for i, (_, min_price) in enumerate(filters)
+    ]
+    ranked = (
+        select(Stock.id, *ranks)
+        .where(Stock.is_active == True)
+        .where(Stock.avg_volume_30d.isnot(None))
+        .where(Stock.avg_volume_30d > 0)
+        .where(Stock.last_close_price.isnot(None))
+        .where(Stock.last_close_price >= min(min_price for _, min_price in filters))
+        .subquery()
+    )
+    rank_columns = [ranked.c[f"rank_{i}"] for i in range(len(filters))]
+    query = (
+        select(Stock, *rank_columns)
+        .join(ranked, ranked.c.id == Stock.id)
+        .where(or_(*(
+            and_(Stock.last_close_price >= min_price, rank <= limit)
+            for (limit, min_price), rank in zip(filters, rank_columns)
+        )))
+        .order_by(*order)
+    )
+
+    result = await session.execute(query)
+    selected: List[List] = [[] for _ in filters]
+    for stock, *stock_ranks in result.all():
+        for i, ((limit, min_price), rank) in enumerate(zip(filters, stock_ranks)):
+            if stock.last_close_price >= min_price and rank <= limit:
+                selected[i].append(stock)
+
+    logger.info(
+        "Selected stocks per filter: "
+        + ", ".join(
+            f"top {limit} min ${min_price}: {len(stocks)}" for (limit, min_price), stocks in zip(filters, selected)
+        )
+    )
+    return selected
 
@@ -0,0 +1,285 @@
+"""
+Vectorized strategy evaluation for scanner-service.
+
+A `StrategyDefinition` is compiled once into kernels: functions of a
+`SignalPanel` that return boolean masks. The panel holds bottom-aligned
+(bars, stocks) arrays, like indicator-service's `PricePanel`. Row t of a mask
+compares bar t with bar t - 1 of the same stock, so one call evaluates every
+stock (and, over a longer panel, every date) in a few array operations.
+
+Condition params are parsed at compile time, not per stock. A missing indicator
+or price is NaN, and comparisons with NaN never match.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.strategy_loader import ConditionRule, CrossRule, StrategyDefinition
+
+Mask = np.ndarray
+Kernel = Callable[["SignalPanel"], Mask]
+
+
+@dataclass
+class SignalPanel:
+    """Bottom-aligned indicator and price matrices for a set of stocks."""
+    stock_ids: List[int]
+    dates: np.ndarray   # (bars, stocks) object array of datetime.date / None
+    close: np.ndarray   # (bars, stocks) float64, NaN padded
+    volume: np.ndarray  # (bars, stocks) float64, NaN padded
+    indicators: Dict[str, np.ndarray]  # name -> (bars, stocks) float64, NaN padded
+    # Latest close per stock (may predate the last indicator bar)
+    last_close: Optional[np.ndarray] = None
+    _missing: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.dates.shape
+
+    def values(self, name: str) -> np.ndarray:
+        values = self.indicators.get(name)
+        if values is not None:
+            return values
+        if self._missing is None:
+            self._missing = np.full(self.shape, np.nan)
+        return self._missing
+
+    def has_prev(self) -> Mask:
+        """True where the stock has a bar before row t (row 0 never has one)."""
+        present = self.dates != None  # noqa: E711 - elementwise on an object array
+        prev = np.zeros(self.shape, dtype=bool)
+        prev[1:] = present[:-1] & present[1:]
+        return prev
+
+
+def previous(values: np.ndarray) -> np.ndarray:
+    """Shift rows down by one bar (NaN in the first row)."""
+    shifted = np.full(values.shape, np.nan)
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def build_signal_panel(
+    indicator_map: Mapping[int, Mapping[date, Mapping[str, Any]]],
+    price_map: Mapping[int, Mapping[date, Tuple[Optional[float], Optional[float]]]],
+    stock_ids: Sequence[int],
+    names: Sequence[str],
+    bars: Optional[int] = None,
+) -> SignalPanel:
+    """
+    Build a panel from {stock_id: {date: {name: value}}} and
+    {stock_id: {date: (close, volume)}}. A stock's rows are its indicator dates in
+    ascending order (the last `bars` of them when given); stocks without
+    indicators stay NaN.
+    """
+    names = sorted(set(names))
+    per_stock = []
+    for stock_id in stock_ids:
+        days = sorted(indicator_map.get(stock_id, {}))
+        per_stock.append(days[-bars:] if bars else days)
+    n_bars = max((len(days) for days in per_stock), default=0)
+    n_stocks = len(stock_ids)
+
+    dates = np.full((n_bars, n_stocks), None, dtype=object)
+    close = np.full((n_bars, n_stocks), np.nan)
+    volume = np.full((n_bars, n_stocks), np.nan)
+    last_close = np.full(n_stocks, np.nan)
+    indicators = {name: np.full((n_bars, n_stocks), np.nan) for name in names}
+
+    for col, (stock_id, days) in enumerate(zip(stock_ids, per_stock)):
+        prices = price_map.get(stock_id, {})
+        closes = [(day, c) for day, (c, _) in prices.items() if c is not None]
+        if closes:
+            last_close[col] = float(max(closes)[1])
+        if not days:
+            continue
+        offset = n_bars - len(days)
+        by_date = indicator_map[stock_id]
+        dates[offset:, col] = days
+        for row, day in enumerate(days, start=offset):
+            c, v = prices.get(day, (None, None))
+            close[row, col] = np.nan if c is None else c
+            volume[row, col] = np.nan if v is None else v
+            values = by_date[day]
+            for name in names:
+                value = values.get(name)
+                if value is not None:
+                    indicators[name][row, col] = value
+
+    return SignalPanel(
+        stock_ids=list(stock_ids),
+        dates=dates,
+        close=close,
+        volume=volume,
+        indicators=indicators,
+        last_close=last_close,
+    )
+
+
+def build_dated_panel(
+    indicator_map: Mapping[int, Mapping[date, Mapping[str, Any]]],
+    price_map: Mapping[int, Mapping[date, Tuple[Optional[float], Optional[float]]]],
+    stock_ids: Sequence[int],
+    names: Sequence[str],
+) -> Tuple[SignalPanel, List[date]]:
+    """
+    Date-aligned variant of `build_signal_panel` for replaying a range: row t is
+    the t-th date (union of every stock's indicator dates) for all stocks, so a
+    mask row is one trading day across the universe. Returns the panel and its
+    row dates; a stock without indicators on a row has `dates` None there.
+    """
+    names = sorted(set(names))
+    days = sorted({day for stock_id in stock_ids for day in indicator_map.get(stock_id, {})})
+    row_of = {day: row for row, day in enumerate(days)}
+    shape = (len(days), len(stock_ids))
+
+    dates = np.full(shape, None, dtype=object)
+    close = np.full(shape, np.nan)
+    volume = np.full(shape, np.nan)
+    last_close = np.full(len(stock_ids), np.nan)
+    indicators = {name: np.full(shape, np.nan) for name in names}
+
+    for col, stock_id in enumerate(stock_ids):
+        prices = price_map.get(stock_id, {})
+        closes = [(day, c) for day, (c, _) in prices.items() if c is not None]
+        if closes:
+            last_close[col] = float(max(closes)[1])
+        for day, values in indicator_map.get(stock_id, {}).items():
+            row = row_of[day]
+            dates[row, col] = day
+            c, v = prices.get(day, (None, None))
+            close[row, col] = np.nan if c is None else c
+            volume[row, col] = np.nan if v is None else v
+            for name in names:
+                value = values.get(name)
+                if value is not None:
+                    indicators[name][row, col] = value
+
+    panel = SignalPanel(
+        stock_ids=list(stock_ids),
+        dates=dates,
+        close=close,
+        volume=volume,
+        indicators=indicators,
+        last_close=last_close,
+    )
+    return panel, days
+
+
+# =============================================================================
+# Kernels
+# =============================================================================
+
+def cross_mask(fast_prev, slow_prev, fast, slow, comparison: str) -> Mask:
+    if comparison == "cross_up":
+        return (fast_prev <= slow_prev) & (fast > slow)
+    if comparison == "cross_down":
+        return (fast_prev >= slow_prev) & (fast < slow)
+    return np.zeros(np.shape(fast), dtype=bool)
+
+
+def compare_mask(values, comparison: str, threshold) -> Mask:
+    if comparison == ">":
+        return values > threshold
+    if comparison == "<":
+        return values < threshold
+    return np.zeros(np.shape(values), dtype=bool)
+
+
+def _never(panel: SignalPanel) -> Mask:
+    return np.zeros(panel.shape, dtype=bool)
+
+
+def _cross_kernel(comparison: str, fast: str, slow: str) -> Kernel:
+    def kernel(panel: SignalPanel) -> Mask:
+        fast_values, slow_values = panel.values(fast), panel.values(slow)
+        return cross_mask(previous(fast_values), previous(slow_values), fast_values, slow_values, comparison)
+    return kernel
+
+
+def compile_condition(condition: ConditionRule) -> Tuple[Kernel, FrozenSet[str]]:
+    """Compile one condition into a kernel plus the indicator names it reads."""
+    indicator = condition.indicator.lower()
+    comparison = condition.comparison
+    params = condition.params or {}
+
+    if indicator == "ma_cross":
+        fast = f"ema_{int(params.get('fast_period', 9))}"
+        slow = f"sma_{int(params.get('slow_period', 20))}"
+        return _cross_kernel(comparison, fast, slow), frozenset({fast, slow})
+
+    if indicator == "rsi":
+        name = f"rsi_{int(params.get('period', 14))}"
+        if comparison == "between":
+            low = float(params.get("min", 30))
+            high = float(params.get("max", 70))
+            return (lambda panel: (panel.values(name) >= low) & (panel.values(name) <= high)), frozenset({name})
+        threshold = float(params.get("threshold", 50))
+        return (lambda panel: compare_mask(panel.values(name), comparison, threshold)), frozenset({name})
+
+    if indicator == "volume":
+        if "threshold" in params:
+            threshold = float(params.get("threshold"))
+            return (lambda panel: compare_mask(panel.volume, comparison, threshold)), frozenset()
+        name = f"sma_vol_{int(params.get('window', 20))}"
+        multiplier = float(params.get("multiplier", 1.0))
+        return (
+            lambda panel: compare_mask(panel.volume, comparison, panel.values(name) * multiplier)
+        ), frozenset({name})
+
+    if indicator == "price_vs_sma":
+        name = f"sma_{int(params.get('sma_period', 50))}"
+        return (lambda panel: compare_mask(panel.close, comparison, panel.values(name))), frozenset({name})
+
+    return _never, frozenset()
+
+
+def compile_rule(rule: CrossRule, conditions: Sequence[ConditionRule]) -> Tuple[Kernel, FrozenSet[str]]:
+    """
+    Kernel for one side (entry or exit) of a strategy: all `conditions` must hold,
+    or the cross `rule` when there are none. Either way bar t needs a bar t - 1.
+    """
+    if conditions:
+        compiled = [compile_condition(condition) for condition in conditions]
+        kernels = [kernel for kernel, _ in compiled]
+        names = frozenset().union(*(names for _, names in compiled))
+    else:
+        kernels = [_cross_kernel(rule.comparison, rule.fast_indicator, rule.slow_indicator)]
+        names = frozenset({rule.fast_indicator, rule.slow_indicator})
+
+    def kernel(panel: SignalPanel) -> Mask:
+        mask = panel.has_prev()
+        for condition_kernel in kernels:
+            mask &= condition_kernel(panel)
+        return mask
+    return kernel, names
+
+
+@dataclass(frozen=True)
+class CompiledStrategy:
+    definition: StrategyDefinition
+    entry: Kernel
+    exit: Kernel
+    # Stored indicators the strategy reads (rule legs plus condition indicators)
+    indicator_names: FrozenSet[str]
+
+    @property
+    def strategy_code(self) -> str:
+        return self.definition.strategy_code
+
+
+def compile_strategy(strategy: StrategyDefinition) -> CompiledStrategy:
+    scan = strategy.scan
+    entry, entry_names = compile_rule(scan.entry, scan.entry_conditions)
+    exit_kernel, exit_names = compile_rule(scan.exit, scan.exit_conditions)
+    names = entry_names | exit_names | {
+        scan.entry.fast_indicator,
+        scan.entry.slow_indicator,
+        scan.exit.fast_indicator,
+        scan.exit.slow_indicator,
+    }
+    return CompiledStrategy(definition=strategy, entry=entry, exit=exit_kernel, indicator_names=frozenset(names))
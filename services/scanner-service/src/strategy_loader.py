@@ -3,13 +3,22 @@ Strategy loader for scanner-service.
 
 Loads scanner strategy definitions from JSON files so signal generation
 behavior can be changed without code edits.
+
+`StrategyCache` keeps the parsed definitions between scans and reparses a file
+only when its mtime/size and then its content hash change. Every definition
+carries a `version` (hash of its canonical JSON), so compiled kernels and other
+downstream caches can key off it.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
+import hashlib
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
@@ -47,6 +56,8 @@ class StrategyDefinition:
     enabled: bool
     scan: ScanConfig
     filters: FilterConfig
+    # sha256 of the canonical strategy JSON (key order and whitespace do not matter)
+    version: str = ""
 
 
 def _validate_rule(rule: CrossRule, context: str) -> None:
@@ -145,18 +156,118 @@ def _parse_strategy(raw: dict, filename: str) -> StrategyDefinition:
     )
 
 
+def strategy_version(raw: dict) -> str:
+    canonical = json.dumps(raw, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _default_strategy_dir() -> Path:
+    return Path(__file__).resolve().parent.parent / "strategies"
+
+
+def parse_strategy(raw: dict, source: str = "strategy") -> StrategyDefinition:
+    """Validate raw strategy JSON (as in a strategy file) into a versioned definition."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"{source}: strategy must be an object")
+    return replace(_parse_strategy(raw, source), version=strategy_version(raw))
+
+
+def _load_strategy_file(content: bytes, filename: str) -> StrategyDefinition:
+    return parse_strategy(json.loads(content.decode("utf-8")), filename)
+
+
 def load_strategy_definitions(strategy_dir: Path | None = None) -> Dict[str, StrategyDefinition]:
     if strategy_dir is None:
-        strategy_dir = Path(__file__).resolve().parent.parent / "strategies"
+        strategy_dir = _default_strategy_dir()
 
     if not strategy_dir.exists():
         raise FileNotFoundError(f"Strategy directory not found: {strategy_dir}")
 
     definitions: Dict[str, StrategyDefinition] = {}
     for path in sorted(strategy_dir.glob("*.json")):
-        with path.open("r", encoding="utf-8") as f:
-            raw = json.load(f)
-        parsed = _parse_strategy(raw, path.name)
+        parsed = _load_strategy_file(path.read_bytes(), path.name)
         definitions[parsed.strategy_code] = parsed
 
     return definitions
+
+
+@dataclass(frozen=True)
+class _CachedFile:
+    mtime_ns: int
+    size: int
+    content_hash: str
+    definition: StrategyDefinition
+
+
+class StrategyCache:
+    """
+    Parsed strategy definitions, refreshed from the strategy directory on demand.
+
+    `refresh()` costs one stat per file when nothing changed. A file whose mtime or
+    size changed is re-read, and reparsed only if its content hash changed too. A
+    refresh that fails to parse any file raises and leaves the cache untouched.
+    """
+
+    def __init__(self, strategy_dir: Path | None = None):
+        self.strategy_dir = strategy_dir or _default_strategy_dir()
+        self._files: Dict[Path, _CachedFile] = {}
+        self._definitions: Dict[str, StrategyDefinition] = {}
+
+    @property
+    def definitions(self) -> Dict[str, StrategyDefinition]:
+        return dict(self._definitions)
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        return {code: strategy.version for code, strategy in sorted(self._definitions.items())}
+
+    @property
+    def version(self) -> str:
+        """Hash over every loaded strategy's version (changes when any strategy does)."""
+        digest = hashlib.sha256()
+        for code, version in self.versions.items():
+            digest.update(f"{code}:{version};".encode("utf-8"))
+        return digest.hexdigest()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload changed, added and removed strategy files. `force` re-reads every
+        file regardless of mtime. Returns True when any definition changed.
+        """
+        if not self.strategy_dir.exists():
+            raise FileNotFoundError(f"Strategy directory not found: {self.strategy_dir}")
+
+        files: Dict[Path, _CachedFile] = {}
+        reparsed = 0
+        for path in sorted(self.strategy_dir.glob("*.json")):
+            stat = path.stat()
+            cached = self._files.get(path)
+            if not force and cached and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+                files[path] = cached
+                continue
+
+            content = path.read_bytes()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if cached and cached.content_hash == content_hash:
+                definition = cached.definition
+            else:
+                definition = _load_strategy_file(content, path.name)
+                reparsed += 1
+            files[path] = _CachedFile(stat.st_mtime_ns, stat.st_size, content_hash, definition)
+
+        definitions: Dict[str, StrategyDefinition] = {}
+        for cached in files.values():
+            definitions[cached.definition.strategy_code] = cached.definition
+
+        changed = definitions != self._definitions
+        self._files = files
+        self._definitions = definitions
+        if changed:
+            logger.info(
+                f"Loaded {len(definitions)} strategies ({reparsed} reparsed): "
+                + ", ".join(f"{code}@{version[:8]}" for code, version in self.versions.items())
+            )
+        return changed
+
+    def get(self, strategy_code: str) -> Optional[StrategyDefinition]:
+        return self._definitions.get(strategy_code.upper())
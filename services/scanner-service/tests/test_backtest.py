@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src import backtest
+from src.backtest import backtest_panel, run_backtest
+from src.strategy_kernels import build_dated_panel, compile_strategy
+from src.strategy_loader import CrossRule, FilterConfig, ScanConfig, StrategyDefinition
+
+DAYS = [date(2026, 1, 5) + timedelta(days=i) for i in range(8)]
+
+# ema_9 - sma_20 per day: entries on the cross above zero, exits on the cross below
+SPREADS = {
+    1: [-1, 1, 1, -1, -1, 1, 1, 1],
+    2: [-1, -1, 1, 1, 1, -1, -1, -1],
+}
+CLOSES = {
+    1: [10, 10, 11, 12, 12, 10, 11, 9],
+    2: [20, 20, 20, 18, 16, 19, 19, 19],
+}
+
+
+def _strategy():
+    return compile_strategy(StrategyDefinition(
+        strategy_code="NEW",
+        enabled=False,
+        scan=ScanConfig(
+            type="ma_cross",
+            entry=CrossRule("cross_up", "ema_9", "sma_20"),
+            exit=CrossRule("cross_down", "ema_9", "sma_20"),
+        ),
+        filters=FilterConfig(top_n=2, min_price=5.0),
+        version="abc",
+    ))
+
+
+def _maps():
+    indicator_map = {
+        sid: {day: {"ema_9": 100.0 + spread, "sma_20": 100.0} for day, spread in zip(DAYS, spreads)}
+        for sid, spreads in SPREADS.items()
+    }
+    price_map = {sid: {day: (float(c), 1000.0) for day, c in zip(DAYS, closes)} for sid, closes in CLOSES.items()}
+    return indicator_map, price_map
+
+
+def _run(start_date=None):
+    indicator_map, price_map = _maps()
+    panel, days = build_dated_panel(indicator_map, price_map, [1, 2], ["ema_9", "sma_20"])
+    return backtest_panel(_strategy(), panel, days, {1: "AAA", 2: "BBB"}, start_date=start_date, horizons=(1,))
+
+
+def test_backtest_pairs_trades_and_reports_hit_rate_and_drawdown():
+    result = _run()
+
+    assert result["signals"] == {"entry": 3, "exit": 2}
+    trades = [(t["symbol"], t["entry_date"], t["exit_date"], t["return_pct"]) for t in result["trade_list"]]
+    assert trades == [
+        ("AAA", DAYS[1].isoformat(), DAYS[3].isoformat(), 20.0),
+        ("BBB", DAYS[2].isoformat(), DAYS[5].isoformat(), -5.0),
+        ("AAA", DAYS[5].isoformat(), None, -10.0),  # still open: marked at the last close
+    ]
+    assert result["trades"]["closed"] == 2 and result["trades"]["open"] == 1
+    assert result["trades"]["hit_rate"] == 0.5
+    assert result["trades"]["avg_return_pct"] == 7.5
+    assert result["forward_returns"]["entry"]["1"] == {
+        "count": 3, "mean_pct": 3.3333, "median_pct": 10.0, "hit_rate": 0.6667,
+    }
+    assert result["portfolio"]["max_drawdown_pct"] == pytest.approx(-18.18, abs=0.01)
+    assert result["indicator_coverage"] == {
+        "ema_9": {"values": 16, "pct": 1.0},
+        "sma_20": {"values": 16, "pct": 1.0},
+    }
+
+
+def test_backtest_warmup_rows_emit_no_signals():
+    result = _run(start_date=DAYS[3])
+
+    assert result["dates"] == 5
+    assert result["signals"] == {"entry": 1, "exit": 2}
+    assert [t["entry_date"] for t in result["trade_list"]] == [DAYS[5].isoformat()]
+
+
+def test_dated_panel_aligns_rows_by_date():
+    indicator_map, price_map = _maps()
+    del indicator_map[2][DAYS[0]]
+
+    panel, days = build_dated_panel(indicator_map, price_map, [1, 2, 3], ["ema_9"])
+
+    assert days == DAYS
+    assert panel.shape == (8, 3)
+    assert panel.dates[0, 1] is None and panel.dates[1, 1] == DAYS[1]
+    assert all(day is None for day in panel.dates[:, 2])
+
+
+def _patch_loads(monkeypatch, indicator_map, price_map, loads):
+    async def load_indicators(session, stock_ids, start, end, names):
+        loads.append(("indicators", start, end))
+        return indicator_map
+
+    async def load_prices(session, stock_ids, start, end):
+        loads.append(("prices", start, end))
+        return price_map
+
+    async def top_stocks(session, limit, min_price):
+        return [SimpleNamespace(id=1, symbol="AAA"), SimpleNamespace(id=2, symbol="BBB")]
+
+    monkeypatch.setattr(backtest, "load_indicator_map", load_indicators)
+    monkeypatch.setattr(backtest, "load_price_map", load_prices)
+    monkeypatch.setattr(backtest, "get_top_stocks_by_volume", top_stocks)
+
+
+@pytest.mark.asyncio
+async def test_run_backtest_loads_the_range_once_with_warmup(monkeypatch):
+    indicator_map, price_map = _maps()
+    loads = []
+
+    _patch_loads(monkeypatch, indicator_map, price_map, loads)
+
+    result = await run_backtest(None, _strategy(), DAYS[1], DAYS[-1])
+
+    warmup_start = DAYS[1] - timedelta(days=backtest.WARMUP_DAYS)
+    assert loads == [("indicators", warmup_start, DAYS[-1]), ("prices", warmup_start, DAYS[-1])]
+    assert result["version"] == "abc"
+    assert result["trades"]["total"] == 3
+    assert result["start_date"] == DAYS[1].isoformat()
+
+
+@pytest.mark.asyncio
+async def test_run_backtest_rejects_indicators_with_no_stored_values(monkeypatch):
+    indicator_map, price_map = _maps()
+    for rows in indicator_map.values():
+        for values in rows.values():
+            del values["sma_20"]  # e.g. only read by a disabled strategy, never computed
+    _patch_loads(monkeypatch, indicator_map, price_map, [])
+
+    with pytest.raises(ValueError, match="No stored values for sma_20") as error:
+        await run_backtest(None, _strategy(), DAYS[1], DAYS[-1])
+    assert "/api/backfill-indicators" in str(error.value)
+    assert "--indicators sma_20" in str(error.value)
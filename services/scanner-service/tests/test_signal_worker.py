@@ -0,0 +1,137 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.config import settings
+from src.signal_detector import StrategySignal
+from src.signal_worker import SignalWorker
+
+
+class _Response:
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+        self.text = str(data)
+
+    def json(self):
+        return self._data
+
+
+class _Client:
+    def __init__(self, record_data, record_status=200):
+        self.record_data = record_data
+        self.record_status = record_status
+        self.posts = []
+
+    async def post(self, url, json=None):
+        self.posts.append((url, json))
+        if url.endswith("/api/record-alerts"):
+            return _Response(self.record_data, self.record_status)
+        return _Response({"status": "ok"})
+
+
+def _signal(symbol, signal_type="entry"):
+    return StrategySignal(
+        strategy_code="ESM",
+        signal_type=signal_type,
+        symbol=symbol,
+        stock_id=1,
+        fast_indicator="ema_9",
+        slow_indicator="sma_20",
+        fast_value=101.234,
+        slow_value=100.0,
+        close_price=200.0,
+        signal_strength=1.234,
+    )
+
+
+def _worker():
+    return SignalWorker.__new__(SignalWorker)
+
+
+@pytest.mark.asyncio
+async def test_process_signals_records_in_one_batch_and_notifies_new_alerts():
+    client = _Client({
+        "status": "success",
+        "recorded": 1,
+        "skipped": 1,
+        "errors": 0,
+        "results": [{"status": "success", "id": 1}, {"status": "skipped", "message": "Duplicate alert"}],
+    })
+
+    await _worker()._process_signals([_signal("AAPL"), _signal("MSFT")], client, target_date=date(2026, 2, 10))
+
+    record_url, payload = client.posts[0]
+    assert record_url.endswith("/api/record-alerts")
+    assert [item["stock_symbol"] for item in payload] == ["AAPL", "MSFT"]
+    assert payload[0]["date"] == "2026-02-10"
+    assert payload[0]["crossover_type"] == "esm_entry"
+    assert payload[0]["indicator_values"] == {"ema_9": 101.23, "sma_20": 100.0, "strength": 1.23}
+    notify = client.posts[1:]
+    assert len(notify) == 1
+    assert notify[0][0].endswith("/signal")
+    assert notify[0][1]["symbol"] == "AAPL"
+    assert notify[0][1]["data"]["ema_9"] == 101.23
+
+
+@pytest.mark.asyncio
+async def test_process_signals_skips_notifications_when_recording_fails():
+    client = _Client({"detail": "boom"}, record_status=500)
+
+    stats = await _worker()._process_signals([_signal("AAPL")], client)
+
+    assert len(client.posts) == 1
+    assert stats["record_failed"] == 1 and stats["failures"][0]["stage"] == "record"
+
+
+@pytest.mark.asyncio
+async def test_process_signals_respects_disabled_notifications():
+    client = _Client({"status": "success", "results": [{"status": "success", "id": 1}]})
+
+    await _worker()._process_signals([_signal("AAPL")], client, send_notifications=False)
+
+    assert len(client.posts) == 1
+
+
+class _SlowClient(_Client):
+    """Alert-service posts take a while; tracks the peak number in flight."""
+
+    def __init__(self, record_data, fail_symbols=()):
+        super().__init__(record_data)
+        self.fail_symbols = set(fail_symbols)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def post(self, url, json=None):
+        if url.endswith("/api/record-alerts"):
+            return await super().post(url, json)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.posts.append((url, json))
+        if json["symbol"] in self.fail_symbols:
+            return _Response({"detail": "down"}, status_code=503)
+        return _Response({"status": "ok"})
+
+
+@pytest.mark.asyncio
+async def test_process_signals_dispatches_with_bounded_concurrency_and_per_symbol_order(monkeypatch):
+    monkeypatch.setattr(settings, "SIGNAL_DISPATCH_CONCURRENCY", 3)
+    signals = [_signal(f"S{i}") for i in range(8)] + [_signal("S0", "exit"), _signal("S1", "exit")]
+    client = _SlowClient(
+        {"status": "success", "recorded": 10, "results": [{"status": "success"}] * len(signals)},
+        fail_symbols={"S5"},
+    )
+
+    stats = await _worker()._process_signals(signals, client)
+
+    assert client.peak == 3
+    notified = [(payload["symbol"], payload["signal_code"]) for _, payload in client.posts[1:]]
+    assert notified.index(("S0", "ESM_ENTRY")) < notified.index(("S0", "ESM_EXIT"))
+    assert notified.index(("S1", "ESM_ENTRY")) < notified.index(("S1", "ESM_EXIT"))
+    assert stats["recorded"] == 10
+    assert stats["notified"] == 9 and stats["notify_failed"] == 1
+    assert stats["failures"] == [{"symbol": "S5", "signal_code": "ESM_ENTRY", "stage": "notify", "error": "HTTP 503"}]
+    assert stats["notify_latency_ms"]["max"] >= 10
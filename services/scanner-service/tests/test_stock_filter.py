@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.stock_filter import get_top_stocks_for_filters
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def execute(self, query):
+        self.queries.append(query)
+        return _Result(self.rows)
+
+
+@pytest.mark.asyncio
+async def test_top_stocks_for_filters_splits_one_ranked_query_per_filter():
+    stocks = [SimpleNamespace(id=i, symbol=f"S{i}", last_close_price=price) for i, price in enumerate([50.0, 8.0, 20.0])]
+    # (stock, rank under filter 0 = top 2 / $5, rank under filter 1 = top 2 / $10)
+    session = _Session([(stocks[0], 1, 1), (stocks[1], 2, 1), (stocks[2], 3, 2)])
+
+    universes = await get_top_stocks_for_filters(session, [(2, 5.0), (2, 10.0)])
+
+    assert len(session.queries) == 1
+    assert [[s.symbol for s in group] for group in universes] == [["S0", "S1"], ["S0", "S2"]]
+
+
+@pytest.mark.asyncio
+async def test_top_stocks_for_filters_without_filters_skips_query():
+    session = _Session([])
+
+    assert await get_top_stocks_for_filters(session, []) == []
+    assert session.queries == []
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from src import strategy_loader
+from src.signal_worker import SignalWorker
+from src.strategy_loader import StrategyCache, strategy_version
+
+
+def _raw(code="ESM", fast="ema_9", enabled=True):
+    return {
+        "strategy_code": code,
+        "enabled": enabled,
+        "scan": {
+            "type": "ma_cross",
+            "entry": {"comparison": "cross_up", "fast_indicator": fast, "slow_indicator": "sma_20"},
+            "exit": {"comparison": "cross_down", "fast_indicator": fast, "slow_indicator": "sma_20"},
+        },
+    }
+
+
+def _write(path, raw, mtime_ns=None, indent=None):
+    path.write_text(json.dumps(raw, indent=indent), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    calls = []
+    parse = strategy_loader._parse_strategy
+
+    def counting(raw, filename):
+        calls.append(filename)
+        return parse(raw, filename)
+
+    monkeypatch.setattr(strategy_loader, "_parse_strategy", counting)
+    return calls
+
+
+def test_refresh_reparses_only_changed_files(tmp_path, parse_calls):
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=1_000)
+    _write(tmp_path / "pf.json", _raw("PF"), mtime_ns=1_000)
+    cache = StrategyCache(tmp_path)
+
+    assert cache.refresh() is True
+    assert sorted(parse_calls) == ["esm.json", "pf.json"]
+    assert cache.get("esm").version == strategy_version(_raw("ESM"))
+
+    # Untouched files: stat only
+    assert cache.refresh() is False
+    assert len(parse_calls) == 2
+
+    # Touched but identical content: re-read, not reparsed
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=2_000)
+    assert cache.refresh() is False
+    assert len(parse_calls) == 2
+
+    version = cache.version
+    _write(tmp_path / "pf.json", _raw("PF", fast="ema_12"), mtime_ns=3_000)
+    assert cache.refresh() is True
+    assert parse_calls[2:] == ["pf.json"]
+    assert cache.get("PF").scan.entry.fast_indicator == "ema_12"
+    assert cache.version != version
+
+    (tmp_path / "pf.json").unlink()
+    assert cache.refresh() is True
+    assert list(cache.versions) == ["ESM"]
+
+
+def test_version_ignores_formatting(tmp_path):
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=1_000)
+    cache = StrategyCache(tmp_path)
+    cache.refresh()
+    version = cache.get("ESM").version
+
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=2_000, indent=4)
+    assert cache.refresh() is False
+    assert cache.get("ESM").version == version
+
+
+def test_invalid_file_keeps_previous_definitions(tmp_path):
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=1_000)
+    cache = StrategyCache(tmp_path)
+    cache.refresh()
+    version = cache.version
+
+    (tmp_path / "esm.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        cache.refresh(force=True)
+    assert cache.version == version
+
+
+def test_worker_recompiles_only_changed_strategies(tmp_path):
+    _write(tmp_path / "esm.json", _raw("ESM"), mtime_ns=1_000)
+    _write(tmp_path / "pf.json", _raw("PF"), mtime_ns=1_000)
+    worker = SignalWorker(strategy_dir=tmp_path)
+    esm, pf = worker._compiled["ESM"], worker._compiled["PF"]
+
+    _write(tmp_path / "pf.json", _raw("PF", fast="ema_12"), mtime_ns=2_000)
+    worker._refresh_for_scan()
+
+    assert worker._compiled["ESM"] is esm
+    assert worker._compiled["PF"] is not pf
+    assert "ema_12" in worker.indicator_names()
+
+    # A broken edit is logged and the last good strategies stay loaded
+    (tmp_path / "pf.json").write_text("{", encoding="utf-8")
+    os.utime(tmp_path / "pf.json", ns=(3_000, 3_000))
+    worker._refresh_for_scan()
+    assert worker.strategy_codes == ["ESM", "PF"]
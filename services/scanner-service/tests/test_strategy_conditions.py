@@ -1,5 +1,5 @@
-from src.signal_detector import _conditions_match
-from src.strategy_loader import ConditionRule, load_strategy_definitions
+from src.signal_detector import _conditions_match, strategy_indicator_names
+from src.strategy_loader import ConditionRule, CrossRule, FilterConfig, ScanConfig, StrategyDefinition, load_strategy_definitions
 
 
 def _pf_conditions():
@@ -59,3 +59,23 @@ def test_strategy_files_have_expected_entry_condition_counts():
     strategies = load_strategy_definitions()
     assert len(strategies["ESM"].scan.entry_conditions) == 0
     assert len(strategies["PF"].scan.entry_conditions) == 4
+
+
+def test_strategy_indicator_names_include_condition_periods():
+    strategy = StrategyDefinition(
+        strategy_code="PF",
+        enabled=True,
+        scan=ScanConfig(
+            type="ma_cross",
+            entry=CrossRule("cross_up", "ema_9", "sma_20"),
+            exit=CrossRule("cross_down", "ema_9", "sma_20"),
+            entry_conditions=(
+                ConditionRule("ma_cross", "cross_up", {"fast_period": 7, "slow_period": 30}),
+                ConditionRule("rsi", ">", {"period": 21, "threshold": 50}),
+                ConditionRule("volume", ">", {"window": 10, "multiplier": 1.5}),
+            ),
+        ),
+        filters=FilterConfig(),
+    )
+
+    assert strategy_indicator_names(strategy) == {"ema_9", "sma_20", "ema_7", "sma_30", "rsi_21", "sma_vol_10"}
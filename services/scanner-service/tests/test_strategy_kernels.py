@@ -0,0 +1,121 @@
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import signal_detector
+from src.signal_detector import scan_for_strategies, signals_from_panel
+from src.strategy_kernels import build_signal_panel, compile_strategy
+from src.strategy_loader import ConditionRule, CrossRule, FilterConfig, ScanConfig, StrategyDefinition
+
+D1, D2, D3 = date(2026, 2, 6), date(2026, 2, 9), date(2026, 2, 10)
+
+
+def _strategy(entry_conditions=(), code="PF"):
+    return StrategyDefinition(
+        strategy_code=code,
+        enabled=True,
+        scan=ScanConfig(
+            type="ma_cross",
+            entry=CrossRule("cross_up", "ema_9", "sma_20"),
+            exit=CrossRule("cross_down", "ema_9", "sma_20"),
+            entry_conditions=tuple(entry_conditions),
+        ),
+        filters=FilterConfig(),
+    )
+
+
+def _panel(bars=None):
+    indicator_map = {
+        # crosses up on D3
+        1: {D2: {"ema_9": 99.0, "sma_20": 100.0, "rsi_14": 40.0},
+            D3: {"ema_9": 101.0, "sma_20": 100.0, "rsi_14": 55.0}},
+        # crosses down on D3
+        2: {D2: {"ema_9": 101.0, "sma_20": 100.0}, D3: {"ema_9": 99.0, "sma_20": 100.0}},
+        # a single bar never signals
+        3: {D3: {"ema_9": 101.0, "sma_20": 100.0, "rsi_14": 70.0}},
+        # crossed up on D2, flat since
+        4: {D1: {"ema_9": 98.0, "sma_20": 100.0}, D2: {"ema_9": 101.0, "sma_20": 100.0},
+            D3: {"ema_9": 102.0, "sma_20": 100.0}},
+    }
+    price_map = {
+        1: {D3: (102.0, 1300.0)},
+        2: {D2: (98.0, 900.0)},  # no close on the signal day: falls back to the latest one
+        4: {D3: (103.0, 1000.0)},
+    }
+    return build_signal_panel(indicator_map, price_map, [1, 2, 3, 4, 5], ["ema_9", "sma_20", "rsi_14"], bars=bars)
+
+
+def test_panel_is_bottom_aligned_per_stock():
+    panel = _panel()
+
+    assert panel.shape == (3, 5)
+    assert list(panel.dates[:, 0]) == [None, D2, D3]
+    assert list(panel.dates[:, 3]) == [D1, D2, D3]
+    assert np.isnan(panel.values("ema_9")[:, 4]).all()
+    assert _panel(bars=2).shape == (2, 5)
+
+
+def test_compiled_masks_cover_every_stock_and_date():
+    compiled = compile_strategy(_strategy())
+    panel = _panel()
+
+    entry = compiled.entry(panel)
+    exit_mask = compiled.exit(panel)
+
+    assert entry[-1].tolist() == [True, False, False, False, False]
+    assert exit_mask[-1].tolist() == [False, True, False, False, False]
+    # Historical rows are evaluated in the same pass
+    assert entry[1].tolist() == [False, False, False, True, False]
+    assert compiled.indicator_names == {"ema_9", "sma_20"}
+
+
+def test_conditions_replace_the_cross_rule_and_are_parsed_at_compile_time():
+    compiled = compile_strategy(_strategy([
+        ConditionRule("ma_cross", "cross_up", {"fast_period": "9", "slow_period": "20"}),
+        ConditionRule("rsi", ">", {"period": 14, "threshold": 60}),
+    ]))
+
+    assert compiled.entry(_panel())[-1].tolist() == [False] * 5
+    assert "rsi_14" in compiled.indicator_names
+
+
+def test_signals_from_panel_builds_latest_bar_signals():
+    compiled = compile_strategy(_strategy())
+    stocks = [SimpleNamespace(id=i, symbol=f"S{i}") for i in range(1, 6)]
+
+    signals = signals_from_panel(compiled, _panel(bars=2), stocks)
+
+    assert [(s.symbol, s.signal_type) for s in signals] == [("S1", "entry"), ("S2", "exit")]
+    assert signals[0].close_price == 102.0
+    assert signals[0].fast_value == 101.0 and signals[0].signal_strength == 1.0
+    assert signals[1].close_price == 98.0
+
+
+def test_signals_from_empty_panel():
+    compiled = compile_strategy(_strategy())
+    panel = build_signal_panel({}, {}, [1], ["ema_9"])
+
+    assert signals_from_panel(compiled, panel, [SimpleNamespace(id=1, symbol="S1")]) == []
+
+
+@pytest.mark.asyncio
+async def test_scan_for_strategies_loads_one_panel_for_all_strategies(monkeypatch):
+    calls = []
+
+    async def load(session, stock_ids, names, start, end, bars=None):
+        calls.append((list(stock_ids), set(names), bars))
+        return _panel(bars=bars)
+
+    monkeypatch.setattr(signal_detector, "load_signal_panel", load)
+    stocks = [SimpleNamespace(id=i, symbol=f"S{i}") for i in range(1, 6)]
+    esm = compile_strategy(_strategy(code="ESM"))
+    pf = compile_strategy(_strategy([ConditionRule("rsi", ">", {"period": 14, "threshold": 50})], code="PF"))
+
+    results = await scan_for_strategies(None, [(esm, stocks[:2]), (pf, stocks[1:])], target_date=D3)
+
+    assert calls == [([1, 2, 3, 4, 5], {"ema_9", "sma_20", "rsi_14"}, 2)]
+    assert [(s.symbol, s.signal_type) for s in results["ESM"]] == [("S1", "entry"), ("S2", "exit")]
+    # S1 is outside PF's universe; S3 has rsi > 50 but no previous bar
+    assert [(s.symbol, s.signal_type) for s in results["PF"]] == [("S2", "exit")]
@@ -209,6 +209,16 @@ async def daily_indicator_calculation():
     if result.get('failure_count', 0) > result.get('total_stocks', 0) * 0.05:
         logger.error("WARNING: High failure rate detected!")
 
+    # Scanner unreachable: strategy indicators came from the last saved list, or were skipped
+    extras_status = result.get("strategy_indicators_status")
+    if extras_status in {"stale", "unavailable"}:
+        await _send_system_alert(
+            "daily_indicator_calculation",
+            f"Strategy indicator list {extras_status}: scanner unreachable, "
+            f"computed {result.get('extra_indicators', [])} beyond the standard set",
+            severity="warning",
+        )
+
 
 async def weekly_data_cleanup():
     """
@@ -231,62 +241,38 @@ async def weekly_data_cleanup():
 
     logger.info("Data cleanup complete.")
     logger.info(f"   Indicators Deleted: {result.get('indicators_deleted', 0)}")
+    logger.info(f"   Chunks Dropped: {result.get('chunks_dropped', {})}")
+    logger.info(f"   Chunks Compressed: {result.get('chunks_compressed', {})}")
     logger.info(f"   Alerts Deleted: {result.get('alerts_deleted', 0)}")
     logger.info(f"   Duration: {result.get('duration_seconds', 0)}s")
 
 
-async def evening_esm_scan():
-    if not is_trading_day():
-        logger.info("Evening ESM scan: Not a trading day. Skipping.")
-        return
-
-    """
-    Run EMA/SMA crossover scan (ESM).
-    Runs Monday-Friday at 5:30 PM EST (after indicators calculated).
-    """
-    logger.info("=" * 80)
-    logger.info(f"[{datetime.now()}] Starting Evening ESM Scan...")
-    logger.info("=" * 80)
-
-    from src.config import settings
-
-    result = await _post_json_with_retry(
-        f"{settings.SCANNER_SERVICE_URL}/run-esm-scan",
-        job_name="evening_esm_scan",
-        timeout_seconds=600.0,
-        validate_result=lambda _: True,
-    )
-    if result is None:
-        return
-
-    logger.info("ESM scan triggered successfully.")
-
-
-async def evening_pf_scan():
+async def evening_strategy_scan():
     if not is_trading_day():
-        logger.info("Evening PF scan: Not a trading day. Skipping.")
+        logger.info("Evening strategy scan: Not a trading day. Skipping.")
         return
 
     """
-    Run PF strategy scan.
-    Runs Monday-Friday after ESM scan.
+    Run every enabled strategy (ESM, PF, ...) in one multi-strategy scan, so the
+    stock selection and indicator/price loads are shared.
+    Runs Monday-Friday at 4:30 PM ET (after indicators calculated).
     """
     logger.info("=" * 80)
-    logger.info(f"[{datetime.now()}] Starting Evening PF Scan...")
+    logger.info(f"[{datetime.now()}] Starting Evening Strategy Scan...")
     logger.info("=" * 80)
 
     from src.config import settings
 
     result = await _post_json_with_retry(
-        f"{settings.SCANNER_SERVICE_URL}/run-pf-scan",
-        job_name="evening_pf_scan",
+        f"{settings.SCANNER_SERVICE_URL}/run-scan",
+        job_name="evening_strategy_scan",
         timeout_seconds=600.0,
         validate_result=lambda _: True,
     )
     if result is None:
         return
 
-    logger.info("PF scan triggered successfully.")
+    logger.info("Strategy scan triggered successfully.")
 
 
 async def morning_summary_report():
@@ -35,8 +35,7 @@ def main():
         daily_price_fetch, 
         daily_indicator_calculation, 
         weekly_data_cleanup,
-        evening_esm_scan,
-        evening_pf_scan,
+        evening_strategy_scan,
         morning_summary_report
     )
 
@@ -52,18 +51,12 @@ def main():
         CronTrigger(day_of_week='mon-fri', hour=16, minute=15)
     )
 
-    # 4:30 PM - Evening ESM Scan
+    # 4:30 PM - Evening Strategy Scan (all enabled strategies, shared data load)
     scheduler.add_job(
-        _run_async(evening_esm_scan),
+        _run_async(evening_strategy_scan),
         CronTrigger(day_of_week='mon-fri', hour=16, minute=30)
     )
 
-    # 4:35 PM - Evening PF Scan
-    scheduler.add_job(
-        _run_async(evening_pf_scan),
-        CronTrigger(day_of_week='mon-fri', hour=16, minute=35)
-    )
-
     # 9:35 AM - Morning Summary Report (market start)
     scheduler.add_job(
         _run_async(morning_summary_report),
@@ -1,6 +1,6 @@
 # Shared library exports
 from shared.database import Base
-from shared.models import Stock, PriceData, Indicator
+from shared.models import Stock, PriceData, PriceRevision, Indicator, IndicatorSnapshot, SNAPSHOT_INDICATORS
 from shared.exceptions import (
     AdaException,
     DatabaseError,
@@ -26,3 +26,18 @@ from shared.transactions import (
     validate_foreign_key,
     validate_unique
 )
+from shared.bulk import (
+    bulk_insert_ignore,
+    bulk_insert_ignore_returning,
+    bulk_insert_indicators,
+    bulk_upsert,
+    indicator_rows
+)
+from shared.indicator_store import (
+    STORAGE_MODES,
+    storage_mode,
+    store_indicators,
+    load_indicator_map,
+    prune_indicators,
+    migrate_to_snapshots
+)
@@ -0,0 +1,172 @@
+"""
+Bulk write utilities for high-volume inserts.
+
+Streams rows into PostgreSQL with large multi-row `INSERT ... ON CONFLICT DO NOTHING`
+statements instead of one ORM object per row. Conflicts on the primary key are
+skipped, so re-runs are idempotent without a separate existence check.
+`bulk_upsert` is the overwriting variant (`ON CONFLICT DO UPDATE`).
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.models import Indicator
+
+
+logger = logging.getLogger(__name__)
+
+# asyncpg/PostgreSQL allow at most 32767 bind parameters per statement.
+MAX_BIND_PARAMS = 32767
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _batched(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of at most `batch_size` rows, capped so each statement fits the bind-param limit."""
+    batch: List[Dict[str, Any]] = []
+    limit = batch_size
+    for row in rows:
+        if not batch:
+            limit = max(1, min(batch_size, MAX_BIND_PARAMS // max(len(row), 1)))
+        batch.append(row)
+        if len(batch) >= limit:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_ignore(model: type, batch: List[Dict[str, Any]], conflict_columns: Optional[Sequence[str]]):
+    stmt = insert(model).values(batch)
+    if conflict_columns:
+        return stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+    return stmt.on_conflict_do_nothing()
+
+
+async def bulk_insert_ignore(
+    session: AsyncSession,
+    model: type,
+    rows: Iterable[Dict[str, Any]],
+    conflict_columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Insert rows in multi-row batches, skipping rows that conflict with existing ones.
+
+    Does not commit; the caller owns the transaction.
+
+    Args:
+        session: Database session
+        model: SQLAlchemy model class
+        rows: Iterable of column->value dicts (all rows must share the same keys)
+        conflict_columns: Conflict target (defaults to any unique/primary key violation)
+        batch_size: Maximum rows per INSERT statement
+
+    Returns:
+        Number of rows actually inserted
+    """
+    inserted = 0
+    for batch in _batched(rows, batch_size):
+        result = await session.execute(_insert_ignore(model, batch, conflict_columns))
+        inserted += max(result.rowcount or 0, 0)
+    return inserted
+
+
+async def bulk_insert_ignore_returning(
+    session: AsyncSession,
+    model: type,
+    rows: Iterable[Dict[str, Any]],
+    returning: Sequence[str],
+    conflict_columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Tuple]:
+    """
+    Same as `bulk_insert_ignore`, but returns the `returning` columns of the rows
+    that were actually inserted (skipped conflicts are not returned).
+    """
+    returned: List[Tuple] = []
+    columns = [getattr(model, name) for name in returning]
+    for batch in _batched(rows, batch_size):
+        stmt = _insert_ignore(model, batch, conflict_columns).returning(*columns)
+        result = await session.execute(stmt)
+        returned.extend(tuple(row) for row in result.all())
+    return returned
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model: type,
+    rows: Iterable[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Insert rows in multi-row batches, overwriting `update_columns` of rows that
+    conflict on `conflict_columns`. With no update columns this behaves like
+    `bulk_insert_ignore`.
+
+    Does not commit; the caller owns the transaction.
+
+    Args:
+        session: Database session
+        model: SQLAlchemy model class
+        rows: Iterable of column->value dicts (all rows must share the same keys)
+        conflict_columns: Conflict target (primary key or unique columns)
+        update_columns: Columns to overwrite on conflict (defaults to every
+            non-conflict column present in the rows)
+        batch_size: Maximum rows per INSERT statement
+
+    Returns:
+        Number of rows inserted or updated
+    """
+    written = 0
+    for batch in _batched(rows, batch_size):
+        columns = update_columns
+        if columns is None:
+            columns = [c for c in batch[0] if c not in conflict_columns]
+        if not columns:
+            stmt = _insert_ignore(model, batch, conflict_columns)
+        else:
+            stmt = insert(model).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={c: stmt.excluded[c] for c in columns},
+            )
+        result = await session.execute(stmt)
+        written += max(result.rowcount or 0, 0)
+    return written
+
+
+def indicator_rows(
+    values: Iterable[Tuple[int, date, str, float]],
+) -> Iterator[Dict[str, Any]]:
+    """Convert (stock_id, date, indicator_name, value) tuples into insert rows."""
+    created_at = datetime.utcnow()
+    for stock_id, day, name, value in values:
+        yield {
+            "stock_id": stock_id,
+            "date": day,
+            "indicator_name": name,
+            "value": value,
+            "created_at": created_at,
+        }
+
+
+async def bulk_insert_indicators(
+    session: AsyncSession,
+    values: Iterable[Tuple[int, date, str, float]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Stream (stock_id, date, indicator_name, value) tuples into `indicators`,
+    skipping rows that already exist.
+
+    Returns:
+        Number of indicator rows inserted
+    """
+    inserted = await bulk_insert_ignore(session, Indicator, indicator_rows(values), batch_size=batch_size)
+    logger.debug(f"[BULK] indicators: inserted {inserted} rows")
+    return inserted
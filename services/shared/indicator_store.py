@@ -0,0 +1,259 @@
+"""
+Indicator storage layouts.
+
+Indicators can be stored in two layouts:
+- `indicators` (EAV): one row per (stock_id, date, indicator_name)
+- `indicator_snapshots` (wide): one row per (stock_id, date) with a typed column
+  per standard indicator (see `SNAPSHOT_INDICATORS`); parameterised indicators
+  outside that set (e.g. `ema_7`) go into its `extra` JSONB column
+
+`INDICATOR_STORAGE` selects which layouts are written and read:
+- `eav`:  legacy table only
+- `dual`: write both; read the wide table and fall back to EAV rows for
+          stock-days that have no snapshot yet
+- `wide`: wide table only
+
+All readers and writers go through this module, so switching the mode (after
+running the snapshot migration) needs no caller changes.
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+import os
+
+from sqlalchemy import and_, cast, delete, exists, func, literal, not_, or_, select, text
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.bulk import DEFAULT_BATCH_SIZE, _batched, bulk_insert_ignore_returning, indicator_rows
+from shared.models import Indicator, IndicatorSnapshot, SNAPSHOT_INDICATORS
+
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODES = ("eav", "dual", "wide")
+DEFAULT_STORAGE_MODE = "dual"
+
+IndicatorMap = Dict[int, Dict[date, Dict[str, float]]]
+
+
+def storage_mode(mode: Optional[str] = None) -> str:
+    """Resolve the storage mode (explicit argument, else INDICATOR_STORAGE, else dual)."""
+    mode = (mode or os.getenv("INDICATOR_STORAGE") or DEFAULT_STORAGE_MODE).lower()
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Invalid INDICATOR_STORAGE '{mode}' (expected one of {', '.join(STORAGE_MODES)})")
+    return mode
+
+
+def snapshot_rows(
+    values: Iterable[Tuple[int, date, str, float]],
+) -> List[Dict[str, Any]]:
+    """
+    Pivot (stock_id, date, indicator_name, value) tuples into one wide row per
+    stock-day. Names without a snapshot column are collected into `extra`.
+    """
+    created_at = datetime.utcnow()
+    rows: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    for stock_id, day, name, value in values:
+        row = rows.get((stock_id, day))
+        if row is None:
+            row = rows[(stock_id, day)] = {
+                "stock_id": stock_id,
+                "date": day,
+                **{col: None for col in SNAPSHOT_INDICATORS},
+                "extra": None,
+                "created_at": created_at,
+            }
+        if name in SNAPSHOT_INDICATORS:
+            row[name] = value
+        else:
+            row["extra"] = {**(row["extra"] or {}), name: value}
+    return list(rows.values())
+
+
+def _upsert_snapshots(batch: List[Dict[str, Any]]):
+    """
+    Insert snapshots; on conflict only fill columns that are still NULL, so
+    existing values are never overwritten (same semantics as the EAV
+    ON CONFLICT DO NOTHING writer).
+    """
+    table = IndicatorSnapshot.__table__
+    stmt = insert(IndicatorSnapshot).values(batch)
+    excluded = stmt.excluded
+    empty = cast(literal("{}"), JSONB)
+    set_ = {col: func.coalesce(table.c[col], excluded[col]) for col in SNAPSHOT_INDICATORS}
+    # Existing keys win: jsonb || keeps the right-hand value on duplicate keys
+    set_["extra"] = func.coalesce(excluded.extra, empty).op("||")(func.coalesce(table.c.extra, empty))
+    return stmt.on_conflict_do_update(
+        index_elements=["stock_id", "date"],
+        set_=set_,
+        where=or_(
+            *(and_(table.c[col].is_(None), excluded[col].isnot(None)) for col in SNAPSHOT_INDICATORS),
+            and_(
+                excluded.extra.isnot(None),
+                or_(table.c.extra.is_(None), not_(table.c.extra.op("@>")(excluded.extra))),
+            ),
+        ),
+    ).returning(table.c.stock_id, table.c.date)
+
+
+async def bulk_upsert_snapshots(
+    session: AsyncSession,
+    values: Iterable[Tuple[int, date, str, float]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Counter:
+    """
+    Write (stock_id, date, indicator_name, value) tuples as wide snapshots.
+
+    Returns:
+        Counter of indicator values written per stock_id (rows that were
+        already complete are not counted)
+    """
+    rows = snapshot_rows(values)
+    filled = {
+        (row["stock_id"], row["date"]): sum(row[col] is not None for col in SNAPSHOT_INDICATORS) + len(row["extra"] or {})
+        for row in rows
+    }
+    written: Counter = Counter()
+    for batch in _batched(rows, batch_size):
+        result = await session.execute(_upsert_snapshots(batch))
+        for stock_id, day in result.all():
+            written[stock_id] += filled.get((stock_id, day), 0)
+    return written
+
+
+async def store_indicators(
+    session: AsyncSession,
+    values: Iterable[Tuple[int, date, str, float]],
+    mode: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Counter:
+    """
+    Store (stock_id, date, indicator_name, value) tuples in the configured
+    layout(s), skipping values that already exist. Does not commit.
+
+    Returns:
+        Counter of indicators created per stock_id (from the EAV table in
+        `dual` mode, which stays the source of truth until cut-over)
+    """
+    mode = storage_mode(mode)
+    values = list(values)
+    created: Counter = Counter()
+
+    if mode in ("eav", "dual"):
+        inserted = await bulk_insert_ignore_returning(
+            session, Indicator, indicator_rows(values), returning=["stock_id"], batch_size=batch_size
+        )
+        created = Counter(stock_id for (stock_id,) in inserted)
+
+    if mode in ("dual", "wide"):
+        written = await bulk_upsert_snapshots(session, values, batch_size=batch_size)
+        if mode == "wide":
+            created = written
+
+    logger.debug(f"[STORE] indicators ({mode}): {sum(created.values())} values for {len(created)} stocks")
+    return created
+
+
+async def load_indicator_map(
+    session: AsyncSession,
+    stock_ids: Sequence[int],
+    start_date: date,
+    end_date: date,
+    names: Optional[Iterable[str]] = None,
+    mode: Optional[str] = None,
+) -> IndicatorMap:
+    """
+    Load indicators as {stock_id: {date: {indicator_name: value}}} for
+    [start_date, end_date]. `names` limits the indicators read (default: all).
+    NULL values are omitted.
+    """
+    mode = storage_mode(mode)
+    names = set(names) if names is not None else None
+    stock_ids = list(stock_ids)
+    result: IndicatorMap = {}
+    if not stock_ids:
+        return result
+
+    if mode in ("dual", "wide"):
+        columns = [col for col in SNAPSHOT_INDICATORS if names is None or col in names]
+        extra_names = None if names is None else names.difference(SNAPSHOT_INDICATORS)
+        read_extra = extra_names is None or bool(extra_names)
+        if columns or read_extra:
+            query = (
+                select(
+                    IndicatorSnapshot.stock_id,
+                    IndicatorSnapshot.date,
+                    IndicatorSnapshot.extra if read_extra else literal(None),
+                    *(getattr(IndicatorSnapshot, c) for c in columns),
+                )
+                .where(IndicatorSnapshot.stock_id.in_(stock_ids))
+                .where(IndicatorSnapshot.date >= start_date)
+                .where(IndicatorSnapshot.date <= end_date)
+            )
+            for stock_id, day, extra, *row_values in (await session.execute(query)).all():
+                values = {col: value for col, value in zip(columns, row_values) if value is not None}
+                for name, value in (extra or {}).items():
+                    if value is not None and (extra_names is None or name in extra_names):
+                        values[name] = value
+                result.setdefault(stock_id, {})[day] = values
+
+    if mode in ("eav", "dual"):
+        query = (
+            select(Indicator.stock_id, Indicator.date, Indicator.indicator_name, Indicator.value)
+            .where(Indicator.stock_id.in_(stock_ids))
+            .where(Indicator.date >= start_date)
+            .where(Indicator.date <= end_date)
+        )
+        if names is not None:
+            query = query.where(Indicator.indicator_name.in_(sorted(names)))
+        if mode == "dual":
+            # Only stock-days that have no snapshot yet
+            has_snapshot = exists().where(
+                IndicatorSnapshot.stock_id == Indicator.stock_id,
+                IndicatorSnapshot.date == Indicator.date,
+            )
+            query = query.where(~has_snapshot)
+        for stock_id, day, name, value in (await session.execute(query)).all():
+            if value is not None:
+                result.setdefault(stock_id, {}).setdefault(day, {})[name] = value
+
+    return result
+
+
+async def prune_indicators(session: AsyncSession, cutoff: date) -> Dict[str, int]:
+    """Delete indicators dated before `cutoff` from every layout. Does not commit."""
+    eav = await session.execute(delete(Indicator).where(Indicator.date < cutoff))
+    wide = await session.execute(delete(IndicatorSnapshot).where(IndicatorSnapshot.date < cutoff))
+    return {"indicators_deleted": eav.rowcount or 0, "snapshots_deleted": wide.rowcount or 0}
+
+
+def _migration_sql() -> str:
+    pivots = ",\n".join(
+        f"max(value) FILTER (WHERE indicator_name = '{name}') AS {name}" for name in SNAPSHOT_INDICATORS
+    )
+    columns = ", ".join(SNAPSHOT_INDICATORS)
+    standard = ", ".join(f"'{name}'" for name in SNAPSHOT_INDICATORS)
+    return f"""
+        INSERT INTO indicator_snapshots (stock_id, date, {columns}, extra, created_at)
+        SELECT stock_id, date, {pivots},
+               jsonb_object_agg(indicator_name, value) FILTER (WHERE indicator_name NOT IN ({standard})),
+               now()
+        FROM indicators
+        WHERE date >= :start_date AND date < :end_date
+        GROUP BY stock_id, date
+        ON CONFLICT (stock_id, date) DO NOTHING
+    """
+
+
+async def migrate_to_snapshots(session: AsyncSession, start_date: date, end_date: date) -> int:
+    """
+    Copy EAV indicators dated in [start_date, end_date) into `indicator_snapshots`
+    with one set-based INSERT ... SELECT. Existing snapshots are kept. Does not commit.
+
+    Returns:
+        Number of snapshot rows created
+    """
+    result = await session.execute(text(_migration_sql()), {"start_date": start_date, "end_date": end_date})
+    return max(result.rowcount or 0, 0)
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, BigInteger, Date
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from shared.database import Base
 from datetime import datetime
@@ -40,6 +41,18 @@ class PriceData(Base):
 
     stock = relationship("Stock", back_populates="prices")
 
+class PriceRevision(Base):
+    """
+    Earliest price_data date written per stock since indicator-service last
+    consumed it. Lets indicator-service find states built before a back-filled or
+    overwritten bar without scanning price_data (one row per stock at most).
+    """
+    __tablename__ = "price_revisions"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    earliest_date = Column(Date, nullable=False)
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
 class Indicator(Base):
     __tablename__ = "indicators"
 
@@ -50,3 +63,41 @@ class Indicator(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     stock = relationship("Stock", back_populates="indicators")
+
+# Standard indicators stored as typed columns on IndicatorSnapshot (wide layout)
+SNAPSHOT_INDICATORS = (
+    "sma_9", "sma_20", "sma_50", "sma_200", "sma_vol_20",
+    "ema_9", "ema_12", "ema_20", "ema_26", "ema_50",
+    "rsi_14", "macd_line", "macd_signal", "macd_hist",
+    "bb_upper", "bb_middle", "bb_lower",
+)
+
+class IndicatorSnapshot(Base):
+    """
+    Wide indicator layout: one row per (stock_id, date) with one typed column per
+    standard indicator, replacing ~17 rows per stock-day in `indicators`.
+    Parameterised indicators outside the standard set (e.g. `ema_7`) live in `extra`.
+    """
+    __tablename__ = "indicator_snapshots"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    date = Column(Date, nullable=False, primary_key=True)
+    sma_9 = Column(Float)
+    sma_20 = Column(Float)
+    sma_50 = Column(Float)
+    sma_200 = Column(Float)
+    sma_vol_20 = Column(Float)
+    ema_9 = Column(Float)
+    ema_12 = Column(Float)
+    ema_20 = Column(Float)
+    ema_26 = Column(Float)
+    ema_50 = Column(Float)
+    rsi_14 = Column(Float)
+    macd_line = Column(Float)
+    macd_signal = Column(Float)
+    macd_hist = Column(Float)
+    bb_upper = Column(Float)
+    bb_middle = Column(Float)
+    bb_lower = Column(Float)
+    extra = Column(JSONB)  # {indicator_name: value} for non-standard indicators
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,133 @@
+"""
+Tests for shared bulk write utilities.
+"""
+import pytest
+from datetime import date
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+
+class _FakeSession:
+    """Captures executed statements and reports every row as inserted."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        result = MagicMock()
+        result.rowcount = len(stmt.compile(dialect=postgresql.dialect()).params) // 5
+        result.all.return_value = [(1,)]
+        return result
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestBatching:
+    """Tests for row batching."""
+
+    def test_batches_respect_batch_size(self):
+        from shared.bulk import _batched
+
+        rows = [{"a": i} for i in range(7)]
+        batches = list(_batched(rows, 3))
+
+        assert [len(b) for b in batches] == [3, 3, 1]
+
+    def test_batches_capped_by_bind_param_limit(self):
+        from shared.bulk import _batched, MAX_BIND_PARAMS
+
+        row = {f"c{i}": i for i in range(10)}
+        batches = list(_batched((dict(row) for _ in range(5000)), 5000))
+
+        assert all(len(b) * 10 <= MAX_BIND_PARAMS for b in batches)
+        assert sum(len(b) for b in batches) == 5000
+
+
+class TestBulkInsertIndicators:
+    """Tests for the indicator bulk writer."""
+
+    @pytest.mark.asyncio
+    async def test_uses_on_conflict_do_nothing(self):
+        from shared.bulk import bulk_insert_indicators
+
+        session = _FakeSession()
+        values = [(1, date(2026, 2, 10), "sma_9", 100.0), (1, date(2026, 2, 10), "ema_9", 101.0)]
+
+        inserted = await bulk_insert_indicators(session, values)
+
+        assert inserted == 2
+        assert len(session.statements) == 1
+        sql = _compiled(session.statements[0])
+        assert sql.startswith("INSERT INTO indicators")
+        assert "ON CONFLICT DO NOTHING" in sql
+
+    @pytest.mark.asyncio
+    async def test_splits_into_multiple_statements(self):
+        from shared.bulk import bulk_insert_indicators
+
+        session = _FakeSession()
+        values = [(i, date(2026, 2, 10), "sma_9", float(i)) for i in range(10)]
+
+        await bulk_insert_indicators(session, values, batch_size=4)
+
+        assert len(session.statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_empty_input_executes_nothing(self):
+        from shared.bulk import bulk_insert_indicators
+
+        session = _FakeSession()
+        assert await bulk_insert_indicators(session, []) == 0
+        assert session.statements == []
+
+    @pytest.mark.asyncio
+    async def test_returning_variant_collects_inserted_keys(self):
+        from shared.bulk import bulk_insert_ignore_returning, indicator_rows
+        from shared.models import Indicator
+
+        session = _FakeSession()
+        values = [(1, date(2026, 2, 10), "sma_9", 100.0)]
+
+        returned = await bulk_insert_ignore_returning(
+            session, Indicator, indicator_rows(values), returning=["stock_id"]
+        )
+
+        assert returned == [(1,)]
+        assert "RETURNING indicators.stock_id" in _compiled(session.statements[0])
+
+
+class TestBulkUpsert:
+    """Tests for the overwriting bulk writer."""
+
+    @pytest.mark.asyncio
+    async def test_updates_non_key_columns_on_conflict(self):
+        from shared.bulk import bulk_upsert
+        from shared.models import PriceData
+
+        session = _FakeSession()
+        rows = [{"stock_id": 1, "date": date(2026, 2, 10), "close": 10.0, "volume": 100}]
+
+        await bulk_upsert(session, PriceData, rows, conflict_columns=["stock_id", "date"])
+
+        sql = _compiled(session.statements[0])
+        assert "ON CONFLICT (stock_id, date) DO UPDATE SET" in sql
+        assert "close = excluded.close" in sql
+        assert "volume = excluded.volume" in sql
+        assert "stock_id = excluded.stock_id" not in sql
+
+    @pytest.mark.asyncio
+    async def test_without_update_columns_does_nothing_on_conflict(self):
+        from shared.bulk import bulk_upsert
+        from shared.models import PriceData
+
+        session = _FakeSession()
+        rows = [{"stock_id": i, "date": date(2026, 2, 10), "close": 10.0} for i in range(5)]
+
+        await bulk_upsert(session, PriceData, rows, ["stock_id", "date"], update_columns=[], batch_size=2)
+
+        assert len(session.statements) == 3
+        assert "ON CONFLICT (stock_id, date) DO NOTHING" in _compiled(session.statements[0])
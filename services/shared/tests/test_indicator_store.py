@@ -0,0 +1,171 @@
+"""
+Tests for indicator storage layouts (EAV / wide snapshots).
+"""
+import pytest
+from datetime import date
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+
+D1, D2 = date(2026, 2, 9), date(2026, 2, 10)
+
+
+class _FakeSession:
+    """Captures statements and returns canned rows per target table."""
+
+    def __init__(self, rows=None):
+        self.statements = []
+        self.rows = rows or {}
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        sql = _compiled(stmt)
+        result = MagicMock()
+        result.rowcount = 0
+        if sql.startswith("INSERT INTO indicators "):
+            result.all.return_value = [(1,), (1,)]
+        elif sql.startswith("INSERT INTO indicator_snapshots"):
+            result.all.return_value = [(1, D2)]
+        elif "FROM indicator_snapshots" in sql.split("WHERE")[0]:
+            result.all.return_value = self.rows.get("wide", [])
+        else:
+            result.all.return_value = self.rows.get("eav", [])
+        return result
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestStorageMode:
+    """Tests for storage mode resolution."""
+
+    def test_defaults_to_dual(self, monkeypatch):
+        from shared.indicator_store import storage_mode
+
+        monkeypatch.delenv("INDICATOR_STORAGE", raising=False)
+        assert storage_mode() == "dual"
+
+    def test_reads_environment_and_rejects_unknown(self, monkeypatch):
+        from shared.indicator_store import storage_mode
+
+        monkeypatch.setenv("INDICATOR_STORAGE", "WIDE")
+        assert storage_mode() == "wide"
+        with pytest.raises(ValueError):
+            storage_mode("columnar")
+
+
+class TestSnapshotRows:
+    """Tests for pivoting EAV tuples into wide rows."""
+
+    def test_one_row_per_stock_day_with_all_columns(self):
+        from shared.indicator_store import snapshot_rows
+        from shared.models import SNAPSHOT_INDICATORS
+
+        rows = snapshot_rows([
+            (1, D2, "sma_9", 10.0),
+            (1, D2, "rsi_14", 55.0),
+            (2, D2, "sma_9", 20.0),
+            (1, D2, "ema_7", 1.0),  # no snapshot column
+        ])
+
+        assert len(rows) == 2
+        assert all(set(SNAPSHOT_INDICATORS) <= set(row) for row in rows)
+        assert rows[0]["sma_9"] == 10.0 and rows[0]["rsi_14"] == 55.0
+        assert rows[0]["ema_9"] is None
+        assert rows[0]["extra"] == {"ema_7": 1.0}
+        assert rows[1]["extra"] is None
+
+
+class TestStoreIndicators:
+    """Tests for mode-dependent writes."""
+
+    @pytest.mark.asyncio
+    async def test_dual_writes_both_layouts_and_counts_eav(self):
+        from shared.indicator_store import store_indicators
+
+        session = _FakeSession()
+        created = await store_indicators(session, [(1, D2, "sma_9", 10.0), (1, D2, "ema_9", 11.0)], mode="dual")
+
+        sqls = [_compiled(s) for s in session.statements]
+        assert sqls[0].startswith("INSERT INTO indicators ")
+        assert sqls[1].startswith("INSERT INTO indicator_snapshots")
+        assert "ON CONFLICT (stock_id, date) DO UPDATE" in sqls[1]
+        assert "coalesce(indicator_snapshots.sma_9, excluded.sma_9)" in sqls[1]
+        assert "indicator_snapshots.extra @> excluded.extra" in sqls[1]
+        assert created == {1: 2}
+
+    @pytest.mark.asyncio
+    async def test_wide_only_counts_written_values(self):
+        from shared.indicator_store import store_indicators
+
+        session = _FakeSession()
+        created = await store_indicators(session, [(1, D2, "sma_9", 10.0), (1, D2, "ema_9", 11.0)], mode="wide")
+
+        assert len(session.statements) == 1
+        assert created == {1: 2}
+
+
+class TestLoadIndicatorMap:
+    """Tests for dual-read."""
+
+    @pytest.mark.asyncio
+    async def test_dual_merges_wide_and_eav_fallback(self):
+        from shared.indicator_store import load_indicator_map
+
+        session = _FakeSession({
+            "wide": [(1, D2, None, 10.0, None)],
+            "eav": [(1, D1, "sma_9", 9.0), (1, D1, "ema_9", None)],
+        })
+        result = await load_indicator_map(session, [1], D1, D2, names=["sma_9", "ema_9"], mode="dual")
+
+        assert result == {1: {D2: {"sma_9": 10.0}, D1: {"sma_9": 9.0}}}
+        eav_sql = _compiled(session.statements[1])
+        assert "NOT (EXISTS" in eav_sql
+
+    @pytest.mark.asyncio
+    async def test_wide_reads_only_requested_columns(self):
+        from shared.indicator_store import load_indicator_map
+
+        session = _FakeSession({"wide": [(1, D2, None, 50.0)]})
+        result = await load_indicator_map(session, [1], D1, D2, names=["rsi_14"], mode="wide")
+
+        assert result == {1: {D2: {"rsi_14": 50.0}}}
+        assert len(session.statements) == 1
+        sql = _compiled(session.statements[0])
+        assert "indicator_snapshots.rsi_14" in sql
+        assert "indicator_snapshots.sma_9" not in sql
+        assert "indicator_snapshots.extra" not in sql
+
+    @pytest.mark.asyncio
+    async def test_wide_reads_parameterised_names_from_extra(self):
+        from shared.indicator_store import load_indicator_map
+
+        session = _FakeSession({"wide": [(1, D2, {"ema_7": 3.0, "rsi_21": 40.0}, 10.0)]})
+        result = await load_indicator_map(session, [1], D1, D2, names=["sma_9", "ema_7"], mode="wide")
+
+        assert result == {1: {D2: {"sma_9": 10.0, "ema_7": 3.0}}}
+
+    @pytest.mark.asyncio
+    async def test_empty_stock_list_executes_nothing(self):
+        from shared.indicator_store import load_indicator_map
+
+        session = _FakeSession()
+        assert await load_indicator_map(session, [], D1, D2) == {}
+        assert session.statements == []
+
+
+class TestMigration:
+    """Tests for the EAV -> wide migration statement."""
+
+    def test_migration_pivots_every_snapshot_column(self):
+        from shared.indicator_store import _migration_sql
+        from shared.models import SNAPSHOT_INDICATORS
+
+        sql = _migration_sql()
+        assert "GROUP BY stock_id, date" in sql
+        assert "jsonb_object_agg(indicator_name, value) FILTER (WHERE indicator_name NOT IN (" in sql
+        assert "ON CONFLICT (stock_id, date) DO NOTHING" in sql
+        for name in SNAPSHOT_INDICATORS:
+            assert f"FILTER (WHERE indicator_name = '{name}') AS {name}" in sql
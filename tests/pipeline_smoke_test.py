@@ -4,7 +4,7 @@ Pipeline Smoke Test Suite
 Lightweight end-to-end validation for the live pipeline:
 1) data update
 2) indicator calculation
-3) ESM + PF scans
+3) strategy scan (all enabled strategies)
 4) morning summary trigger
 
 Run with: pytest tests/pipeline_smoke_test.py -v
@@ -132,7 +132,7 @@ async def run_simulated_daily_flow(target_date: Optional[date] = None) -> Dict[s
     Run a smoke daily flow for a specific date:
     1) daily-update
     2) daily-calculate
-    3) run-esm-scan + run-pf-scan
+    3) run-scan (all enabled strategies)
     4) send-morning-summary (next day)
     """
     _require_httpx()
@@ -162,16 +162,10 @@ async def run_simulated_daily_flow(target_date: Optional[date] = None) -> Dict[s
         results["steps"]["daily_calculate"] = {"status_code": resp.status_code, "body": _safe_json(resp)}
 
         resp = await client.post(
-            f"{get_service_url('scanner-service')}/run-esm-scan",
+            f"{get_service_url('scanner-service')}/run-scan",
             json={"target_date": sim_date.isoformat()},
         )
-        results["steps"]["esm_scan"] = {"status_code": resp.status_code, "body": _safe_json(resp)}
-
-        resp = await client.post(
-            f"{get_service_url('scanner-service')}/run-pf-scan",
-            json={"target_date": sim_date.isoformat()},
-        )
-        results["steps"]["pf_scan"] = {"status_code": resp.status_code, "body": _safe_json(resp)}
+        results["steps"]["strategy_scan"] = {"status_code": resp.status_code, "body": _safe_json(resp)}
 
         resp = await client.post(
             f"{get_service_url('alert-service')}/send-morning-summary",